@@ -0,0 +1,143 @@
+# batch.py
+# Render a frame range in chunks by a number of concurrent processes.
+# Chunks are handed out one at a time, whenever a process finishes the next chunk is started,
+# so a slow chunk doesn't hold up the others.
+# Frames whose images already exist and are not empty are skipped, so an interrupted job can simply be run again.
+#
+# It doesn't depend on Maya, jc.hair.batchRender() writes a batch file running it by mayapy:
+#	mayapy batch.py -s 1 -e 100 -w 8 -c 5 -o /project/images/shot_####.iff -- Render -r mr -s {start} -e {end} scene.mb
+# {start} and {end} in the command are replaced by the frame range of each chunk.
+# Any executable can stand in for the renderer, eg. a script writing dummy images:
+#	python batch.py -s 1 -e 20 -w 4 -o /tmp/img.####.iff -- sh -c 'for i in $(seq $0 $1); do printf x > /tmp/img.$(printf %04d $i).iff; done' {start} {end}
+#
+# Installation:
+# This file implements the module called jc.batch.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import os, sys, time, subprocess, optparse
+
+
+
+def	imageName(pattern, frame):
+# pattern: image path with the frame number as a run of '#', the number of '#' is the padding
+	i = pattern.rfind('#')
+	if i < 0:
+		return pattern
+	j = i
+	while j > 0 and pattern[j-1] == '#':
+		j -= 1
+	return pattern[:j] + str(frame).zfill(i+1-j) + pattern[i+1:]
+
+
+def	missingFrames(frames, pattern=None):
+# return: frames whose images don't exist or are empty, all frames if there's no pattern
+	if not pattern:
+		return list(frames)
+	missing = []
+	for f in frames:
+		name = imageName(pattern, f)
+		if not os.path.isfile(name) or os.path.getsize(name) == 0:
+			missing.append(f)
+	return missing
+
+
+def	chunks(frames, size):
+# return: list of (start, end) covering frames, each of at most size consecutive frames
+	size = max(1, size)
+	result = []
+	for f in sorted(frames):
+		if result and result[-1][1] == f-1 and result[-1][1]-result[-1][0]+1 < size:
+			result[-1] = (result[-1][0], f)
+		else:
+			result.append((f, f))
+	return result
+
+
+def	chunkCommand(command, start, end):
+	return [ x.replace("{start}", str(start)).replace("{end}", str(end)) for x in command ]
+
+
+def	run(command, ranges, workers=1, log=sys.stdout, interval=0.1):
+# Run command for each of (start, end) in ranges, at most workers at the same time.
+# A chunk whose process can't be started (eg. the command doesn't exist) fails with exit code -1.
+# If it's interrupted, the processes still running are terminated.
+# return: list of (start, end, exit code, seconds) in the order of completion
+
+	pending = list(ranges)
+	running = []
+	results = []
+	workers = max(1, workers)
+	try:
+		while pending or running:
+			while pending and len(running) < workers:
+				start, end = pending.pop(0)
+				log.write("start frames %d-%d\n" % (start, end))
+				log.flush()
+				try:
+					p = subprocess.Popen(chunkCommand(command, start, end))
+				except OSError, e:
+					results.append((start, end, -1, 0.0))
+					log.write("failed frames %d-%d, %s\n" % (start, end, e))
+					log.flush()
+					continue
+				running.append((p, start, end, time.time()))
+
+			if not running:
+				continue
+			time.sleep(interval)
+			for r in running[:]:
+				p, start, end, t = r
+				code = p.poll()
+				if code != None:
+					running.remove(r)
+					t = time.time() - t
+					results.append((start, end, code, t))
+					log.write("end frames %d-%d, exit code %d, %.1f seconds\n" % (start, end, code, t))
+					log.flush()
+	finally:
+		for p, start, end, t in running:
+			if p.poll() == None:
+				log.write("terminate frames %d-%d\n" % (start, end))
+				p.terminate()
+			p.wait()
+	return results
+
+
+def	main(argv=None):
+	parser = optparse.OptionParser(usage="%prog -s start -e end [options] -- command ... {start} {end} ...")
+	parser.disable_interspersed_args()
+	parser.add_option("-s", "--start", type="int", help="first frame")
+	parser.add_option("-e", "--end", type="int", help="last frame")
+	parser.add_option("-w", "--workers", type="int", default=1, help="number of concurrent processes")
+	parser.add_option("-c", "--chunk", type="int", default=10, help="number of frames per process")
+	parser.add_option("-o", "--output", help="image path with the frame number as '#', existing images are skipped")
+	options, command = parser.parse_args(argv)
+	if options.start == None or options.end == None or not command:
+		parser.error("missing frame range or command")
+	if options.start > options.end:
+		parser.error("start frame > end frame")
+
+	frames = missingFrames(range(options.start, options.end+1), options.output)
+	skipped = options.end - options.start + 1 - len(frames)
+	if skipped:
+		print "skip %d rendered frames" % skipped
+
+	t = time.time()
+	results = run(command, chunks(frames, options.chunk), options.workers)
+	failed = [ r for r in results if r[2] != 0 ]
+	print "%d chunks rendered in %.1f seconds, %d failed" % (len(results), time.time()-t, len(failed))
+	for start, end, code, seconds in failed:
+		print "failed frames %d-%d, exit code %d" % (start, end, code)
+
+	if failed:
+		return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
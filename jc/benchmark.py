@@ -0,0 +1,1418 @@
+# benchmark.py
+# Benchmarks of the parts of the jc modules which don't need Maya,
+# and of the Maya dependent ones against the stand-in of jc.fakemaya, which also counts the calls made to Maya (fake*).
+# They run under any python interpreter with synthetic data:
+#	python -m jc.benchmark				(run all)
+#	python -m jc.benchmark arcLength	(run the given ones)
+#
+# Installation:
+# This file implements the module called jc.benchmark.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import sys, time, math, random
+
+
+def	timeit(f, *args, **keywords):
+# return: (seconds, result) of one call of f
+
+	t = time.time()
+	r = f(*args, **keywords)
+	return time.time() - t, r
+
+
+def	report(name, seconds, count=1):
+	if count > 1:
+		print "%-40s %10.3f ms %10.3f us/call (%d calls)" % (name, seconds*1000, seconds*1.0e6/count, count)
+	else:
+		print "%-40s %10.3f ms" % (name, seconds*1000)
+
+
+def	syntheticCurve(spans=100, degree=3, seed=0):
+# return: (cvs, knots, degree) of an open wavy curve in the XY-plane, knots in Maya's convention
+
+	r = random.Random(seed)
+	n = spans + degree
+	cvs = [ (float(i), math.sin(i*0.7) + r.uniform(-0.2, 0.2), 0.0) for i in range(n) ]
+	knots = [ 0.0 ]*(degree-1) + [ float(i) for i in range(spans+1) ] + [ float(spans) ]*(degree-1)
+	return cvs, knots, degree
+
+
+def	arcLength(spans=200, queries=2000):
+# cost of building the arc length table and of length/inverse length queries against it
+	import jc.nurbs
+
+	print "arcLength: %d spans, %d queries" % (spans, queries)
+	cvs, knots, degree = syntheticCurve(spans)
+	jc.nurbs.clearArcLengthCache()
+
+	t, table = timeit(jc.nurbs.getArcLength, "curve", cvs, knots, degree)
+	report("build table (cold)", t)
+
+	t, table = timeit(jc.nurbs.getArcLength, "curve", cvs, knots, degree)
+	report("lookup table (warm)", t)
+
+	r = random.Random(1)
+	params = [ r.uniform(table.curve.minU, table.curve.maxU) for i in range(queries) ]
+	lengths = [ r.uniform(0, table.total) for i in range(queries) ]
+
+	def lengthQueries():
+		for u in params:
+			table.length(table.curve.minU, u)
+	t, r = timeit(lengthQueries)
+	report("length", t, queries)
+
+	def inverseQueries():
+		for l in lengths:
+			table.findU(l)
+	t, r = timeit(inverseQueries)
+	report("findU", t, queries)
+
+
+def	curvePoints(spans=200, samples=20000):
+# points and tangents of many samples by one evaluate() call, compared with point() and derivative() of each of them
+	import jc.nurbs
+
+	print "curvePoints: %d spans, %d samples" % (spans, samples)
+	cvs, knots, degree = syntheticCurve(spans)
+	c = jc.nurbs.curve(cvs, knots, degree)
+	params = c.uniformParameters(samples-1)
+
+	def eachSample():
+		points = []
+		tangents = []
+		for u in params:
+			points.append(c.point(u))
+			d = c.derivative(u)
+			l = math.sqrt(d[0]*d[0] + d[1]*d[1] + d[2]*d[2])
+			tangents.append([ x/l for x in d ])
+		return points, tangents
+	t, (points, tangents) = timeit(eachSample)
+	report("point() and derivative()", t, samples)
+
+	t, (points2, tangents2) = timeit(c.evaluate, params)
+	report("evaluate()", t, samples)
+
+	error = 0.0
+	for a, b in zip(points+tangents, points2+tangents2):
+		error = max(error, max([ math.fabs(x-y) for x, y in zip(a, b) ]))
+	print "max difference: %g" % error
+	if error > 1.0e-9:
+		raise Exception, "results differ"
+
+	# known points and unit tangents: a degree-1 polyline, whose spans are its segments,
+	# and a uniform periodic cubic, whose point at a knot k is (P[k] + 4P[k+1] + P[k+2])/6 with tangent along P[k+2]-P[k],
+	# and at the middle of a span (P[k] + 23P[k+1] + 23P[k+2] + P[k+3])/48 with tangent along -P[k]-5P[k+1]+5P[k+2]+P[k+3]
+	r = 1/math.sqrt(50.0)
+	square = [ (0,0,0), (2,0,0), (4,0,0), (4,2,0), (4,4,0), (2,4,0), (0,4,0), (0,2,0) ]
+	known = [
+		("polyline", jc.nurbs.curve([ (0,0,0), (1,0,0), (1,2,0), (3,2,0) ], [ 0, 1, 2, 3 ], 1),
+			[ (0.5, (0.5,0,0), (1,0,0)), (1.5, (1,1,0), (0,1,0)), (2.25, (1.5,2,0), (1,0,0)), (3.0, (3,2,0), (1,0,0)) ]),
+		("periodic cubic", jc.nurbs.curve(square+square[:3], range(-2, 11), 3, 2),
+			[ (0.0, (2,0,0), (1,0,0)), (2.0, (4,2,0), (0,1,0)), (0.5, (142/48.0,2/48.0,0), (7*r,r,0)),
+			(7.5, (50/48.0,2/48.0,0), (7*r,-r,0)), (8.5, (142/48.0,2/48.0,0), (7*r,r,0)) ]),
+	]
+	for name, k, expected in known:
+		a, ta = k.evaluate([ e[0] for e in expected ])
+		for (u, p, tangent), q, tq in zip(expected, a, ta):
+			if max([ math.fabs(x-y) for x, y in zip(p, q)+zip(tangent, tq) ]) > 1.0e-9:
+				raise Exception, "wrong point of %s at %g: %r %r" % (name, u, q, tq)
+
+	# a periodic curve is the same after one period, and the isoparm of a surface swept along z is the curve moved along z
+	periodic = [ (math.cos(i*math.pi/4), math.sin(i*math.pi/4), 0.0) for i in range(8) ]
+	periodic = jc.nurbs.curve(periodic+periodic[:3], range(-2, 11), 3, 2)
+	period = periodic.maxU - periodic.minU
+	u = [ periodic.minU + period*i/100.0 for i in range(100) ]
+	a, ta = periodic.evaluate(u)
+	b, tb = periodic.evaluate([ x+period for x in u ])
+	error = max([ math.fabs(x-y) for p, q in zip(a+ta, b+tb) for x, y in zip(p, q) ])
+	print "periodic curve, max difference after one period: %g" % error
+	if error > 1.0e-9:
+		raise Exception, "results differ"
+
+	rows = 4
+	surface = [ (p[0], p[1], j*2.0) for p in cvs for j in range(rows) ]
+	knotsV = [ 0.0 ]*(rows-1) + [ 1.0 ]*(rows-1)
+	iso = jc.nurbs.isoparm(surface, knots, knotsV, degree, rows-1, 0, 0, 0.5)
+	a, ta = iso.evaluate(params[:100], False)
+	error = max([ math.fabs(p[0]-q[0]) + math.fabs(p[1]-q[1]) + math.fabs(p[2]-3.0) for p, q in zip(a, points) ])
+	print "isoparm, max difference: %g" % error
+	if error > 1.0e-9:
+		raise Exception, "results differ"
+
+
+def	borderVertices(curves=20, vertices=20000, tolerance=0.01):
+# matching border vertices against pattern curves with the segment grid, compared with testing every segment
+	import jc.nurbs, jc.geometry
+
+	print "borderVertices: %d curves, %d vertices" % (curves, vertices)
+	r = random.Random(2)
+	polylines = []
+	for i in range(curves):
+		cvs, knots, degree = syntheticCurve(10, seed=i)
+		cvs = [ (x*2, y+i*3, z) for x, y, z in cvs ]
+		polylines.append(jc.nurbs.curve(cvs, knots, degree).polyline(tolerance*10))
+
+	# half of the vertices are on the curves, some of them mirrored to -x
+	points = []
+	for k in range(vertices):
+		pts = polylines[r.randrange(curves)]
+		p = list(pts[r.randrange(len(pts))])
+		if k % 2:
+			p[1] += 1.0
+		if k % 3 == 0:
+			p[0] = -p[0]
+		points.append(p)
+
+	t, grid = timeit(jc.geometry.matchPointsToPolylines, points, polylines, tolerance, True)
+	report("segment grid", t, vertices)
+
+	def bruteForce(points):
+		result = []
+		for p in points:
+			if p[0] < 0:
+				p = (-p[0], p[1], p[2])
+			found = None
+			for i in range(len(polylines)):
+				pts = polylines[i]
+				for j in range(len(pts)-1):
+					if jc.geometry.distanceToSegment2D(p, pts[j], pts[j+1]) <= tolerance:
+						found = i
+						break
+				if found != None:
+					break
+			result.append(found)
+		return result
+	count = min(vertices, 500)
+	t, brute = timeit(bruteForce, points[:count])
+	report("every segment (first %d vertices)" % count, t, count)
+	if brute != grid[:count]:
+		raise Exception, "results differ"
+
+
+def	patternGraph(patterns=100, sides=12, tolerance=0.01):
+# closure, ordering and adjacent pairs of pattern curves by the end point graph, compared with testing every pair of curves
+	import jc.geometry
+
+	print "patternGraph: %d patterns of %d curves" % (patterns, sides)
+	r = random.Random(4)
+	curves = []
+	for i in range(patterns):
+		corners = [ (i*3.0 + math.cos(2*math.pi*k/sides), math.sin(2*math.pi*k/sides), 0.0) for k in range(sides) ]
+		for k in range(sides):
+			a = corners[k]
+			b = corners[(k+1)%sides]
+			b = (b[0] + r.uniform(-0.1, 0.1)*tolerance, b[1], b[2])
+			if r.random() < 0.5:
+				curves.append(("c%d_%d" % (i, k), b, a))
+			else:
+				curves.append(("c%d_%d" % (i, k), a, b))
+	r.shuffle(curves)
+
+	t, graph = timeit(jc.geometry.endpointGraph, curves, tolerance)
+	report("build graph", t, len(curves))
+	t, closed = timeit(graph.isClosed)
+	report("isClosed", t, len(curves))
+	t, pairs = timeit(graph.adjacentPairs)
+	report("adjacentPairs", t, len(curves))
+
+	def bruteForce():
+		result = []
+		for i in range(len(curves)):
+			for j in range(i+1, len(curves)):
+				a, ia, ib = curves[i]
+				b, ja, jb = curves[j]
+				if math.sqrt(sum([ (x-y)**2 for x, y in zip(ib, ja) ])) < tolerance:
+					result.append((a, b))
+				elif math.sqrt(sum([ (x-y)**2 for x, y in zip(jb, ia) ])) < tolerance:
+					result.append((b, a))
+		return result
+	t, pairs2 = timeit(bruteForce)
+	report("every pair", t, len(curves)*(len(curves)-1)/2)
+	print "closed: %s, same pairs: %s" % (closed, pairs == pairs2)
+
+	# order the curves of one pattern, each curve must start where the previous one ends
+	one = jc.geometry.endpointGraph([ c for c in curves if c[0].startswith("c0_") ], tolerance)
+	t, order = timeit(one.order)
+	report("order (one pattern)", t, sides)
+	ok = len(order) == sides
+	for k in range(sides):
+		a, ra = order[k-1]
+		b, rb = order[k]
+		p = one.ends[a][not ra and 1 or 0]
+		q = one.ends[b][rb and 1 or 0]
+		ok = ok and math.sqrt(sum([ (x-y)**2 for x, y in zip(p, q) ])) < tolerance
+	broken = jc.geometry.endpointGraph([ c for c in curves if c[0].startswith("c0_") and c[0] != "c0_0" ], tolerance)
+	print "ordered: %s, open pattern closed: %s" % (ok, broken.isClosed())
+
+
+def	edgeChains(rings=1000, strips=1000, length=50):
+# chaining shuffled edges of rings and open strips by jc.geometry.edgeChains(), checking the vertex sequences of known cases
+	import jc.geometry
+
+	cases = [
+		("ring", [ (0,1), (1,2), (2,3), (3,0) ], [ [ 0, 1, 2, 3, 0 ] ]),
+		("ring listed backwards", [ (3,0), (3,2), (2,1), (1,0) ], [ [ 0, 3, 2, 1, 0 ] ]),
+		("open strip", [ (2,3), (0,1), (4,3), (1,2) ], [ [ 0, 1, 2, 3, 4 ] ]),
+		("T-junction", [ (0,1), (1,2), (1,3) ], [ [ 0, 1, 2 ], [ 1, 3 ] ]),
+		("T-junction from its stem", [ (1,3), (0,1), (1,2) ], [ [ 0, 1, 3 ], [ 1, 2 ] ]),
+		("strip and ring", [ (10,11), (5,6), (11,12), (12,10), (6,7) ], [ [ 10, 11, 12, 10 ], [ 5, 6, 7 ] ]),
+	]
+	for name, edges, expected in cases:
+		chains = jc.geometry.edgeChains(edges)
+		if chains != expected:
+			raise Exception, "wrong chains of %s: %r" % (name, chains)
+
+	print "edgeChains: %d rings and %d strips of %d edges" % (rings, strips, length)
+	r = random.Random(3)
+	edges = []
+	for i in range(rings + strips):
+		v = i*(length+1)
+		for k in range(length):
+			if i < rings and k == length-1:
+				edges.append((v+k, v))
+			else:
+				edges.append((v+k, v+k+1))
+	r.shuffle(edges)
+	t, chains = timeit(jc.geometry.edgeChains, edges)
+	report("edgeChains", t, len(edges))
+	closed = len([ c for c in chains if c[0] == c[-1] ])
+	if len(chains) != rings + strips or closed != rings or sum([ len(c)-1 for c in chains ]) != len(edges):
+		raise Exception, "wrong chains: %d, %d closed" % (len(chains), closed)
+
+
+def	patternMesh(resolution=4.0, points=400):
+# meshing a shirt-like pattern by jc.mesher, checking that the faces cover the pattern without overlapping
+	import jc.mesher
+
+	print "patternMesh: resolution %g, %d boundary points" % (resolution, points)
+	boundary = []
+	for i in range(points):
+		t = 2*math.pi*i/points
+		r = 20 + 6*math.sin(3*t) + 2*math.cos(7*t)
+		boundary.append((r*math.cos(t), r*math.sin(t)))
+
+	t, (vertices, faces) = timeit(jc.mesher.planarMesh, boundary, 1.0/resolution)
+	report("planarMesh (%d faces)" % len(faces), t)
+
+	quads = len([ f for f in faces if len(f) == 4 ])
+	total = sum([ jc.mesher.area([ vertices[i] for i in f ]) for f in faces ])
+	edges = {}
+	for f in faces:
+		for k in range(len(f)):
+			edges[(f[k-1], f[k])] = edges.get((f[k-1], f[k]), 0) + 1
+	border = len([ e for e in edges if (e[1], e[0]) not in edges ])
+	print "%d vertices, %d%% quads, area %.4f of %.4f, %d repeated edges, %d border edges" % \
+		(len(vertices), quads*100/len(faces), total, jc.mesher.area(boundary), len([ e for e in edges if edges[e] > 1 ]), border)
+
+
+def	stitchRotations(joints=400, spans=100):
+# solving the rotations of a stitch joint chain lying on a pattern curve
+	import jc.nurbs, jc.geometry
+
+	print "stitchRotations: %d joints, %d spans" % (joints, spans)
+	cvs, knots, degree = syntheticCurve(spans)
+	c = jc.nurbs.curve(cvs, knots, degree)
+	table = jc.nurbs.arcLength(c)
+
+	# joints are shorter than the arc they span so that every circle meets the curve
+	lengths = [ 0.95*table.total/joints ]*(joints-1)
+	t, params = timeit(c.sampleParameters, min(lengths)/20)
+	t1, points = timeit(lambda: [ c.point(u) for u in params ])
+	report("sample curve (%d points)" % len(params), t+t1)
+
+	t, rotations = timeit(jc.geometry.solveChainRotations, c.point(c.minU), lengths, points, params, c.minU)
+	report("solve rotations", t, len(lengths))
+
+
+def	matchChains(chains=200, joints=20):
+# matching stitch joint chains to destination chains by jc.joints.matchChain(), checking that the joints reach the targets
+	import jc.joints
+
+	# hand-built chains of two bones from the origin along x, to reach up y then along z:
+	# the root turns 90 about z, and the second joint -90 about its y which is the world x after the root's turn,
+	# unless the root is already oriented up y, or the chain is moved along x with its parent
+	identity = [ 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0 ]
+	moved = identity[:12] + [ 5.0, 0.0, 0.0, 1.0 ]
+	bones = [ [ 0.0, 0.0, 0.0 ], [ 1.0, 0.0, 0.0 ], [ 1.0, 0.0, 0.0 ] ]
+	zero = [ [ 0.0, 0.0, 0.0 ] ]*3
+	known = [
+		("chain", identity, zero, [ (0,0,0), (0,1,0), (0,1,1) ], None, (0,0,0), [ (0,0,90), (0,-90,0) ]),
+		("oriented chain", identity, [ [ 0.0, 0.0, 90.0 ] ]+zero[1:], [ (0,0,0), (0,1,0), (0,1,1) ], None, (0,0,0), [ (0,0,0), (0,-90,0) ]),
+		("moved chain", moved, zero, [ (6,0,0), (6,1,0), (6,1,1) ], None, (1,0,0), [ (0,0,90), (0,-90,0) ]),
+		("chain in zyx", identity, zero, [ (0,0,0), (0,1,0), (0,1,1) ], [ 5, 5, 5 ], (0,0,0), [ (0,0,90), (0,-90,0) ]),
+	]
+	for name, parent, orients, targets, orders, root, rotations in known:
+		r, rs = jc.joints.matchChain(parent, bones, zero, orients, targets, 0.0, orders)
+		error = max([ abs(x-y) for a, b in zip([ root ]+rotations, [ r ]+rs) for x, y in zip(a, b) ])
+		if error > 1.0e-9:
+			raise Exception, "wrong rotations of %s: %r %r" % (name, r, rs)
+
+	print "matchChains: %d chains of %d joints" % (chains, joints)
+	r = random.Random(6)
+	cases = []
+	for c in range(chains):
+		a = [ r.uniform(-180, 180) for i in range(3) ]
+		m = jc.joints.eulerMatrix(a)
+		parent = m[0]+[ 0.0 ] + m[1]+[ 0.0 ] + m[2]+[ 0.0 ] + [ r.uniform(-5, 5) for i in range(3) ]+[ 1.0 ]
+		translates = [ [ r.uniform(-1, 1) for i in range(3) ] ] + [ [ r.uniform(0.5, 1.0), 0.0, 0.0 ] for i in range(joints-1) ]
+		orients = [ [ r.uniform(-90, 90) for i in range(3) ] for i in range(joints) ]
+		rotates = [ [ 0.0, 0.0, 0.0 ] for i in range(joints) ]
+		orders = [ r.randrange(6) for i in range(joints) ]
+		# the destination is the same chain bent elsewhere
+		bent = [ [ r.uniform(-60, 60) for i in range(3) ] for i in range(joints) ]
+		moved = [ [ x+r.uniform(-1, 1) for x in translates[0] ] ] + translates[1:]
+		targets = jc.joints.chainPositions(parent, moved, bent, orients, orders)
+		cases.append((parent, translates, rotates, orients, targets, orders))
+
+	def solve():
+		return [ jc.joints.matchChain(parent, translates, rotates, orients, targets, 0.0, orders)
+			for parent, translates, rotates, orients, targets, orders in cases ]
+	t, results = timeit(solve)
+	report("matchChain", t, chains*joints)
+
+	error = 0.0
+	for (parent, translates, rotates, orients, targets, orders), (root, rotations) in zip(cases, results):
+		positions = jc.joints.chainPositions(parent, [ root ]+translates[1:], rotations+[ rotates[-1] ], orients, orders)
+		for p, q in zip(positions, targets):
+			error = max(error, max([ abs(x-y) for x, y in zip(p, q) ]))
+	print "max distance from targets: %g" % error
+	if error > 1.0e-6:
+		raise Exception, "targets not reached"
+
+	# Euler angles are kept close to the previous key instead of flipping, in every rotate order
+	flips = 0
+	for order in range(6):
+		previous = [ 170.0, 10.0, -175.0 ]
+		for i in range(1000):
+			angles = [ x + r.uniform(-20, 20) for x in previous ]
+			m = jc.joints.eulerMatrix(angles, order)
+			e = jc.joints.matrixEuler(m, previous, order)
+			if max([ abs(x-y) for x, y in zip(e, angles) ]) > 1.0e-6:
+				flips += 1
+			previous = e
+	print "flips in 1000 continuous keys of each rotate order: %d" % flips
+	if flips:
+		raise Exception, "Euler angles flipped"
+
+
+def	cameraCulling(rows=500, columns=1000, cameras=3, samples=5):
+# jc.geometry.faceNormals() and facingFaces() of a sphere of rows x columns quads, against cameras orbiting it
+	import jc.geometry
+
+	print "cameraCulling: %d faces, %d cameras x %d samples" % (rows*columns, cameras, samples)
+	points = []
+	for j in range(rows+1):
+		a = math.pi*j/rows
+		for i in range(columns):
+			b = 2*math.pi*i/columns
+			points.append((math.sin(a)*math.cos(b), math.cos(a), math.sin(a)*math.sin(b)))
+	counts = [ 4 ]*(rows*columns)
+	vertices = []
+	for j in range(rows):
+		for i in range(columns):
+			k = (i+1) % columns
+			vertices += [ j*columns+i, j*columns+k, (j+1)*columns+k, (j+1)*columns+i ]
+
+	t, (normals, centroids) = timeit(jc.geometry.faceNormals, points, counts, vertices)
+	report("face normals and centroids", t, len(counts))
+
+	# a perspective camera from the front facing about half of the sphere
+	t, facing = timeit(jc.geometry.facingFaces, normals, centroids, [ ((0.0, 0.0, 100.0), (0.0, 0.0, -1.0), False) ])
+	report("facing faces (1 camera)", t, len(counts))
+	if abs(facing.count(True) - len(counts)/2) > len(counts)/20:
+		raise Exception, "wrong number of faces facing the camera: %d" % facing.count(True)
+
+	views = []
+	for c in range(cameras):
+		for s in range(samples):
+			b = 2*math.pi*(c + s*0.1/samples)/cameras
+			eye = (5*math.sin(b), 0.0, 5*math.cos(b))
+			views.append((eye, (-eye[0]/5, 0.0, -eye[2]/5), False))
+	t, facing = timeit(jc.geometry.facingFaces, normals, centroids, views)
+	report("facing faces (%d views)" % len(views), t, len(counts))
+	t, ranges = timeit(jc.geometry.indexRanges, [ i for i in range(len(facing)) if not facing[i] ])
+	report("%d faces to delete in %d ranges" % (facing.count(False), len(ranges)), t)
+
+
+def	mirrorGeometry(rows=500, columns=1000, regions=3):
+# flipping the UVs and finding the seam of a half body the way jc.character.mirrorGeometry does, on a half cylinder
+# of rows x columns vertices whose first column lies on the mirror plane, its UVs spread over a number of U regions
+	import jc.geometry
+
+	print "mirrorGeometry: %d vertices, %d regions" % (rows*columns, regions)
+	points = []
+	us = []
+	for j in range(rows):
+		for i in range(columns):
+			a = math.pi*i/(columns-1)
+			points.append((math.sin(a), j*0.01, math.cos(a)))
+			us.append(j % regions + 0.5 + 0.5*i/(columns-1))
+	mirrored = [ (-x, y, z) for x, y, z in points ]
+
+	t, flipped = timeit(jc.geometry.mirrorUVs, us)
+	report("flip UVs", t, len(us))
+	for u, f in zip(us[:columns], flipped[:columns]):
+		if int(u) != int(f) and u != int(u):
+			raise Exception, "UV flipped out of its region: %g %g" % (u, f)
+
+	t, seam = timeit(jc.geometry.seamVertices, points, mirrored)
+	report("seam vertices", t, len(points))
+	if len(seam) != rows*2:
+		raise Exception, "wrong number of seam vertices: %d" % len(seam)
+	t, ranges = timeit(jc.geometry.indexRanges, seam)
+	report("%d seam vertices in %d ranges" % (len(seam), len(ranges)), t)
+
+
+def	skinWeights(vertices=20000, influences=80, perVertex=4):
+# formatting, parsing and remapping a weight matrix the way jc.character.skinWeights does
+	import jc.weights
+
+	print "skinWeights: %d vertices, %d influences" % (vertices, influences)
+	r = random.Random(3)
+	names = [ "joint%d" % i for i in range(influences) ]
+	weights = [ 0.0 ]*(vertices*influences)
+	for v in range(vertices):
+		for i in r.sample(range(influences), perVertex):
+			weights[v*influences+i] = r.random()
+
+	t, lines = timeit(jc.weights.formatWeights, weights, names)
+	report("format", t, vertices)
+
+	t, rows = timeit(jc.weights.parseWeights, lines)
+	report("parse", t, vertices)
+
+	# influences reordered, with a namespace and one of them missing
+	target = [ "ns:"+n for n in names[1:] ]
+	r.shuffle(target)
+	t, result = timeit(jc.weights.remapWeights, rows, target)
+	report("remap and normalize", t, vertices)
+
+	subset = range(0, vertices, 10)
+	t, result = timeit(jc.weights.remapWeights, rows, target, subset)
+	report("remap subset", t, len(subset))
+
+
+def	nClothMap(vertices=100000, selected=20000):
+# updating a per-vertex nCloth map, the mel command with every value as text compared with merging index and value lists
+	import re, jc.weights
+
+	print "nClothMap: %d vertices, %d selected" % (vertices, selected)
+	r = random.Random(5)
+	values = [ r.random() for i in range(vertices) ]
+	components = [ "pShape.vtx[%d]" % i for i in sorted(r.sample(xrange(vertices), selected)) ]
+
+	def melCommand():
+		vals = list(values)
+		indexReg = re.compile("\[([0-9]+)\]")
+		for v in components:
+			m = indexReg.search(v)
+			if m:
+				i = int(m.group(1))
+				if i < len(vals):
+					vals[i] = 1
+		c = "setAttr \"nClothShape1.inputAttractPerVertex\" -type \"doubleArray\" " + str(len(vals))
+		for v in vals:
+			c += " " + str(v)
+		c += ";"
+		return c
+	t, c = timeit(melCommand)
+	report("regex and mel command (%d KB)" % (len(c)/1024), t)
+
+	def merge():
+		indices = jc.weights.componentIndices(components)
+		return jc.weights.mergeMap(values, indices, 1)
+	t, merged = timeit(merge)
+	report("componentIndices and mergeMap", t)
+
+	# unflattened components, as returned by ls without fl
+	ranges = [ "pShape.vtx[%d:%d]" % (i, min(i+99, vertices-1)) for i in range(0, vertices, 200) ]
+	t, indices = timeit(jc.weights.componentIndices, ranges)
+	report("componentIndices (%d ranges)" % len(ranges), t)
+	print "same values: %s" % (max([ abs(a-float(b)) for a, b in zip(merged, c.rstrip(";").split()[5:]) ]) < 1.0e-9)
+
+
+def	coincidentVertices(sizes=(10000, 50000, 200000), tolerance=0.0001):
+# matching the vertices of a body against those of an influence patch cut from it, as jc.character.createInfluenceObject does
+	import jc.geometry
+
+	for n in sizes:
+		print "coincidentVertices: %d vertices" % n
+		r = random.Random(4)
+		side = int(math.sqrt(n))
+		# a wavy grid as the body, a tenth of it offset by less than the tolerance as the patch
+		points = [ (i*0.01, math.sin(i*0.05)*math.cos(j*0.05), j*0.01) for i in range(side) for j in range(side) ]
+		patch = [ (x + r.uniform(-0.5, 0.5)*tolerance, y, z) for x, y, z in points[:len(points)/10] ]
+
+		t, result = timeit(jc.geometry.coincidentPoints, points, patch, tolerance)
+		report("hash grid", t, len(points))
+		if result.count(True) != len(patch):
+			raise Exception, "wrong number of coincident vertices"
+
+		def	bruteForce(points):
+			result = []
+			for p in points:
+				found = False
+				for q in patch:
+					if abs(p[0]-q[0]) < tolerance and abs(p[1]-q[1]) < tolerance and abs(p[2]-q[2]) < tolerance:
+						found = True
+						break
+				result.append(found)
+			return result
+		count = min(len(points), 20)
+		t, brute = timeit(bruteForce, points[-count:])
+		report("every vertex (last %d vertices)" % count, t, count)
+		if brute != result[-count:]:
+			raise Exception, "results differ"
+
+
+def	presets(paths=3, nodeTypes=200, files=20, lookups=100):
+# looking up presets through the index of jc.presets, compared with walking the preset directories every time
+	import os, shutil, tempfile, jc.presets
+
+	print "presets: %d paths, %d files" % (paths, paths*nodeTypes*files)
+	top = tempfile.mkdtemp()
+	try:
+		presetPaths = []
+		for i in range(paths):
+			presetPath = os.path.join(top, "path%d" % i, "attrPresets")
+			for j in range(nodeTypes):
+				d = os.path.join(presetPath, "node%d" % j)
+				os.makedirs(d)
+				for k in range(files):
+					open(os.path.join(d, "preset%d.mel" % k), "w").close()
+			presetPaths.append(presetPath)
+
+		def	walk(node):
+			p = []
+			for presetPath in presetPaths:
+				for root, dirs, files in os.walk(presetPath):
+					if os.path.basename(root) == node:
+						for f in files:
+							if f.endswith('.mel'):
+								p.append(f[:-4])
+			return p
+
+		t, r = timeit(lambda: [ walk("node%d" % (i % nodeTypes)) for i in range(lookups) ])
+		report("walk every time", t, lookups)
+
+		index = jc.presets.presetIndex()
+		t, p = timeit(index.presets, "node0", presetPaths)
+		report("index (cold)", t)
+		if p != walk("node0"):
+			raise Exception, "results differ"
+
+		t, r = timeit(lambda: [ index.presets("node%d" % (i % nodeTypes), presetPaths) for i in range(lookups) ])
+		report("index (warm)", t, lookups)
+
+		open(os.path.join(presetPaths[0], "node0", "new.mel"), "w").close()
+		t, p = timeit(index.presets, "node0", presetPaths)
+		report("index (after adding a preset)", t)
+		if "new" not in p or index.scans != paths+1:
+			raise Exception, "index not refreshed"
+	finally:
+		shutil.rmtree(top)
+
+
+def	fakeMaya():
+# put jc.fakemaya in place of maya and return it with an empty scene, the jc modules using Maya can be imported afterwards
+	import jc.fakemaya
+
+	if sys.modules.get("maya.cmds").__class__ != jc.fakemaya.recording:
+		jc.fakemaya.install()
+	jc.fakemaya.scene.clear()
+	jc.fakemaya.calls.reset()
+	return jc.fakemaya
+
+
+def	reportCalls(name, seconds, calls):
+	report(name, seconds)
+	print "%-40s %10d calls %s" % ("", calls.total(), ", ".join([ "%s %d" % x for x in calls.top() ]))
+
+
+def	patternScene(fake, resolution=40, size=10.0):
+# a square pattern mesh of resolution x resolution quads in XY-plane, with its four sides as pattern curves connected to it
+# return: curve transforms
+
+	n = resolution+1
+	points = [ (size*i/resolution, size*j/resolution, 0.0) for j in range(n) for i in range(n) ]
+	faces = [ (j*n+i, j*n+i+1, (j+1)*n+i+1, (j+1)*n+i) for j in range(resolution) for i in range(resolution) ]
+	pattern = fake.scene.createMesh("pattern", points, faces)
+
+	corners = [ (0.0, 0.0), (size, 0.0), (size, size), (0.0, size) ]
+	curves = []
+	for k in range(4):
+		a = corners[k]
+		b = corners[(k+1)%4]
+		cvs = [ (a[0]+(b[0]-a[0])*i/3.0, a[1]+(b[1]-a[1])*i/3.0, 0.0) for i in range(4) ]
+		c = fake.scene.createCurve("patternCurve%d" % k, cvs, [ 0.0, 0.0, 0.0, 1.0, 1.0, 1.0 ], 3)
+		fake.scene.nodes[c.name+"Shape"].attrs["jcp"] = None
+		fake.scene.connect(pattern.name+".message", c.name+"Shape.jcp")
+		curves.append(c.name)
+	return curves
+
+
+def	fakeBorderVertices(resolution=40):
+# jc.clothes.__findBorderVertices() against the fake Maya
+	fake = fakeMaya()
+	import jc.clothes
+
+	print "fakeBorderVertices: %dx%d pattern" % (resolution, resolution)
+	curves = patternScene(fake, resolution)
+	fake.calls.reset()
+	t, vertices = timeit(jc.clothes.__findBorderVertices, curves)
+	reportCalls("find border vertices (cold)", t, fake.calls)
+	if len(set(vertices)) != resolution*4:
+		raise Exception, "wrong number of border vertices"
+
+	fake.calls.reset()
+	t, vertices = timeit(jc.clothes.__findBorderVertices, curves)
+	reportCalls("find border vertices (cached indices)", t, fake.calls)
+
+
+def	fakePatternBorder(radius=5.0, resolution=1.0):
+# the boundary of a round pattern sampled by jc.clothes.createPattern and meshed by jc.mesher at a coarse resolution,
+# checking that every border vertex of the mesh is found on the curves by jc.clothes.__findBorderVertices()
+	fake = fakeMaya()
+	import jc.clothes, jc.mesher
+
+	print "fakePatternBorder: radius %g, resolution %g" % (radius, resolution)
+	# a circle of four cubic arcs in XY-plane, on the side of +x where patterns are laid
+	k = 0.5522847498*radius
+	arc = [ (radius, 0.0), (radius, k), (k, radius), (0.0, radius) ]
+	center = radius + 1.3
+	curves = []
+	for q in range(4):
+		c, s = [ (1, 0), (0, 1), (-1, 0), (0, -1) ][q]
+		cvs = [ (center + x*c - y*s, center + x*s + y*c, 0.0) for x, y in arc ]
+		curves.append(fake.scene.createCurve("patternCurve%d" % q, cvs, [ 0.0, 0.0, 0.0, 1.0, 1.0, 1.0 ], 3).name)
+
+	t, boundary = timeit(getattr(jc.clothes, "__patternBoundary__"), curves, 0, 1, 1.0/resolution)
+	report("boundary (%d points)" % len(boundary), t)
+	points, faces = jc.mesher.planarMesh(boundary, 1.0/resolution)
+	pattern = fake.scene.createMesh("pattern", [ (x, y, 0.0) for x, y in points ], faces)
+	for c in curves:
+		fake.scene.nodes[c+"Shape"].attrs["jcp"] = None
+		fake.scene.connect(pattern.name+".message", c+"Shape.jcp")
+
+	data = pattern.shape().data
+	border = set()
+	for e in range(len(data.edges)):
+		if len(data.edgeFaces[e]) == 1:
+			border.update(data.edges[e])
+	fake.calls.reset()
+	t, vertices = timeit(jc.clothes.__findBorderVertices, curves)
+	reportCalls("find border vertices", t, fake.calls)
+	found = set([ int(v[v.index("[")+1:-1]) for v in vertices ])
+	if found != border:
+		raise Exception, "%d of %d border vertices not found on the curves" % (len(border - found), len(border))
+
+
+def	fakeStitchJoints(joints=100, spans=50):
+# jc.clothes.createStitchJoints() against the fake Maya
+	fake = fakeMaya()
+	import jc.clothes, jc.nurbs
+
+	print "fakeStitchJoints: %d joints, %d spans" % (joints, spans)
+	cvs, knots, degree = syntheticCurve(spans)
+	fake.scene.createCurve("destinationCurve", cvs, knots, degree)
+	fake.scene.selection = [ "destinationCurve" ]
+	jc.nurbs.clearArcLengthCache()
+	fake.calls.reset()
+	t, chains = timeit(jc.clothes.createStitchJoints, joints)
+	reportCalls("create stitch joints", t, fake.calls)
+
+
+def	fakeKeyJoints(chains=50, joints=20):
+# keying stitch joint chains at the start and the end of stitching as jc.clothes.setKeyframes() does,
+# by jc.clothes.keyJoints() into one table written by one command per curve, compared with changing the current time and keying each attribute
+	fake = fakeMaya()
+	import maya.cmds as cmds
+	import jc.clothes, jc.keys
+
+	print "fakeKeyJoints: %d chains of %d joints" % (chains, joints)
+	roots = []
+	for i in range(chains):
+		fake.scene.selection = []
+		for k in range(joints):
+			j = cmds.joint(p=(float(k), float(i), 0.0))
+			if k == 0:
+				roots.append(j)
+
+	def perKey():
+		currentTime = cmds.currentTime(q=True)
+		for current in roots:
+			cmds.cutKey(current, cmds.listRelatives(current, ad=True, f=True, typ='joint'), at=("tx","ty","tz","rx","ry","rz","sx"), cl=True)
+			chain = [ current ] + list(reversed(cmds.listRelatives(current, ad=True, f=True, typ='joint')))
+			for time in (1, 10):
+				cmds.currentTime(time, u=True)
+				for joint, attributes in jc.keys.chainAttributes(chain):
+					for a in attributes:
+						cmds.setKeyframe(joint, at=a)
+		cmds.currentTime(currentTime, u=True)
+	fake.calls.reset()
+	t, r = timeit(perKey)
+	reportCalls("current time and setKeyframe", t, fake.calls)
+
+	def	table():
+		keys = jc.keys.keyTable()
+		cmds.select(roots, r=True)
+		jc.clothes.keyJoints(True, 1, keys)
+		jc.clothes.keyJoints(False, 10, keys)
+		jc.clothes.__writeKeys__(keys)
+		return keys
+	fake.calls.reset()
+	t, keys = timeit(table)
+	reportCalls("keyJoints into one table", t, fake.calls)
+	curves = len(keys.curves())
+	if fake.calls.counts.get("setKeyframe") or fake.calls.counts.get("createNode") != curves or keys.count() != 2*curves:
+		raise Exception, "curves not written at once: %d of %d" % (fake.calls.counts.get("createNode", 0), curves)
+	first = keys.curves()[0]
+	if cmds.getAttr("%s_%s.ktv[0:1]" % (first[0].split("|")[-1], first[1])) != [ tuple(k) for k in first[2] ]:
+		raise Exception, "wrong keys"
+
+
+def	fakeGarmentPlan(patterns=50):
+# jc.clothes.garment.compilePlan() and runs of the plan by jc.plan.scheduler, where the steps are counted instead of being run,
+# except those grouping the stitch joints and placing the patterns which are run on the fake scene,
+# each pattern has two adjacent stitch curves
+	fake = fakeMaya()
+	import maya.cmds as cmds
+	import jc.clothes, jc.plan
+
+	print "fakeGarmentPlan: %d patterns" % patterns
+	fake.scene.createMesh("body", [ (-10.0, 0.0, -5.0), (10.0, 0.0, -5.0), (10.0, 20.0, 5.0) ], [ (0, 1, 2) ])
+	g = jc.clothes.garment("jc.clothes")
+	g.globals['passiveCollider'] = "body"
+	for i in range(patterns):
+		x = 2.0*i
+		l = fake.scene.createNode("transform", "pattern%d" % i)
+		fake.scene.createNode("locator", "pattern%dShape" % i, l)
+		corners = [ (x, 0.0, 0.0), (x+1.0, 0.0, 0.0), (x+1.0, 1.0, 0.0) ]
+		for k in range(3):
+			fake.scene.createCurve("curve%d_%d" % (i, k), [ corners[k], corners[(k+1)%3] ], [ 0.0, 1.0 ], 1)
+			fake.scene.createCurve("destination%d_%d" % (i, k), [ (x, 5.0, 1.0+k), (x+1.0, 5.0, 1.0+k) ], [ 0.0, 1.0 ], 1)
+		p = g.newPattern(g.subgarments[0].layout, "pattern%d" % i)
+		p.curves = [ "curve%d_%d" % (i, k) for k in range(3) ]
+		p.mirror = "False"
+		for k in range(2):
+			s = g.newStitch("destination%d_%d" % (i, k))
+			s.curves = [ "curve%d_%d" % (i, k) ]
+
+	counts = {}
+	def	call(step, args, keywords):
+		name = step.function.__name__
+		counts[name] = counts.get(name, 0) + 1
+		if name == "createPattern":
+			return "mesh_"+args[0]
+		if name == "createGarment":
+			return "garment"
+		if name == "createStitch":
+			joints = [ args[0]+"_joints%d" % k for k in range(len(args)-1) ]
+			for j in joints:
+				if j not in fake.scene.nodes:
+					fake.scene.createNode("joint", j)
+			return [ args[0] ] + joints
+		if name in ("__groupStitches__", "__placePattern__"):
+			return step.function(*args, **keywords)
+		if name == "setKeyframes" and fail:
+			raise Exception, "failed on purpose"
+
+	steps = []
+	def	build(label):
+		fake.calls.reset()
+		t, plan = timeit(g.compilePlan)
+		reportCalls("compile plan (%d steps)" % len(plan.names), t, fake.calls)
+		steps.append(plan)
+		counts.clear()
+		t, r = timeit(scheduler.run, plan, call)
+		ran = len([ x for x in scheduler.timings if x[2] == "run" ])
+		report("%s: %d run, %d cached" % (label, ran, len(plan.names)-ran), t)
+		return ran
+
+	scheduler = jc.plan.scheduler(jc.clothes.__fingerprint__)
+	fail = False
+	first = build("first build")
+	keyed = [ l for l in [ "pattern%d" % i for i in range(patterns) ] if cmds.listConnections(l+".ty", t='animCurveTL') ]
+	if len(keyed) != patterns or cmds.listRelatives("pattern0", c=True, typ='joint') != [ "destination0_0_joints0", "destination0_1_joints0" ]:
+		raise Exception, "patterns not placed or stitches not grouped"
+	if build("nothing changed") != 0:
+		raise Exception, "unchanged steps are run again"
+	if steps[0].names != steps[1].names:
+		raise Exception, "plan changed by the build: %s" % (set(steps[0].names) ^ set(steps[1].names))
+
+	# a placed pattern isn't moved and keyed again
+	curves = len([ n for n in fake.scene.nodes.values() if n.type == "animCurveTL" ])
+	t = list(fake.scene.nodes["pattern0"].attrs["translate"])
+	jc.clothes.__placePattern__(*steps[-1].step("place:pattern0").args)
+	if len([ n for n in fake.scene.nodes.values() if n.type == "animCurveTL" ]) != curves or fake.scene.nodes["pattern0"].attrs["translate"] != t:
+		raise Exception, "placed pattern moved again"
+
+	g.getStitch("destination0_0").numberOfJoints = "20"
+	build("number of joints of a stitch changed")
+	fake.scene.nodes["curve1_0Shape"].data.cvs[0] = (2.0, -0.5, 0.0)
+	build("curve of a pattern moved")
+
+	fail = True
+	g.getStitch("destination0_0").numberOfJoints = "30"
+	try:
+		build("failed build")
+	except:
+		report("failed at "+scheduler.timings[-1][0], 0)
+	fail = False
+	if build("resumed build") >= first:
+		raise Exception, "the steps completed before failure are run again"
+
+	# the schedulers of garments are dropped when another scene is opened
+	jc.clothes.__installCallbacks__()
+	jc.clothes.__garmentSchedulers["body"] = scheduler
+	fake.scene.notify(("scene", fake.messages.kAfterOpen))
+	if jc.clothes.__garmentSchedulers:
+		raise Exception, "schedulers kept after opening a scene"
+
+
+def	fakeInstrument(joints=100, spans=50):
+# jc.clothes.createStitchJoints() against the fake Maya with jc.instrument disabled and enabled,
+# the calls recorded by jc.instrument are checked against those counted by the fake Maya
+	fake = fakeMaya()
+	import os, json, tempfile, jc.clothes, jc.nurbs, jc.instrument
+
+	print "fakeInstrument: %d joints, %d spans" % (joints, spans)
+	cvs, knots, degree = syntheticCurve(spans)
+	fake.scene.createCurve("destinationCurve", cvs, knots, degree)
+
+	def	create():
+		fake.scene.selection = [ "destinationCurve" ]
+		jc.nurbs.clearArcLengthCache()
+		return jc.clothes.createStitchJoints(joints)
+
+	original = jc.clothes.cmds
+	fake.calls.reset()
+	t, r = timeit(create)
+	reportCalls("disabled", t, fake.calls)
+	expected = sum([ c for name, c in fake.calls.counts.items() if "." not in name ])
+
+	jc.instrument.enable()
+	if jc.clothes.cmds is original:
+		raise Exception, "cmds of jc.clothes not instrumented"
+	fake.calls.reset()
+	t, r = timeit(create)
+	jc.instrument.disable()
+	reportCalls("enabled", t, fake.calls)
+	if jc.clothes.cmds is not original:
+		raise Exception, "cmds of jc.clothes not restored"
+
+	functions = jc.instrument.calls.report()['functions']
+	recorded = sum([ c['count'] for f in functions for c in f['commands'] if c['command'].startswith("cmds.") ])
+	if recorded != expected:
+		raise Exception, "%d commands recorded instead of %d" % (recorded, expected)
+	for f in functions[:3]:
+		print "%-40s %10.3f ms %10d calls" % ("  "+f['function'], f['seconds']*1000, f['count'])
+
+	d = tempfile.mkdtemp()
+	t, r = timeit(jc.instrument.calls.writeReport, os.path.join(d, "report.json"))
+	report("write JSON report", t)
+	t, r = timeit(jc.instrument.calls.writeChromeTrace, os.path.join(d, "trace.json"))
+	report("write Chrome trace (%d events)" % len(jc.instrument.calls.events), t)
+	f = open(os.path.join(d, "trace.json"))
+	if len(json.load(f)['traceEvents']) != len(jc.instrument.calls.events):
+		raise Exception, "wrong number of trace events"
+	f.close()
+	for name in os.listdir(d):
+		os.remove(os.path.join(d, name))
+	os.rmdir(d)
+
+
+def	fakeMeshData(resolution=200):
+# jc.helper.meshData reading and writing a grid mesh in bulk, compared with a pointPosition call for each vertex
+	fake = fakeMaya()
+	import maya.cmds as cmds
+	import jc.helper
+
+	n = resolution+1
+	print "fakeMeshData: %d vertices" % (n*n)
+	points = [ (float(i), float(j), 0.0) for j in range(n) for i in range(n) ]
+	faces = [ (j*n+i, j*n+i+1, (j+1)*n+i+1, (j+1)*n+i) for j in range(resolution) for i in range(resolution) ]
+	uvs = [ (points[v][0]/resolution, points[v][1]/resolution) for f in faces for v in f ]
+	fake.scene.createMesh("grid", points, faces, uvs)
+
+	def	perVertex():
+		return [ cmds.pointPosition("grid.vtx[%d]" % i) for i in range(n*n) ]
+	fake.calls.reset()
+	t, r = timeit(perVertex)
+	reportCalls("pointPosition of each vertex", t, fake.calls)
+
+	fake.calls.reset()
+	t, m = timeit(jc.helper.meshData, "grid")
+	t1, r = timeit(m.points)
+	if r != points:
+		raise Exception, "wrong points"
+	t2, (counts, vertices) = timeit(m.faces)
+	t3, (u, v) = timeit(m.uvs)
+	reportCalls("meshData points, faces and uvs", t+t1+t2+t3, fake.calls)
+	normals = m.normals()
+	if sum(counts) != len(vertices) or len(u) != len(uvs) or normals[0] != (0.0, 0.0, 1.0):
+		raise Exception, "wrong mesh data"
+
+	fake.calls.reset()
+	moved = [ (x, y, 1.0) for x, y, z in points ]
+	t, r = timeit(m.setPoints, moved)
+	t1, r = timeit(m.setUVs, [ 1.0-x for x in u ], v)
+	reportCalls("meshData setPoints and setUVs", t+t1, fake.calls)
+	if m.points() != moved or m.uvs()[0][0] != 1.0-u[0]:
+		raise Exception, "points or UVs not set"
+
+
+def	fakeHistory(meshes=300, joints=60, influences=4):
+# jc.helper.findTypeInHistory of each skinned mesh of a rig and the skin lookup of each joint by jc.character,
+# listing the histories on every query compared with the history cache of jc.helper open for one operation
+	fake = fakeMaya()
+	import jc.helper, jc.character
+
+	print "fakeHistory: %d meshes, %d joints" % (meshes, joints)
+	r = random.Random(5)
+	for i in range(joints):
+		fake.scene.createNode("joint", "joint%d" % i)
+	for k in range(meshes):
+		fake.scene.createMesh("body%d" % k, [ (0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0) ], [ (0, 1, 2) ])
+		fake.scene.createNode("skinCluster", "skinCluster%d" % k)
+		fake.scene.connect("skinCluster%d.outputGeometry[0]" % k, "body%dShape.inMesh" % k)
+		for i, j in enumerate(r.sample(range(joints), influences)):
+			fake.scene.connect("joint%d.worldMatrix[0]" % j, "skinCluster%d.matrix[%d]" % (k, i))
+	history = jc.helper.history
+	findSkin = getattr(jc.character, "__findSkin")
+
+	callbacks = len(fake.scene.callbacks)
+
+	def	skinClusters():
+		return [ jc.helper.findTypeInHistory("body%d" % k, "skinCluster") for k in range(meshes) ]
+	def	skins():
+		return [ findSkin("joint%d" % i, "skinCluster") for i in range(joints) ]
+	def	operation(function):
+		history.open()
+		try:
+			return function()
+		finally:
+			history.close()
+
+	# outside of an operation nothing is kept and no callback is installed
+	fake.calls.reset()
+	t, r = timeit(skinClusters)
+	reportCalls("findTypeInHistory (uncached)", t, fake.calls)
+	if r != [ "skinCluster%d" % k for k in range(meshes) ]:
+		raise Exception, "wrong skinClusters"
+	if len(fake.scene.callbacks) != callbacks or history.histories:
+		raise Exception, "history kept outside of an operation"
+	# both directions list each history once and take the nodes of the type from it
+	fake.calls.reset()
+	if jc.helper.findTypeInHistory("body0", "skinCluster", True, True) != "skinCluster0":
+		raise Exception, "wrong skinCluster in past and future"
+	if fake.calls.counts.get("listHistory") != 2 or fake.calls.counts.get("ls") != 2:
+		raise Exception, "histories listed again: %d listHistory, %d ls" % (fake.calls.counts.get("listHistory", 0), fake.calls.counts.get("ls", 0))
+	# each history is listed once, so one operation gains nothing over no cache
+	fake.calls.reset()
+	t, r2 = timeit(operation, skinClusters)
+	reportCalls("findTypeInHistory (one operation)", t, fake.calls)
+	if r2 != r:
+		raise Exception, "wrong skinClusters"
+
+	# the skin lookup lists the histories of the same meshes for each joint
+	fake.calls.reset()
+	t, r = timeit(skins)
+	reportCalls("skin of each joint (uncached)", t, fake.calls)
+	uncached = fake.calls.total()
+	fake.calls.reset()
+	t, r2 = timeit(operation, skins)
+	reportCalls("skin of each joint (one operation)", t, fake.calls)
+	if r != r2 or None in r:
+		raise Exception, "wrong skins"
+	if fake.calls.total() >= uncached:
+		raise Exception, "history listed again within an operation"
+	if len(fake.scene.callbacks) != callbacks or history.depth:
+		raise Exception, "callbacks left after the operation"
+
+	# the cache is dropped on changes of the scene within an operation
+	import maya.cmds as cmds
+	history.open()
+	history.open()
+	jc.helper.findTypeInHistory("body0", "skinCluster")
+	cmds.createNode("skinCluster", n="rebound")
+	cmds.connectAttr("rebound.outputGeometry[0]", "body0Shape.inMesh")
+	if jc.helper.findTypeInHistory("body0", "skinCluster") != "rebound":
+		raise Exception, "history not updated on connection"
+	cmds.rename("rebound", "rebound1")
+	cmds.delete("body1")
+	if jc.helper.findTypeInHistory("body0", "skinCluster") != "rebound1" or jc.helper.findTypeInHistory("joint0", "mesh", True, False) == "body1Shape":
+		raise Exception, "history not updated on rename or deletion"
+	history.close()
+	if len(fake.scene.callbacks) == callbacks:
+		raise Exception, "callbacks removed by an inner close"
+
+	# a reload removes the callbacks of the replaced cache
+	reload(jc.helper)
+	if len(fake.scene.callbacks) != callbacks or jc.helper.history is history:
+		raise Exception, "callbacks left by reload"
+
+
+def	fakeLinks(garments=20, patterns=10, curves=6):
+# the link index of jc.clothes, built by one scan of a scene of garments and kept up to date by callbacks,
+# compared with listConnections on the message attributes for each lookup
+	fake = fakeMaya()
+	import maya.cmds as cmds
+	import jc.clothes, jc.links
+
+	scene = fake.scene
+	def	link(node, attribute, target):
+		scene.nodes[node].attrs[attribute] = None
+		scene.connect(target+".message", node+"."+attribute)
+
+	# each pattern has its locator (mirrored to the right), its curves and a stitch joint chain on each curve
+	joints = []
+	for g in range(garments):
+		for p in range(patterns):
+			name = "g%d_p%d" % (g, p)
+			scene.createMesh(name, [ (0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0) ], [ (0, 1, 2) ])
+			locator = scene.createNode("transform", name+"_locatorLf")
+			scene.createNode("locator", name+"_locatorLfShape", locator)
+			locator = scene.createNode("transform", name+"_locatorRt")
+			scene.createNode("locator", name+"_locatorRtShape", locator)
+			link(name+"_locatorRtShape", "jcl", name+"_locatorLfShape")
+			for c in range(curves):
+				curve = "%s_c%d" % (name, c)
+				scene.createCurve(curve, [ (0.0, 0.0, 0.0), (1.0, 0.0, 0.0) ], [ 0.0, 1.0 ], 1)
+				scene.createCurve(curve+"_destination", [ (0.0, 1.0, 0.0), (1.0, 1.0, 0.0) ], [ 0.0, 1.0 ], 1)
+				link(curve+"Shape", "jcp", name)
+				link(curve+"Shape", "jcl", name+"_locatorLfShape")
+				link(curve, "jcdc", curve+"_destination")
+				scene.createNode("joint", curve+"_destinationJoint")
+				scene.createNode("joint", curve+"_joint")
+				link(curve+"_joint", "jcdj", curve+"_destinationJoint")
+				link(curve+"_joint", "jcpc", curve)
+				joints.append(curve+"_joint")
+	# curves and destination joints of the same names under different groups
+	for g, side in enumerate([ "left", "right" ]):
+		group = scene.createNode("transform", side)
+		curve = scene.createNode("transform", "dup", group)
+		scene.createNode("nurbsCurve", "dupShape", curve).attrs["jcp"] = None
+		scene.connect("g%d_p0.message" % g, side+"|dup|dupShape.jcp")
+		scene.createNode("joint", "dupDest", group)
+		scene.createNode("joint", "dupJoint%d" % g).attrs["jcdj"] = None
+		scene.connect(side+"|dupDest.message", "dupJoint%d.jcdj" % g)
+	print "fakeLinks: %d nodes, %d stitch joints" % (len(scene.all()), len(joints))
+
+	linkIndex = getattr(jc.clothes, "__linkIndex__")
+	fake.calls.reset()
+	t, index = timeit(linkIndex)
+	reportCalls("scan", t, fake.calls)
+	if index.count() != len(joints)*5 + garments*patterns + 4:
+		raise Exception, "wrong number of links: %d" % index.count()
+	def	checkDuplicates(left, right):
+	# the nodes of the same names are told apart, and given by names which commands take, as by listConnections
+		if index.target(left+"|dup", "jcp") != "g0_p0" or index.target(right+"|dup", "jcp") != "g1_p0" \
+				or index.target("dupJoint0", "jcdj") != left+"|dupDest" or index.target("dupJoint1", "jcdj") != right+"|dupDest":
+			raise Exception, "nodes of the same name not told apart"
+		if "right|dup" not in index.linked("g1_p0", "jcp") or "left|dup" in index.linked("g1_p0", "jcp") \
+				or index.target("dup", "jcp") != None:
+			raise Exception, "nodes of the same name not told apart"
+		for j in ("dupJoint0", "dupJoint1"):
+			if cmds.listConnections(j+".jcdj") != [ index.target(j, "jcdj") ]:
+				raise Exception, "names differ from listConnections"
+	checkDuplicates("left", "right")
+
+	def	byConnections():
+		return [ cmds.listConnections(j+".jcdj")[0] for j in joints[:200] ]
+	def	byIndex():
+		return [ index.target(j, "jcdj") for j in joints ]
+	fake.calls.reset()
+	t, r = timeit(byConnections)
+	reportCalls("listConnections (200 joints)", t, fake.calls)
+	fake.calls.reset()
+	t, r2 = timeit(byIndex)
+	reportCalls("index (%d joints)" % len(joints), t, fake.calls)
+	if r != r2[:200]:
+		raise Exception, "wrong destination joints"
+	t, r = timeit(lambda: [ index.linked("g%d_p%d" % (g, p), "jcp") for g in range(garments) for p in range(patterns) ])
+	report("curves of each pattern", t, garments*patterns)
+	if index.target("g0_p0_c0", "jcl") != "g0_p0_locatorLf" or index.linked("g0_p0_locatorLfShape", "jcl", "locator") != [ "g0_p0_locatorRt" ]:
+		raise Exception, "shapes not found through transforms"
+
+	# changes made by commands are followed by the index, which must be the same as a new scan afterwards
+	fake.calls.reset()
+	t = time.time()
+	cmds.createNode("joint", n="extraJoint")
+	cmds.addAttr("extraJoint", sn="jcdj", at="message", h=True)
+	cmds.connectAttr("g0_p0_c0_destinationJoint.message", "extraJoint.jcdj")
+	cmds.connectAttr("g1_p0.message", "g0_p0_c1Shape.jcp", f=True)
+	cmds.rename("g0_p1", "renamedPattern")
+	cmds.rename("g0_p2_c0Shape", "renamedShape")
+	cmds.deleteAttr("g0_p0_c2", at="jcdc")
+	cmds.delete("g0_p3_c0_joint", "g0_p4_c0_destinationJoint", "g0_p5_locatorLf")
+	cmds.rename("left", "leftSide")
+	cmds.connectAttr("g2_p0.message", "right|dup|dupShape.jcp", f=True)
+	reportCalls("commands changing links", time.time() - t, fake.calls)
+	if index.target("extraJoint", "jcdj") != "g0_p0_c0_destinationJoint" or index.linked("g0_p2", "jcp")[0] != "g0_p2_c0" \
+			or len(index.linked("renamedPattern", "jcp")) != curves or index.target("g0_p2_c0", "jcp") != "g0_p2":
+		raise Exception, "changes not followed"
+	if index.target("leftSide|dup", "jcp") != "g0_p0" or index.target("dupJoint0", "jcdj") != "leftSide|dupDest" \
+			or index.target("right|dup", "jcp") != "g2_p0":
+		raise Exception, "changes of nodes of the same name not followed"
+	incremental = index.links()
+	getattr(jc.clothes, "__scanLinks__")()
+	if index.links() != incremental:
+		raise Exception, "index differs from a new scan: %s" % (set(index.links()) ^ set(incremental))
+
+	# parenting a group of linked nodes changes their paths, the index is scanned again
+	cmds.createNode("transform", n="outer")
+	cmds.parent("right", "outer")
+	if linkIndex().target("dupJoint1", "jcdj") != "right|dupDest" or "|outer|right|dup|dupShape" not in index.types:
+		raise Exception, "parenting not followed"
+	cmds.connectAttr("g1_p0.message", "right|dup|dupShape.jcp", f=True)
+	checkDuplicates("leftSide", "right")
+
+
+def	fakeSnapshot(nodes=200, perVertex=1000, constraints=200, targets=4):
+# copying the attributes of nCloth objects as jc.clothes.duplicateGarment does, by attributeQuery, getAttr and setAttr
+# of each attribute compared with a snapshot of jc.helper set back by setAttr, the constraint weights turned off and back on
+# by jc.clothes the same ways, and diffing and serialization of snapshots by jc.snapshot
+	fake = fakeMaya()
+	import maya.cmds as cmds
+	import jc.helper, jc.snapshot, jc.clothes
+
+	names = [ "srl", "thss", "boce", "fron", "stck", "adng", "cofl", "scfl", "msci", "mxit",
+		"pmss", "rlsc", "cold", "scld", "cll", "wsdi", "wsds", "apds", "apvy", "pou",
+		"por", "cop", "tpc", "lsou", "dcr", "dcg", "dcb", "stch", "comr", "bnd", "bnad",
+		"retn", "reae", "shr", "rity", "dety", "iadm", "wms", "basc", "stlk", "aclk", "sdmp", "scws", "scpu", "stpc", "pres",
+		"stpe", "incm", "prdg", "pure", "aits", "shol", "igsg", "igsw", "wssh", "lft", "drg", "tdrg" ]
+	print "fakeSnapshot: %d nodes, %d attributes" % (nodes, len(names)+2)
+	r = random.Random(6)
+	sources = []
+	copies = {}
+	for i in range(nodes):
+		for name in ("nClothShape%d" % i, "nClothCopy%d" % i):
+			n = fake.scene.createNode("nCloth", name)
+			for a in names:
+				n.attrs[a] = 0.0
+			n.multi.add("w")
+			n.attrs["w"] = {}
+		for a in names:
+			n = fake.scene.nodes["nClothShape%d" % i]
+			n.attrs[a] = r.random()
+			n.attrs["w"] = { 0:1.0, 3:0.5 }
+			n.attrs["thicknessPerVertex"] = [ r.random() for k in range(perVertex) ]
+		sources.append("nClothShape%d" % i)
+		copies["nClothShape%d" % i] = "nClothCopy%d" % i
+
+	def	perAttribute():
+		for nc in sources:
+			for a in names:
+				if cmds.attributeQuery(a, node=nc, ex=True):
+					cmds.setAttr(copies[nc]+"."+a, cmds.getAttr(nc+"."+a))
+	fake.calls.reset()
+	t, x = timeit(perAttribute)
+	reportCalls("getAttr and setAttr of each attribute", t, fake.calls)
+
+	attributes = names + [ "w[*]", "thicknessPerVertex", "missing" ]
+	fake.calls.reset()
+	t, snapshot = timeit(jc.helper.getAttributes, sources, attributes)
+	t1, count = timeit(jc.helper.setAttributes, snapshot, copies)
+	reportCalls("snapshot and setAttr of each value", t+t1, fake.calls)
+	report("  of which setAttr", t1, count)
+	if fake.calls.counts.get("mel.eval") != 1 or fake.calls.counts.get("undoInfo") != 2 or fake.calls.counts.get("setAttr"):
+		raise Exception, "values not set by one mel.eval in one undo chunk"
+	if jc.helper.getAttributes(copies.values(), attributes) != jc.snapshot.remap(snapshot, copies):
+		raise Exception, "attributes not copied"
+	# the values of each kind through the MEL commands
+	values = { "s":'say "hi"\\\n', "b":True, "v":(1.0, -2.5, 3.0),
+		"da":{ 'type':"doubleArray", 'value':[ 0.5, 1.0 ] }, "sa":{ 'type':"stringArray", 'value':[ "a b", "c;d" ] },
+		"m":{ 'type':"matrix", 'value':[ float(k) for k in range(16) ] } }
+	n = fake.scene.createNode("nCloth", "kinds")
+	jc.helper.setAttributes({ "kinds":values })
+	if [ n.attrs[a] for a in sorted(values.keys()) ] != [ True, [ 0.5, 1.0 ], [ float(k) for k in range(16) ], 'say "hi"\\\n', [ "a b", "c;d" ], [ 1.0, -2.5, 3.0 ] ]:
+		raise Exception, "values changed by setAttr commands: %r" % n.attrs
+	fake.calls.reset()
+	if jc.helper.setAttributes(snapshot, copies, jc.snapshot.remap(snapshot, copies)) or fake.calls.total():
+		raise Exception, "values equal to the current ones set again"
+
+	# constraints with one target on each, of a node constraint by all of them
+	fake.scene.createNode("transform", "constrained")
+	for i in range(constraints):
+		n = fake.scene.createNode("parentConstraint", "constraint%d" % i)
+		for k in range(targets):
+			n.attrs["w%d" % k] = float(k == i % targets)
+		fake.scene.connect("constraint%d.constraintTranslate" % i, "constrained.input[%d]" % i)
+	before = jc.helper.getAttributes([ "constraint%d" % i for i in range(constraints) ], [ "w%d" % k for k in range(targets) ])
+	def	perWeight():
+	# as jc.clothes did before the snapshots, probing w0, w1, ...
+		weights = {}
+		for constraint in cmds.ls(cmds.listHistory("constrained"), typ="parentConstraint", fl=True):
+			i = 0
+			weights[constraint] = []
+			while cmds.attributeQuery("w"+str(i), n=constraint, ex=True):
+				weights[constraint].append(cmds.getAttr(constraint+".w"+str(i)))
+				cmds.setAttr(constraint+".w"+str(i), 0)
+				i += 1
+		for constraint, l in weights.items():
+			for i in range(len(l)):
+				cmds.setAttr(constraint+".w"+str(i), l[i])
+	def	bySnapshot():
+		weights = getattr(jc.clothes, "__disableConstraints")("constrained")
+		if len(weights) != constraints or [ c for c in weights.keys() for k in range(targets) if fake.scene.nodes[c].attrs["w%d" % k] ]:
+			raise Exception, "constraints not turned off"
+		getattr(jc.clothes, "__restoreConstraints")("constrained", weights)
+	fake.calls.reset()
+	t, x = timeit(perWeight)
+	reportCalls("constraints off and on, each weight", t, fake.calls)
+	fake.calls.reset()
+	t, x = timeit(bySnapshot)
+	reportCalls("constraints off and on, snapshot", t, fake.calls)
+	if jc.helper.getAttributes(before.keys(), [ "w%d" % k for k in range(targets) ]) != before:
+		raise Exception, "constraint weights not restored"
+
+	t, text = timeit(jc.snapshot.dumps, snapshot)
+	report("dumps (%d KB)" % (len(text)/1024), t)
+	t, loaded = timeit(jc.snapshot.loads, text)
+	report("loads", t)
+	if loaded != snapshot:
+		raise Exception, "snapshot changed by serialization"
+
+	cmds.setAttr("nClothShape0.thss", 2.0)
+	cmds.setAttr("nClothShape1.w[5]", 1.0)
+	t, d = timeit(jc.snapshot.diff, snapshot, jc.helper.getAttributes(sources, attributes))
+	report("diff", t)
+	if d != { "nClothShape0":{ "thss":2.0 }, "nClothShape1":{ "w[5]":1.0 } }:
+		raise Exception, "wrong diff: %r" % d
+
+
+def	fakeParseCSV(patterns=200):
+# jc.clothes.garment.parseCSV() of a garment definition
+	fake = fakeMaya()
+	import StringIO, jc.clothes
+
+	print "fakeParseCSV: %d patterns" % patterns
+	lines = []
+	for i in range(patterns):
+		lines.append("#Pattern,locator%d,curve%da curve%db curve%dc,1.0,True,False" % (i, i, i, i))
+	lines.append("#Subgarment,shirt_,None,,"+" ".join([ "locator%d" % i for i in range(patterns) ]))
+	for i in range(patterns):
+		lines.append("#Stitch,destination%d,curve%da curve%db,0,False" % (i, i, i))
+		lines.append("#Constraint,attachable%d,curve%dc" % (i, i))
+	lines.append("#Globals,True,True,True,False,True,1.0,,0,1,40,50,60")
+	text = "\n".join(lines)+"\n"
+
+	g = jc.clothes.garment("jc.clothes")
+	fake.calls.reset()
+	t, r = timeit(g.parseCSV, StringIO.StringIO(text))
+	reportCalls("parse CSV (%d rows)" % len(lines), t, fake.calls)
+
+
+def	fakeFileGrep(files=500, lines=200):
+# jc.files.findgrep() with its progress window
+	fake = fakeMaya()
+	import os, shutil, tempfile, jc.files
+
+	print "fakeFileGrep: %d files of %d lines" % (files, lines)
+	top = tempfile.mkdtemp()
+	try:
+		for i in range(files):
+			d = os.path.join(top, "dir%d" % (i % 10))
+			if not os.path.isdir(d):
+				os.makedirs(d)
+			f = open(os.path.join(d, "file%d.mel" % i), "w")
+			for j in range(lines):
+				f.write("global proc proc%d_%d() { print \"%d\"; }\n" % (i, j, j))
+			f.close()
+
+		fake.calls.reset()
+		t, r = timeit(jc.files.findgrep, top, [ "proc[0-9]*_1[0-9]\\(" ], ["*.mel"], progressWin=True)
+		reportCalls("find and grep", t, fake.calls)
+		if len(r) != files:
+			raise Exception, "wrong number of files found"
+	finally:
+		shutil.rmtree(top)
+
+
+def	fakeMenus():
+# building the menus of jc.clothes, jc.character and jc.hair
+	fake = fakeMaya()
+	import jc.clothes, jc.character, jc.hair
+
+	print "fakeMenus"
+	fake.scene.createNode("camera", "perspShape", fake.scene.createNode("transform", "persp")).attrs["renderable"] = True
+	fake.scene.createNode("renderLayer", "defaultRenderLayer")
+	fake.scene.createNode("displayLayerManager", "layerManager")
+	fake.scene.connect("layerManager.displayLayerId[0]", "defaultLayer.identification")
+	fake.scene.createNode("displayLayer", "defaultLayer")
+	for module in (jc.clothes, jc.character, jc.hair):
+		fake.calls.reset()
+		t, r = timeit(module.doMenu)
+		reportCalls(module.__name__+".doMenu", t, fake.calls)
+		module.doMenu(False)
+
+
+def	fakeStartup():
+# Maya startup by userSetup.py: importing all the jc modules compared with installing lazy placeholders of them
+	fake = fakeMaya()
+	import jc.lazy
+
+	print "fakeStartup"
+	modules = [ "jc.helper", "jc.files", "jc.menu", "jc.character", "jc.hair", "jc.clothes" ]
+	keep = [ "jc", "jc.benchmark", "jc.fakemaya", "jc.nurbs", "jc.lazy" ]
+	def	unload():
+		if "jc.menu" in sys.modules and not jc.lazy.isPending("jc.menu"):
+			sys.modules["jc.menu"].doMenu(False)
+		for name in sys.modules.keys():
+			if name.startswith("jc.") and name not in keep:
+				del sys.modules[name]
+		fake.scene.clear()
+		fake.calls.reset()
+
+	def	importAll():
+		for name in modules:
+			__import__(name)
+
+	# each module is timed on its own with the jc modules it imports, none of them loaded before,
+	# then all of them in a row as by userSetup.py, after a first import compiling them
+	unload()
+	importAll()
+	for name in modules:
+		unload()
+		t, r = timeit(__import__, name)
+		report("import "+name+" alone", t)
+	unload()
+	t, r = timeit(importAll)
+	report("import all", t)
+	t, r = timeit(sys.modules["jc.menu"].startup)
+	reportCalls("jc.menu.startup", t, fake.calls)
+
+	unload()
+	jc.lazy.timings.clear()
+	t, r = timeit(jc.lazy.install, modules)
+	report("lazy install", t)
+	t, r = timeit(lambda: sys.modules["jc.menu"].startup())
+	reportCalls("jc.menu.startup (lazy)", t, fake.calls)
+	for name in modules:
+		if name in jc.lazy.timings:
+			report("  imported "+name, jc.lazy.timings[name])
+	unload()
+
+
+__benchmarks = [ "arcLength", "curvePoints", "borderVertices", "patternGraph", "edgeChains", "patternMesh", "stitchRotations", "matchChains", "cameraCulling", "mirrorGeometry", "skinWeights", "nClothMap", "coincidentVertices", "presets",
+	"fakeBorderVertices", "fakePatternBorder", "fakeStitchJoints", "fakeKeyJoints", "fakeGarmentPlan", "fakeInstrument", "fakeMeshData", "fakeHistory", "fakeLinks", "fakeSnapshot", "fakeParseCSV", "fakeFileGrep", "fakeMenus", "fakeStartup" ]
+
+
+def	run(names=None):
+	if not names:
+		names = __benchmarks
+	for name in names:
+		if name not in __benchmarks:
+			raise Exception, "unknown benchmark: "+name
+		globals()[name]()
+		print
+
+
+if __name__ == "__main__":
+	run(sys.argv[1:])
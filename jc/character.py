@@ -10,11 +10,12 @@
 # http://sites.google.com/site/cgriders
 
 
-import types, math, re
+import types, re
 import maya.cmds as cmds
 import maya.OpenMaya as OpenMaya
+import maya.OpenMayaAnim as OpenMayaAnim
 import maya.mel as mel
-import jc.menu, jc.clothes
+import jc.menu, jc.clothes, jc.weights, jc.geometry, jc.helper
 
 __moduleName = "jc.character"
 __skinTypeAttr = "skinType"
@@ -48,20 +49,21 @@ def	__duplicateSkin(*args, **keywords):
 
 def	__findSkin(j, deformer):
 # return either skinCluster skin, ncloth skin, poseDeformer or blendShape skin
-	skins = cmds.ls(cmds.listHistory(j, f=True), type='mesh')
+	history = jc.helper.history
+	skins = history.ofType(j, 'mesh', f=True)
 	dskin = deformerNode = None
 	for skin in skins:
 		if deformer == "skinCluster":
-			d = cmds.ls(cmds.listHistory(skin, lv=1), type=deformer)
+			d = history.ofType(skin, deformer, lv=1)
 		else:
-			d = cmds.ls(cmds.listHistory(skin), type=deformer)
+			d = history.ofType(skin, deformer)
 			if deformer == "blendShape":
-				if cmds.ls(cmds.listHistory(skin), type="nCloth") or cmds.ls(cmds.listHistory(skin), type="poseDeformer") or len(cmds.ls(cmds.listHistory(skin, f=True), type="mesh")) > 1:
+				if history.ofType(skin, "nCloth") or history.ofType(skin, "poseDeformer") or len(history.ofType(skin, 'mesh', f=True)) > 1:
 					continue
 		if d:
 			deformerNode = d[0]
 			dskin = skin
-	if deformerNode and (cmds.ls(cmds.listHistory(deformerNode), type='skinCluster') or cmds.ls(cmds.listHistory(deformerNode, f=True), type='skinCluster')):
+	if deformerNode and (history.ofType(deformerNode, 'skinCluster') or history.ofType(deformerNode, 'skinCluster', f=True)):
 		return dskin
 
 
@@ -94,108 +96,112 @@ def	createDeformer(*args, **keywords):
 	if not slist:
 		raise Exception, "no joint selected"
 
-	for j in slist:
-		p = cmds.ls(cmds.listConnections(j, d=True), type=deformer)
+	jc.helper.history.open()
+	try:
+		for j in slist:
+			p = cmds.ls(cmds.listConnections(j, d=True), type=deformer)
 
-		if p:
-			print j+" has already been associated with "+p[0]
-		else:
-			sskin = __findSkin(j, "skinCluster")
-			nskin = __findSkin(j, "nCloth")
-			pskin = __findSkin(j, deformer)
-			if not pskin:
-				pskin = __duplicateSkin(nskin)
-			elif deformer == "blendShape":
-				print j+" has already been associated with "+cmds.ls(cmds.listHistory(pskin), type="blendShape")[0]
-				continue
-
-			t = cmds.listRelatives(pskin, p=True, f=True)[0]
-
-			# throw away skinType attribute before creating deformer
-
-			if cmds.attributeQuery(__skinTypeAttr, n=t, ex=True):
-				skins = cmds.ls(cmds.listHistory(cmds.listConnections(t+'.'+__skinTypeAttr, d=True), f=True, lv=0, il=0), type='mesh')
-				# delete the animCurveUU nodes for driven key
-				cmds.delete(cmds.listConnections(t+'.'+__skinTypeAttr, d=True))
-				cmds.deleteAttr(t, at=__skinTypeAttr)
-				for s in skins:
-					cmds.setAttr(s+'.intermediateObject', 1)
+			if p:
+				print j+" has already been associated with "+p[0]
 			else:
-				cmds.setAttr(nskin+'.intermediateObject', 1)
-			cmds.setAttr(pskin+'.intermediateObject', 0)
+				sskin = __findSkin(j, "skinCluster")
+				nskin = __findSkin(j, "nCloth")
+				pskin = __findSkin(j, deformer)
+				if not pskin:
+					pskin = __duplicateSkin(nskin)
+				elif deformer == "blendShape":
+					print j+" has already been associated with "+cmds.ls(cmds.listHistory(pskin), type="blendShape")[0]
+					continue
 
-			# create deformer
+				t = cmds.listRelatives(pskin, p=True, f=True)[0]
 
-			if deformer == "blendShape":
-				deformerNode = cmds.blendShape(t, foc=True)[0]
-				bskin = __findSkin(j, "poseDeformer")
-			else:
-				deformerNode = cmds.deformer(t, type=deformer)[0]
-				cmds.connectAttr(j+".worldMatrix", deformerNode+".worldMatrix[0]", f=True)
-				cmds.setAttr(deformerNode+".avgPoseSepRBF", 30.0)
-				bskin = __findSkin(j, "blendShape")
-
-			# create and connect/re-connect skinType attribute after creating deformer
+				# throw away skinType attribute before creating deformer
 
-			enumString = ""
-			if bskin:
-				keys = __skinTypeAttrValues.keys()
-			else:
-				keys = [ "nCloth", deformer ]
-			for k in keys:
-				enumString += k+"="+str(__skinTypeAttrValues[k])+":"
+				if cmds.attributeQuery(__skinTypeAttr, n=t, ex=True):
+					skins = cmds.ls(cmds.listHistory(cmds.listConnections(t+'.'+__skinTypeAttr, d=True), f=True, lv=0, il=0), type='mesh')
+					# delete the animCurveUU nodes for driven key
+					cmds.delete(cmds.listConnections(t+'.'+__skinTypeAttr, d=True))
+					cmds.deleteAttr(t, at=__skinTypeAttr)
+					for s in skins:
+						cmds.setAttr(s+'.intermediateObject', 1)
+				else:
+					cmds.setAttr(nskin+'.intermediateObject', 1)
+				cmds.setAttr(pskin+'.intermediateObject', 0)
 
-			cmds.addAttr(t, ln=__skinTypeAttr, at="enum", en=enumString)
-			cmds.setAttr(t+'.'+__skinTypeAttr, keyable=True)
+				# create deformer
 
-			blendShapeNode = None
-			if deformer == "blendShape":
-				blendShapeNode = deformerNode
-			else:
-				blendShapeNode = cmds.ls(cmds.listHistory(nskin), type='blendShape')
-				if blendShapeNode:
-					blendShapeNode = blendShapeNode[0]
-
-			for k in keys:
-				cmds.setAttr(t+'.'+__skinTypeAttr, __skinTypeAttrValues[k])
-				if k == "skinCluster":
-					cmds.setAttr(sskin+'.intermediateObject', 0)
-					cmds.setAttr(nskin+'.intermediateObject', 1)
-					cmds.setAttr(pskin+'.intermediateObject', 1)
-				elif k == "nCloth":
-					cmds.setAttr(sskin+'.intermediateObject', 1)
-					cmds.setAttr(nskin+'.intermediateObject', 0)
-					cmds.setAttr(pskin+'.intermediateObject', 1)
-					if bskin:
-						cmds.setAttr(bskin+'.intermediateObject', 1)
-				elif k == deformer:
-					cmds.setAttr(sskin+'.intermediateObject', 1)
-					cmds.setAttr(nskin+'.intermediateObject', 1)
-					cmds.setAttr(pskin+'.intermediateObject', 0)
-					if bskin:
-						cmds.setAttr(bskin+'.intermediateObject', 1)
+				if deformer == "blendShape":
+					deformerNode = cmds.blendShape(t, foc=True)[0]
+					bskin = __findSkin(j, "poseDeformer")
 				else:
-					cmds.setAttr(sskin+'.intermediateObject', 1)
-					cmds.setAttr(nskin+'.intermediateObject', 1)
-					cmds.setAttr(pskin+'.intermediateObject', 1)
-					if bskin:
-						cmds.setAttr(bskin+'.intermediateObject', 0)
+					deformerNode = cmds.deformer(t, type=deformer)[0]
+					cmds.connectAttr(j+".worldMatrix", deformerNode+".worldMatrix[0]", f=True)
+					cmds.setAttr(deformerNode+".avgPoseSepRBF", 30.0)
+					bskin = __findSkin(j, "blendShape")
 
-				if blendShapeNode:
-					if k == "blendShape":
-						cmds.setAttr(blendShapeNode+'.nodeState', 0)
-						cmds.setDrivenKeyframe(blendShapeNode+'.nodeState', currentDriver=t+'.'+__skinTypeAttr)
-					else:
-						cmds.setAttr(blendShapeNode+'.nodeState', 1)
-						cmds.setDrivenKeyframe(blendShapeNode+'.nodeState', currentDriver=t+'.'+__skinTypeAttr)
+				# create and connect/re-connect skinType attribute after creating deformer
 
-				cmds.setDrivenKeyframe(sskin+'.intermediateObject', currentDriver=t+'.'+__skinTypeAttr)
-				cmds.setDrivenKeyframe(nskin+'.intermediateObject', currentDriver=t+'.'+__skinTypeAttr)
-				cmds.setDrivenKeyframe(pskin+'.intermediateObject', currentDriver=t+'.'+__skinTypeAttr)
+				enumString = ""
 				if bskin:
-					cmds.setDrivenKeyframe(bskin+'.intermediateObject', currentDriver=t+'.'+__skinTypeAttr)
+					keys = __skinTypeAttrValues.keys()
+				else:
+					keys = [ "nCloth", deformer ]
+				for k in keys:
+					enumString += k+"="+str(__skinTypeAttrValues[k])+":"
 
-			cmds.setAttr(t+'.'+__skinTypeAttr, __skinTypeAttrValues[deformer])
+				cmds.addAttr(t, ln=__skinTypeAttr, at="enum", en=enumString)
+				cmds.setAttr(t+'.'+__skinTypeAttr, keyable=True)
+
+				blendShapeNode = None
+				if deformer == "blendShape":
+					blendShapeNode = deformerNode
+				else:
+					blendShapeNode = cmds.ls(cmds.listHistory(nskin), type='blendShape')
+					if blendShapeNode:
+						blendShapeNode = blendShapeNode[0]
+
+				for k in keys:
+					cmds.setAttr(t+'.'+__skinTypeAttr, __skinTypeAttrValues[k])
+					if k == "skinCluster":
+						cmds.setAttr(sskin+'.intermediateObject', 0)
+						cmds.setAttr(nskin+'.intermediateObject', 1)
+						cmds.setAttr(pskin+'.intermediateObject', 1)
+					elif k == "nCloth":
+						cmds.setAttr(sskin+'.intermediateObject', 1)
+						cmds.setAttr(nskin+'.intermediateObject', 0)
+						cmds.setAttr(pskin+'.intermediateObject', 1)
+						if bskin:
+							cmds.setAttr(bskin+'.intermediateObject', 1)
+					elif k == deformer:
+						cmds.setAttr(sskin+'.intermediateObject', 1)
+						cmds.setAttr(nskin+'.intermediateObject', 1)
+						cmds.setAttr(pskin+'.intermediateObject', 0)
+						if bskin:
+							cmds.setAttr(bskin+'.intermediateObject', 1)
+					else:
+						cmds.setAttr(sskin+'.intermediateObject', 1)
+						cmds.setAttr(nskin+'.intermediateObject', 1)
+						cmds.setAttr(pskin+'.intermediateObject', 1)
+						if bskin:
+							cmds.setAttr(bskin+'.intermediateObject', 0)
+
+					if blendShapeNode:
+						if k == "blendShape":
+							cmds.setAttr(blendShapeNode+'.nodeState', 0)
+							cmds.setDrivenKeyframe(blendShapeNode+'.nodeState', currentDriver=t+'.'+__skinTypeAttr)
+						else:
+							cmds.setAttr(blendShapeNode+'.nodeState', 1)
+							cmds.setDrivenKeyframe(blendShapeNode+'.nodeState', currentDriver=t+'.'+__skinTypeAttr)
+
+					cmds.setDrivenKeyframe(sskin+'.intermediateObject', currentDriver=t+'.'+__skinTypeAttr)
+					cmds.setDrivenKeyframe(nskin+'.intermediateObject', currentDriver=t+'.'+__skinTypeAttr)
+					cmds.setDrivenKeyframe(pskin+'.intermediateObject', currentDriver=t+'.'+__skinTypeAttr)
+					if bskin:
+						cmds.setDrivenKeyframe(bskin+'.intermediateObject', currentDriver=t+'.'+__skinTypeAttr)
+
+				cmds.setAttr(t+'.'+__skinTypeAttr, __skinTypeAttrValues[deformer])
+	finally:
+		jc.helper.history.close()
 
 	cmds.select(slist, r=True)
 
@@ -351,42 +357,37 @@ def mirrorGeometry(*args, **keywords):
 
 	results = []
 	for mesh in cmds.listRelatives(meshes, p=True, f=True):
-		verticesInRegion = {}
-
 		parent = cmds.listRelatives(mesh, p=True, f=True, pa=True)
 		mesh1 = cmds.duplicate(mesh)
 		mesh2 = cmds.duplicate(mesh)
 
 		cmds.scale(-1, 1, 1, mesh2, r=True)
 
-		# detect uv regions
-		#		scan all vertices
+		#	flip uv upon middle of regions, all UVs read and written at once
 
-		vertices = cmds.ls(cmds.polyListComponentConversion(mesh2, tuv=True), fl=True)
-		for vertex in vertices:
-			uv = cmds.polyEditUV(vertex, query=True)
-			region = math.ceil(uv[0]) - 1
-			if region < 0:
-				region = 1
-			if not verticesInRegion.has_key(region):
-				verticesInRegion[region] = []
-			verticesInRegion[region].append(vertex)
+		data = jc.helper.meshData(cmds.listRelatives(mesh2, s=True, ni=True, f=True)[0])
+		u, v = data.uvs()
+		data.setUVs(jc.geometry.mirrorUVs(u), v)
 
-		#		choose vertices in regions
-		#			flip uv upon middle of regions
+		#	vertices on the mirror plane, where the two halves meet
 
-		for region,vertices in verticesInRegion.iteritems():
-			cmds.select(vertices, r=True)
-			cmds.polyEditUV(pu=(region + 0.5), pv=0.5, su=-1, sv=1)
+		points = jc.helper.meshData(cmds.listRelatives(mesh1, s=True, ni=True, f=True)[0]).points(OpenMaya.MSpace.kWorld)
+		seam = jc.geometry.seamVertices(points, data.points(OpenMaya.MSpace.kWorld))
 
-		#	combine objects and merge vertices
+		#	combine objects and merge the vertices on the seam only
+		#	the vertices of mesh2 follow those of mesh1 in the combined mesh
 
 		combined = cmds.polyUnite(mesh1, mesh2, ch=False)
+		n = len(points)
+		vertices = []
+		for a, b in jc.geometry.indexRanges(seam):
+			vertices += [ "%s.vtx[%d:%d]" % (combined[0], a, b), "%s.vtx[%d:%d]" % (combined[0], n+a, n+b) ]
+		if vertices:
+			cmds.polyMergeVertex(vertices, d=0.005, ch=0)
 		if parent:
 			results += cmds.parent(combined, parent)
 		else:
 			results += combined
-		cmds.polyMergeVertex(d=0.005, ch=0)
 
 	cmds.select(results, r=True)
 	return results
@@ -428,10 +429,55 @@ def	targetOptions():
 	return [ "parent", "child" ]
 
 
+def	__skinClusterFn(obj):
+# return: (MFnSkinCluster, MDagPath of the deformed shape, influence names)
+
+	node = None
+	for n in cmds.listHistory(obj, f=0, bf=1):
+		if cmds.nodeType(n) == 'skinCluster':
+			node = n
+			break
+	if not node:
+		raise Exception, "no skin cluster found"
+
+	slist = OpenMaya.MSelectionList()
+	slist.add(node)
+	slist.add(obj)
+	skinObj = OpenMaya.MObject()
+	slist.getDependNode(0, skinObj)
+	shapeDag = OpenMaya.MDagPath()
+	slist.getDagPath(1, shapeDag)
+	shapeDag.extendToShape()
+
+	skinFn = OpenMayaAnim.MFnSkinCluster(skinObj)
+	dags = OpenMaya.MDagPathArray()
+	skinFn.influenceObjects(dags)
+	influences = [ dags[i].partialPathName() for i in range(dags.length()) ]
+
+	return skinFn, shapeDag, influences
+
+
+def	__vertexComponent(shapeDag, vertices=None):
+# return: vertex component of the given indices, all vertices if not given
+
+	compFn = OpenMaya.MFnSingleIndexedComponent()
+	comp = compFn.create(OpenMaya.MFn.kMeshVertComponent)
+	if vertices == None:
+		compFn.setCompleteData(OpenMaya.MFnMesh(shapeDag).numVertices())
+	else:
+		indices = OpenMaya.MIntArray()
+		for v in vertices:
+			indices.append(v)
+		compFn.addElements(indices)
+	return comp
+
+
 def	skinWeights(x=None, export=None, f=None, fileName=None):
 # Import/export skin weights from/to a file
 # x/export: 0 for import, 1 for export
 # f/fileName: filename under default project directory
+# usage: select an object to import/export all its vertices, or select vertices to import only those
+# influences are matched by name, weights of influences not found are dropped and the rest normalized
 
 	x = x or export
 
@@ -441,110 +487,104 @@ def	skinWeights(x=None, export=None, f=None, fileName=None):
 	if fileName:
 		f = fileName
 	
-	obj = cmds.ls(sl=1)
+	obj = cmds.ls(sl=1, o=1)
 	if not obj:
 		raise Exception, "No object selected"
 
 	obj = obj[0]
 
-	node = None
-	for n in cmds.listHistory(obj, f=0, bf=1):
-		if cmds.nodeType(n) == 'skinCluster':
-			node = n
-			break
-	if not node:
-		raise Exception, "no skin cluster found"
+	vertices = None
+	if not x:
+		components = cmds.filterExpand(cmds.ls(sl=1), sm=31)
+		if components:
+			vertices = sorted([ int(re.search("\\[([0-9]+)\\]$", v).group(1)) for v in components ])
 
-	mode = "r"
-	if x:
-		mode = "w"
-	f = open(cmds.internalVar(uwd=1) + f, mode)
-
-	allTransforms = cmds.skinPercent(node, cmds.ls(cmds.polyListComponentConversion(obj, tv=1), fl=1), q=1, t=None)
-
-	for vertex in cmds.ls(cmds.polyListComponentConversion(obj,tv=1), fl=1):
-		if x:
-			transforms = cmds.skinPercent(node, vertex, ib=1e-010, q=1, t=None)
-			weights = cmds.skinPercent(node, vertex, ib=1e-010, q=1, v=1)
-			s = ""
-			for i in range(len(transforms)):
-				s += str(weights[i])+"@"+transforms[i]+" "
-			f.write(s+"\n")
-		else:
-			weights = {}
-			for t in allTransforms:
-				weights[t] = float(0)
-
-			readWeights = f.readline().strip().split(" ")
-
-			for i in readWeights:
-				w = i.split("@")
-				if w[1] in weights:
-					weights[w[1]] = float(w[0])
-
-			w = []
-			for i in weights.iteritems():
-				w.append(i)
-			cmds.skinPercent(node, vertex, tv=w)
+	skinFn, shapeDag, influences = __skinClusterFn(obj)
+	fileName = cmds.internalVar(uwd=1) + f
 
-	f.close()
+	if x:
+		weights = OpenMaya.MDoubleArray()
+		util = OpenMaya.MScriptUtil()
+		util.createFromInt(0)
+		skinFn.getWeights(shapeDag, __vertexComponent(shapeDag), weights, util.asUintPtr())
+
+		lines = jc.weights.formatWeights(list(weights), influences)
+		f = open(fileName, "w")
+		f.write("\n".join(lines)+"\n")
+		f.close()
+	else:
+		f = open(fileName, "r")
+		rows = jc.weights.parseWeights(f.readlines())
+		f.close()
+
+		matrix, vertices, unmatched = jc.weights.remapWeights(rows, influences, vertices)
+		if unmatched:
+			print "influences not found: "+" ".join(unmatched)
+		if not vertices:
+			return
+
+		values = OpenMaya.MDoubleArray()
+		for w in matrix:
+			values.append(w)
+		indices = OpenMaya.MIntArray()
+		for i in range(len(influences)):
+			indices.append(i)
+		skinFn.setWeights(shapeDag, __vertexComponent(shapeDag, vertices), indices, values, False)
 	
 
-def	deleteNonCameraFacingPolygons():
-
-	slist = OpenMaya.MSelectionList()
-	OpenMaya.MGlobal.getActiveSelectionList( slist )
-
-	cameraIt = OpenMaya.MItSelectionList( slist, OpenMaya.MFn.kCamera )
-	cameraIt.reset()
-	cameraDag = OpenMaya.MDagPath()
-
-	while not cameraIt.isDone():
-		if not cameraDag.isValid():
-			cameraIt.getDagPath( cameraDag )
-		else:
-			raise Exception, "more than one camera selected"
-		cameraIt.next()
-
-	if not cameraDag.isValid():
+def	deleteNonCameraFacingPolygons(startTime=None, endTime=None, samples=1):
+# usage: select cameras and meshes
+# Polygons facing away from all the cameras at all the sampled times are deleted, in one polyDelFacet for all meshes.
+#	startTime, endTime: times of the first and last samples, the current time if they're not given
+#	samples: number of times sampled evenly from startTime to endTime
+# The meshes are evaluated at each sampled time, so a deforming (eg. skinned or nCloth) mesh is tested as it is at that time.
+
+	cameras = []
+	for s in cmds.ls(sl=True, l=True) or []:
+		if cmds.nodeType(s) == "camera":
+			s = cmds.listRelatives(s, p=True, f=True)[0]
+		shape = cmds.listRelatives(s, s=True, typ="camera", f=True)
+		if shape and s not in [ c[0] for c in cameras ]:
+			cameras.append((s, shape[0]))
+	if not cameras:
 		raise Exception, "no camera selected"
 
-	cameraDirection = OpenMaya.MVector()
-	cameraDirection = OpenMaya.MFnCamera( cameraDag ).viewDirection( OpenMaya.MSpace.kWorld )
-	
-	objDag = OpenMaya.MDagPath()
-	meshFn = OpenMaya.MFnMesh()
+	if startTime == None:
+		startTime = cmds.currentTime(q=True)
+	if endTime == None:
+		endTime = startTime
+	times = [ startTime ]
+	if samples > 1:
+		times = [ startTime + (endTime - startTime)*k/float(samples-1) for k in range(samples) ]
+
+	# eye and view direction (-z) of each camera at each time
+	views = [ [] for t in times ]
+	for camera, shape in cameras:
+		orthographic = cmds.getAttr(shape+".orthographic")
+		for k in range(len(times)):
+			m = cmds.getAttr(camera+".wm", t=times[k])
+			views[k].append((m[12:15], (-m[8], -m[9], -m[10]), orthographic))
+
+	# a face is kept if it faces any of the cameras at any of the times, the mesh as it is at that time
+	current = cmds.currentTime(q=True)
+	faces = []
+	for s in cmds.ls(sl=True, l=True) or []:
+		for shape in cmds.listRelatives(s, s=True, ni=True, typ="mesh", f=True) or []:
+			mesh = jc.helper.meshData(shape)
+			counts, vertices = mesh.faces()
+			facing = None
+			for t, v in zip(times, views):
+				if t == current:
+					points = mesh.points(OpenMaya.MSpace.kWorld)
+				else:
+					points = mesh.pointsAt(t)
+				normals, centroids = jc.geometry.faceNormals(points, counts, vertices)
+				f = jc.geometry.facingFaces(normals, centroids, v)
+				facing = facing and [ a or b for a, b in zip(facing, f) ] or f
+			faces += [ "%s.f[%d:%d]" % (shape, a, b) for a, b in jc.geometry.indexRanges([ i for i in range(len(facing)) if not facing[i] ]) ]
 
-	uiScriptUtil = OpenMaya.MScriptUtil()
-	uiPtr = uiScriptUtil.asUintPtr()
-	
-	for i in range(slist.length()):
-		slist.getDagPath(i, objDag )
-		
-		if objDag.hasFn( OpenMaya.MFn.kTransform ):
-			objDag.numberOfShapesDirectlyBelow( uiPtr )
-			shapes = int(uiScriptUtil.getUint( uiPtr ))
-
-			oldObjDag = objDag
-			for j in range( shapes ):
-				objDag.extendToShapeDirectlyBelow( j )
-
-				if objDag.hasFn( OpenMaya.MFn.kMesh ):
-					meshFn.setObject( objDag )
-					polygonNormal = OpenMaya.MVector()
-					polygonIt = OpenMaya.MItMeshPolygon( objDag )
-					polygonIt.reset()
-
-					faces = []
-					while not polygonIt.isDone():
-						meshFn.getPolygonNormal( polygonIt.index(), polygonNormal, OpenMaya.MSpace.kWorld )
-						if cameraDirection * polygonNormal > 0:
-							faces.append(objDag.fullPathName()+'.f['+str(polygonIt.index())+']')
-						polygonIt.next()
-					cmds.polyDelFacet(faces)
-
-				objDag = oldObjDag
-	return
+	if faces:
+		cmds.polyDelFacet(faces)
 
 
 def	renameJointChain(jointChain):
@@ -658,6 +698,7 @@ def	createInfluenceObject(*args, **keywords):
 # Create a skin patch to locally deformed the skin as influence object
 # The patch can be deformed by blendShape or nCloth
 # usage: select faces on a skinned object
+# tolerance: distance along each axis within which a vertex of the skin coincides with one of the patch
 # TBD: mirror (boolean), combine (boolean), layer
 # TBD: need to preserve one skin cluster having no influence object (joint binded only, rigid shape w/o collision) 
 # for the creation of attract to matching mesh constraint
@@ -665,6 +706,7 @@ def	createInfluenceObject(*args, **keywords):
 	if 'influenceType' not in keywords:
 		raise Exception, "missing argument influenceType"
 	influenceType = keywords['influenceType']
+	tolerance = keywords.get('tolerance', 0.0001)
 
 	s = cmds.ls(sl=True, l=True)
 	if not s:
@@ -713,23 +755,13 @@ def	createInfluenceObject(*args, **keywords):
 				jc.clothes.__updateNClothAttribute(cmds.ls(sl=True, fl=True), "inputMeshAttract", 1)
 
 	cmds.setAttr(sc+".useComponents", 1)
-	def f((x,y)): return x-y
+	def f(l): return zip(l[0::3], l[1::3], l[2::3])
+	points = f(cmds.xform(obj[0]+".vtx[*]", q=True, ws=True, t=True))
 	for o in objs:
 		cmds.skinCluster(sc, e=True, ug=True, dr=99, ps=0, ai=o)
-		pts = []
-		(x1,y1,z1, x2,y2,z2) = cmds.exactWorldBoundingBox(o)
-		for v in cmds.ls(cmds.polyListComponentConversion(obj, tv=True), fl=True, l=True):
-			outside = True
-			(x,y,z) = cmds.pointPosition(v)
-			if x>x1 and x<x2 and y>y1 and y<y2 and z>z1 and z<z2:
-				for u in cmds.ls(cmds.polyListComponentConversion(o, tv=True), fl=True, l=True):
-					zp = zip([x,y,z], cmds.pointPosition(u))
-					(dx,dy,dz) = map(f, zp)
-					if abs(dx) < 0.0001 and abs(dy) < 0.0001 and abs(dz) < 0.0001:
-						outside = False
-						break
-			if outside:
-				pts.append(v)
+		# vertices of obj not coinciding with the patch are not influenced by it
+		coincident = jc.geometry.coincidentPoints(points, f(cmds.xform(o+".vtx[*]", q=True, ws=True, t=True)), tolerance)
+		pts = [ obj[0]+".vtx[%d]" % i for i in range(len(points)) if not coincident[i] ]
 		if pts:
 			cmds.skinPercent(sc, pts, tv=[o, 0])
 
@@ -753,7 +785,7 @@ def	doMenu(do=True, parent=None):
 			m = jc.menu.createMenu(__moduleName, parent)
 		
 		i = jc.menu.commandItem(m, __moduleName+".createDeformer", "Create Deformer")
-		jc.menu.listOption(i, "deformer", deformerOptions()[0], deformerOptions)
+		jc.menu.listOption(i, "deformer", jc.menu.first(deformerOptions), deformerOptions)
 
 		i = jc.menu.commandItem(m, __moduleName+".copyPose", "Copy Pose")
 
@@ -774,8 +806,8 @@ def	doMenu(do=True, parent=None):
 		i = jc.menu.commandItem(m, __moduleName+".mirrorGeometry", "Mirror Geometry")
 
 		i = jc.menu.commandItem(m, __moduleName+".connectAdjacentJoints", "Connect Adjacent Joints")
-		jc.menu.listOption(i, "attribute", attributeOptions()[0], attributeOptions)
-		jc.menu.listOption(i, "target", targetOptions()[0], targetOptions)
+		jc.menu.listOption(i, "attribute", jc.menu.first(attributeOptions), attributeOptions)
+		jc.menu.listOption(i, "target", jc.menu.first(targetOptions), targetOptions)
 
 		i = jc.menu.commandItem(m, __moduleName+".skinWeights", "Import/Export Skin Weights")
 		jc.menu.booleanOption(i, "export", True)
@@ -784,7 +816,7 @@ def	doMenu(do=True, parent=None):
 		i = jc.menu.commandItem(m, __moduleName+".deleteNonCameraFacingPolygons", "Delete Non Camera Facing Polygons")
 		
 		i = jc.menu.commandItem(m, __moduleName+".renameJointChain", "Rename Joint Chain")
-		jc.menu.listOption(i, "jointChain", jointChainOptions()[0], jointChainOptions)
+		jc.menu.listOption(i, "jointChain", jc.menu.first(jointChainOptions), jointChainOptions)
 
 		i = jc.menu.commandItem(m, __moduleName+".createVertexFollicles", "Create Vertex Follicles")
 
@@ -792,3 +824,4 @@ def	doMenu(do=True, parent=None):
 
 		i = jc.menu.commandItem(m, __moduleName+".createInfluenceObject", "Create Influence Object")
 		jc.menu.listOption(i, "influence Type", influenceTypes()[0], "Influence Types")
+		jc.menu.floatOption(i, "tolerance", 0.0001)
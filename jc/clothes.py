@@ -5,7 +5,7 @@
 # This file implements the module called jc.clothes.
 # Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
 # Add PYTHONPATH to point to script directory in Maya.env.
-# character.py, menu.py and helper.py are prerequisite.
+# character.py, menu.py, helper.py, nurbs.py, geometry.py, mesher.py, weights.py, keys.py, joints.py, plan.py, jobs.py and links.py are prerequisite.
 #
 # Author's website:
 # http://sites.google.com/site/cgriders
@@ -18,6 +18,15 @@ import maya.OpenMaya as om
 import jc.character
 import jc.menu
 import jc.helper
+import jc.nurbs
+import jc.geometry
+import jc.mesher
+import jc.weights
+import jc.keys
+import jc.joints
+import jc.plan
+import jc.jobs
+import jc.links
 
 # constants
 
@@ -37,47 +46,204 @@ __twistRootRight = "jctrr"			# float attribute on curve
 __patternUV = "jcpuv"
 __garmentUV = "jcguv"
 __nearly_zero = 1.0e-10
+__chordError = 0.001						# distance of the boundary of a pattern mesh from its curves, well within the tolerance of __findBorderVertices
+__garmentSchedulers = {}				# passive collider: scheduler of the last build of its garment
+__links = jc.links.linkIndex([ __pattern, __locator, __patternCurve, __destinationCurve, __destinationJoint ])
+__linkCallbacks = []
 
 
 
+def	__describeNodes__(nodes):
+# add the types of the nodes and the transforms of the shapes among them to the link index, by one query
+# All the nodes of their names are added, so that the names given by the index tell them apart.
+	l = cmds.ls([ jc.links.leaf(n) for n in nodes ], l=True, st=True) or []
+	for i in range(0, len(l), 2):
+		parent = None
+		if l[i+1] not in ("transform", "joint") and l[i].count("|") > 1:
+			parent = l[i][:l[i].rindex("|")]
+		__links.addNode(l[i], l[i+1], parent)
+
+
+def	__scanLinks__():
+# build the link index from all the links in the scene, by a few queries for each attribute
+
+	__links.clear()
+	nodes = set()
+	for a in __links.attributes:
+		linked = cmds.ls("*."+a, o=True, r=True, l=True)
+		if not linked:
+			continue
+		l = cmds.listConnections([ n+"."+a for n in linked ], s=True, d=False, c=True, sh=True, fnn=True) or []
+		for i in range(0, len(l), 2):
+			__links.link(l[i].split(".")[0], a, l[i+1])
+			nodes.add(l[i].split(".")[0])
+			nodes.add(l[i+1])
+	if nodes:
+		__describeNodes__(list(nodes))
+	__links.complete = True
+
+
+def	__nodePath__(node):
+# return: full path of the node (MObject), its name if it's not in the DAG
+	if node.hasFn(om.MFn.kDagNode):
+		path = om.MDagPath()
+		om.MDagPath.getAPathTo(node, path)
+		return path.fullPathName()
+	return om.MFnDependencyNode(node).name()
+
+
+def	__linkConnected__(source, destination, made, clientData):
+	attribute = destination.name().split(".", 1)[1]
+	if attribute not in __links.attributes or not __links.complete:
+		return
+	node = __nodePath__(destination.node())
+	if made:
+		target = __nodePath__(source.node())
+		__describeNodes__([ node, target ])
+		__links.link(node, attribute, target)
+	else:
+		__links.unlink(node, attribute)
+
+
+def	__linkRemoved__(node, clientData):
+	if __links.complete:
+		__links.removeNode(__nodePath__(node))
+
+
+def	__linkRenamed__(node, previousName, clientData):
+	if __links.complete and previousName:
+		path = __nodePath__(node)
+		__links.rename(path[:path.rfind("|")+1]+previousName, path)
+
+
+def	__linkParented__(child, parent, clientData):
+# the paths of the node and the nodes below it change, they're found by a new scan
+	if __links.complete and __links.contains(child.fullPathName()):
+		__links.complete = False
+
+
+def	__sceneOpened__(*args):
+# a new scene or a file is opened, the garments built in the last one are built from scratch in it
+	__links.clear()
+	__garmentSchedulers.clear()
+
+
+def	__installCallbacks__():
+# callbacks keeping the link index up to date, and dropping it and the schedulers of garments with the scene they were made in
+
+	if not __linkCallbacks:
+		__linkCallbacks.append(om.MDGMessage.addConnectionCallback(__linkConnected__))
+		__linkCallbacks.append(om.MDGMessage.addNodeRemovedCallback(__linkRemoved__, "dependNode"))
+		__linkCallbacks.append(om.MNodeMessage.addNameChangedCallback(om.MObject(), __linkRenamed__))
+		__linkCallbacks.append(om.MDagMessage.addParentAddedCallback(__linkParented__))
+		for m in (om.MSceneMessage.kAfterNew, om.MSceneMessage.kAfterOpen):
+			__linkCallbacks.append(om.MSceneMessage.addCallback(m, __sceneOpened__))
+		for m in (om.MSceneMessage.kAfterImport, om.MSceneMessage.kAfterCreateReference, om.MSceneMessage.kAfterRemoveReference):
+			__linkCallbacks.append(om.MSceneMessage.addCallback(m, lambda *args: __links.clear()))
+
+
+def	__linkIndex__():
+# return: the index of the links between the objects of garments (patterns, curves, locators and stitch joints)
+# The scene is scanned on the first call (and after a file is opened or linked nodes are parented), then the index
+# is kept up to date by callbacks on connections, deletion and renaming of nodes.
+
+	__installCallbacks__()
+	if not __links.complete:
+		__scanLinks__()
+	return __links
+
+
+def	__curveData(curve):
+# return: CVs in world space, knots, degree and form of the curve, read by one API query
+
+	slist = om.MSelectionList()
+	slist.add(curve)
+	dag = om.MDagPath()
+	slist.getDagPath(0, dag)
+	if not dag.hasFn(om.MFn.kNurbsCurve):
+		dag.extendToShape()
+
+	curveFn = om.MFnNurbsCurve(dag)
+	cvs = om.MPointArray()
+	curveFn.getCVs(cvs, om.MSpace.kWorld)
+	knots = om.MDoubleArray()
+	curveFn.getKnots(knots)
+
+	return dag.fullPathName(), [ (cvs[i].x, cvs[i].y, cvs[i].z, cvs[i].w) for i in range(cvs.length()) ], list(knots), curveFn.degree(), curveFn.form()-1
+
+
+def	__nurbsCurve__(curve):
+# return: the curve to be evaluated in python, eg. to get many points along it without a pointOnCurve for each
+
+	name, cvs, knots, degree, form = __curveData(curve)
+	return jc.nurbs.curve(cvs, knots, degree, form)
+
+
+def	__curveEnds__(curves):
+# return: list of (curve, start point, end point) as expected by jc.geometry.endpointGraph
+
+	ends = []
+	for c in curves:
+		nc = __nurbsCurve__(c)
+		ends.append((c, nc.point(nc.minU), nc.point(nc.maxU)))
+	return ends
+
+
+def	__patternBoundary__(curves, a, b, spacing):
+# return: boundary polygon of a pattern in the coordinates a, b (indices of the axes) of its plane, along the curves in turn
+# The polygon is no farther than __chordError from the curves whatever the spacing, so that the border vertices of the mesh,
+# which are on its edges, are found on the curves by __findBorderVertices.
+
+	if len(curves) > 1:
+		order = jc.geometry.endpointGraph(__curveEnds__(curves), 0.001).order()
+	else:
+		order = [ (curves[0], False) ]
+	boundary = []
+	for c, reverse in order:
+		nc = __nurbsCurve__(c)
+		params = nc.sampleParameters(spacing, 1, __chordError)
+		if reverse:
+			params.reverse()
+		points, tangents = nc.evaluate(params[:-1], False)
+		boundary += [ (p[a], p[b]) for p in points ]
+	return boundary
+
+
+def	__arcLength(curve):
+# return: arc length table of the curve, it's cached and rebuilt only when the curve has been changed
+
+	name, cvs, knots, degree, form = __curveData(curve)
+	return jc.nurbs.getArcLength(name, cvs, knots, degree, form)
+
+
 def __findCurveLength__(curve, startU=0, endU=0):
 
+	table = __arcLength(curve)
 	if startU==0 and endU==0:
-		startU = cmds.getAttr(curve+".min")
-		endU = cmds.getAttr(curve+".max")
-	arclenDim = cmds.arcLengthDimension(curve+".u["+str(startU)+"]")
-	startLen = cmds.getAttr(arclenDim+'.al')
-	cmds.setAttr(arclenDim+'.upv', endU)
-	endLen = cmds.getAttr(arclenDim+'.al')
-	cmds.delete(cmds.listRelatives(arclenDim, p=True, f=True))
+		return table.total
 
-	return (endLen - startLen)
+	return table.length(startU, endU)
 
 
 def __findU__(curve, length):
 
-	startU = cmds.getAttr(curve+'.min')
-	endU = cmds.getAttr(curve+'.max')
-	arclenDim = cmds.arcLengthDimension(curve+".u["+str(endU)+"]")
-	curveLen = cmds.getAttr(arclenDim+'.al')
-	if curveLen < length:
-		return endU
+	table = __arcLength(curve)
+	if table.total < length:
+		return table.curve.maxU
+
+	return table.findU(length)
 
-	uLen = curveLen
-	u = endU
-	count = 100
-	while uLen != length and count > 0:
-		u = startU + (u-startU)*length/uLen
-		if u > endU:
-			cmds.delete(cmds.listRelatives(arclenDim, p=True, f=True))
-			raise Exception, "fail to find U (try to rebuild curve)"
-		cmds.setAttr(arclenDim+".upv", u)
-		uLen = cmds.getAttr(arclenDim+".al")
-		count -= 1
 
-	cmds.delete(cmds.listRelatives(arclenDim, p=True, f=True))
+def	__insidePolygon(p, polygon):
+# even-odd test of a 2D point against a polygon given as a list of (x, y)
 
-	return u
+	inside = False
+	for i in range(len(polygon)):
+		a = polygon[i-1]
+		b = polygon[i]
+		if (a[1] > p[1]) != (b[1] > p[1]) and p[0] < a[0] + (b[0]-a[0])*(p[1]-a[1])/(b[1]-a[1]):
+			inside = not inside
+	return inside
 
 
 def __dist__(p1, p2):
@@ -87,13 +253,12 @@ def __dist__(p1, p2):
 def	getEdgePoints(curve, startVertex, division=10):
 # output: list of points along the curve starting from the given vertex
 
-	m = cmds.getAttr(curve+'.min')
-	n = cmds.getAttr(curve+'.max')
+	c = __nurbsCurve__(curve)
+	m = c.minU
+	n = c.maxU
 	i = (m+n)/division
-	pts = []
-	for j in range(division+1):
-		pts.append(cmds.pointOnCurve(curve, pr=m+i*j, p=True))
-	if __dist__(startVertex, cmds.pointOnCurve(curve, pr=cmds.getAttr(curve+'.min'), p=True)) > __nearly_zero:
+	pts, tangents = c.evaluate([ m+i*j for j in range(division+1) ], False)
+	if __dist__(startVertex, pts[0]) > __nearly_zero:
 		pts.reverse()
 	if math.fabs(pts[0][0]) < __nearly_zero:
 		return pts[:-1]
@@ -124,44 +289,22 @@ def getPatternVertices(*args, **keywords):
 			curves = cmds.ls(sl=True, typ='nurbsCurve', l=True)
 	curves = cmds.listRelatives(curves, p=True, typ='transform', f=True)
 
-	curvesDict = {}
-	for c in curves:
-		mn = cmds.getAttr(c+'.min')
-		mx = cmds.getAttr(c+'.max')
-		curvesDict[c] = (cmds.pointOnCurve(c, pr=mn, p=True), cmds.pointOnCurve(c, pr=mx, p=True))
+	ends = __curveEnds__(curves)
+	graph = jc.geometry.endpointGraph(ends, __nearly_zero)
 
-	curvesSorted = [curves[0]]
+	first = curves[0]
+	reverseFirst = False
 	if mirror:
-		for c in curves:
-			p0, p1 = curvesDict[c]
+		for c, p0, p1 in ends:
 			if math.fabs(p0[0]) < __nearly_zero and math.fabs(p1[0]) < __nearly_zero:
-				curvesSorted = [c]
-				if p0[1] < p1[1]:
-					curvesDict[c] = (p1, p0)
+				first = c
+				reverseFirst = p0[1] < p1[1]
 				break
 
 	# sort the curves
-	while len(curvesSorted) < len(curves):
-		foundCurve = False
-		p0, p1 = curvesDict[curvesSorted[-1]]
-		for key, value in curvesDict.iteritems():
-			if key != curvesSorted[-1]:
-				q0, q1 = value
-				if __dist__(p1, q0) < __nearly_zero:
-					foundCurve = True
-				elif __dist__(p1, q1) < __nearly_zero:
-					foundCurve = True
-					curvesDict[key] = (q1, q0)	# reverse the points in the dictionary
-				if foundCurve:
-					curvesSorted.append(key)
-					break
-		if not foundCurve and len(curvesSorted) < len(curves):
-			raise Exception, "fail to find next connecting curve"
-
 	vertices = []
-	for c in curvesSorted:
-		p0, p1 = curvesDict[c]
-		vertices.append( (c, p0) )
+	for c, reverse in graph.order(first, reverseFirst):
+		vertices.append( (c, graph.ends[c][reverse and 1 or 0]) )
 
 	return vertices
 
@@ -235,28 +378,59 @@ def cutCurves(length, rebuildCurve=False):
 					cmds.delete(s)
 
 
-def keyJoints(clearKeyframes=False):
+def	__writeKeys__(table):
+# write the keys of jc.keys.keyTable at their own times, without changing the current time
+# a new animation curve with several keys gets them all by one setAttr, the tangents of all of them are set by one keyTangent,
+# a single key or an attribute already driven (eg. by a curve or a constraint) is keyed one key at a time
+
+	curves = table.curves()
+	driven = jc.helper.drivenAttributes([ (node, attribute) for node, attribute, keys in curves ])
+	created = []
+	for node, attribute, keys in curves:
+		plug = node+"."+attribute
+		if len(keys) == 1 or (node, attribute) in driven:
+			for t, v in keys:
+				cmds.setKeyframe(node, at=attribute, t=t, v=v)
+			continue
+
+		curve = cmds.createNode(jc.keys.curveType(attribute), n=node.split("|")[-1]+"_"+attribute)
+		cmds.setAttr(curve+".ktv[0:%d]" % (len(keys)-1), *jc.keys.flatten(keys))
+		cmds.connectAttr(curve+".o", plug, f=True)
+		created.append(curve)
+
+	if created:
+		cmds.keyTangent(created, e=True, itt=cmds.keyTangent(q=True, g=True, itt=True)[0], ott=cmds.keyTangent(q=True, g=True, ott=True)[0])
+
+
+def keyJoints(clearKeyframes=False, time=None, keys=None):
 # usage: select joint chains
+#	time: time of the keys, the current time if it's not given
+#	keys: jc.keys.keyTable the keys are added to, to be written with the other keys of the joints, they're written here if it's not given
+# the values of all the joints are evaluated at the time in one pass and keyed there, the current time is not changed
 
 	joints = cmds.ls(sl=True, typ='joint')
 	if not joints:
 		raise Exception, "no joint selected"
 
+	if time == None:
+		time = cmds.currentTime(q=True)
+
+	keyed = []
 	for current in joints:
-		if clearKeyframes:
+		keyed += jc.keys.chainAttributes(__jointChain__(current))
+	values = jc.helper.getAttributesAt([ j for j, attributes in keyed ], [ "tx", "ty", "tz", "rx", "ry", "rz", "sx" ], time)
+
+	table = keys
+	if table == None:
+		table = jc.keys.keyTable()
+	for joint, attributes in keyed:
+		table.addPose(joint, dict([ (a, values[joint][a]) for a in attributes ]), time)
+
+	if clearKeyframes:
+		for current in joints:
 			cmds.cutKey(current, cmds.listRelatives(current, ad=True, f=True, typ='joint'), at=("tx","ty","tz","rx","ry","rz","sx"), cl=True)
-		cmds.setKeyframe(current, at='tx')
-		cmds.setKeyframe(current, at='ty')
-		cmds.setKeyframe(current, at='tz')
-		cmds.setKeyframe(current, at='sx')
-		j = cmds.listRelatives(current, c=True, typ='joint', f=True)
-		while j:
-			cmds.setKeyframe(current, at='rx')
-			cmds.setKeyframe(current, at='ry')
-			cmds.setKeyframe(current, at='rz')
-			cmds.setKeyframe(current, at='sx')
-			current = j[0]
-			j = cmds.listRelatives(current, c=True, typ='joint', f=True)
+	if keys == None:
+		__writeKeys__(table)
 
 
 def __compareJoints__():
@@ -280,24 +454,25 @@ def __compareJoints__():
 
 
 def	__disableConstraints(object):
+# return: snapshot of the weights of the constraints in history of object, before they're all set to 0
 	constraints = cmds.ls(cmds.listHistory(object), typ=("aimConstraint","geometryConstraint","normalConstraint","orientConstraint","parentConstraint","pointConstraint","scaleConstraint","tangentConstraint"), fl=True)
 	weights = {}
 	for constraint in constraints:
-		i = 0
-		weightList = []
-		while cmds.attributeQuery("w"+str(i), n=constraint, ex=True):
-			weightList.append(cmds.getAttr(constraint+".w"+str(i)))
-			cmds.setAttr(constraint+".w"+str(i), 0)
-			i += 1
-		weights[constraint] = weightList
+		# the weight attributes of all targets by one query instead of probing w0, w1, ...
+		aliases = getattr(cmds, cmds.nodeType(constraint))(constraint, q=True, wal=True) or []
+		weights.update(jc.helper.getAttributes([ constraint ], aliases))
+	jc.helper.setAttributes(__disabled__(weights), current=weights)
 	return weights
 
 
+def	__disabled__(weights):
+# return: snapshot of the weights all set to 0
+	return dict([ (c, dict([ (a, 0) for a in w.keys() ])) for c, w in weights.items() ])
+
+
 def	__restoreConstraints(object, weights):
-	constraints = cmds.ls(cmds.listHistory(object), typ=("aimConstraint","geometryConstraint","normalConstraint","orientConstraint","parentConstraint","pointConstraint","scaleConstraint","tangentConstraint"), fl=True)
-	for constraint in constraints:
-		for i in range(len(weights[constraint])):
-			cmds.setAttr(constraint+".w"+str(i), weights[constraint][i])
+# only the weights which weren't 0 are set back
+	jc.helper.setAttributes(weights, current=__disabled__(weights))
 
 
 def matchJointsByOrient(setKeyframes):
@@ -390,8 +565,9 @@ def __deleteIKs__():
 
 
 
-def matchJoints(stitchStartTime, stitchEndTime, twistRoot=0):
+def matchJoints(stitchStartTime, stitchEndTime, twistRoot=0, keys=None):
 # usage: select a joint in the stitch joint chain, it will match its destination joint chain
+#	keys: jc.keys.keyTable having the keys at stitchStartTime, the keys at stitchEndTime are added to it, they're written here if it's not given
 
 	if not cmds.ls(sl=True, typ='joint'):
 		raise Exception, "no joint selected"
@@ -400,58 +576,81 @@ def matchJoints(stitchStartTime, stitchEndTime, twistRoot=0):
 	while cmds.listRelatives(stitchJoint, p=True, typ="joint"):
 		stitchJoint = cmds.listRelatives(stitchJoint, p=True, typ="joint", f=True)[0]
 
-	if not cmds.attributeQuery(__destinationJoint, n=stitchJoint, ex=True):
+	destinationJoint = __linkIndex__().target(stitchJoint, __destinationJoint)
+	if not destinationJoint:
 		raise Exception, "no destination joint"
 
-	destinationJoint = cmds.listConnections(stitchJoint+"."+__destinationJoint)[0]
 	cmds.select(destinationJoint, stitchJoint, r=True)
-	cmds.currentTime(stitchStartTime)
-	cmds.currentTime(stitchEndTime, update=False)
-	matchJointsByIK(True, twistRoot)
+	matchJointsByIK(True, twistRoot, stitchEndTime, stitchStartTime, keys)
+
+
+def __jointChain__(joint):
+# return: the joint and its first child, its child and so on
+	chain = [ joint ]
+	j = cmds.listRelatives(joint, c=True, typ='joint', f=True)
+	while j:
+		chain.append(j[0])
+		j = cmds.listRelatives(j[0], c=True, typ='joint', f=True)
+	return chain
 
 
-def matchJointsByIK(setKeyframes, twistRoot=0):
+def matchJointsByIK(setKeyframes, twistRoot=0, time=None, poseTime=None, keys=None):
 # usage: select two joint chains, parent first, child second, child will match the parent
-#  setKeyframes: boolean to indicate whether to set key at current time
+#  setKeyframes: boolean to indicate whether to set keys, otherwise the joints are just rotated
+#  time: time at which the parent is matched and the keys are set, the current time if it's not given
+#  poseTime: time of the pose of the child to start from, its rotations are kept continuous with it, the same as time if it's not given
+#  keys: jc.keys.keyTable the keys are added to instead of being written, the pose of the child is taken from its keys at poseTime if it has them
+# The rotations are solved by jc.joints as single chain IK handles on each bone would, without creating any handle,
+# the current time is not changed.
 # output: oriented joint chain
 
 	if not __compareJoints__():
 		raise Exception, "the joint chains do not match"
 
 	joints = cmds.ls(sl=True, typ='joint')
+	if time == None:
+		time = cmds.currentTime(q=True)
+	if poseTime == None:
+		poseTime = time
 
 	onLeft = True
 	if cmds.xform(joints[1], q=True, ws=True, rp=True)[0] < 0:
 		onLeft = False
-	
-	# create IKs on child
-	cmds.select(joints[1], r=True);
-	ikhandles = __createIKs__("ikHandle")
 
-	weights = __disableConstraints(joints[1])
-	
-	tl = cmds.pointConstraint(joints[1], q=True, tl=True)
-	if tl:
-		offset = cmds.pointConstraint(joints[1], q=True, o=True)
-	cmds.pointConstraint(joints, offset=[ 0, 0, 0 ], weight=1)
+	parents = __jointChain__(joints[0])
+	children = __jointChain__(joints[1])
+
+	targets = [ cmds.getAttr(j+".wm", t=time)[12:15] for j in parents ]
+	def	posed(joint, attributes, plug):
+		if keys != None:
+			values = [ keys.get(joint, a, poseTime) for a in attributes ]
+			if None not in values:
+				return values
+		return cmds.getAttr(joint+plug, t=poseTime)[0]
+	translates = [ posed(j, ("tx", "ty", "tz"), ".t") for j in children ]
+	rotates = [ posed(j, ("rx", "ry", "rz"), ".r") for j in children ]
+	orients = [ cmds.getAttr(j+".jo")[0] for j in children ]
+	orders = [ cmds.getAttr(j+".ro") for j in children ]
+	parentMatrix = cmds.getAttr(children[0]+".pm", t=time)
+	root, rotations = jc.joints.matchChain(parentMatrix, translates, rotates, orients, targets, twistRoot, orders)
 
 	if cmds.attributeQuery("blendPoint1", n=joints[1], ex=True):
 		cmds.setAttr(joints[1]+".blendPoint1", 1)
-		
-	cmds.setKeyframe(joints[1], at='tx')
-	cmds.setKeyframe(joints[1], at='ty')
-	cmds.setKeyframe(joints[1], at='tz')
-	cmds.pointConstraint(joints, rm=True, mo=True)
-	if tl:
-		cmds.pointConstraint(joints[1], e=True, o=offset)
-	
-	# twist root joint to fix weird rotation on some occasions
-	if twistRoot != 0:
-		ik = cmds.ls(cmds.listConnections(joints[1]+'.message', d=True), typ='ikHandle', fl=True)
-		cmds.setAttr(ik[0]+'.twist', twistRoot)
 
-	if cmds.attributeQuery(__patternCurve, n=joints[1], ex=True):
-		patternCurve = cmds.listConnections(joints[1]+"."+__patternCurve)[0]
+	pose = jc.keys.keyTable()
+	pose.addPose(children[0], dict(zip(("tx", "ty", "tz"), root)), time)
+	for j, r in zip(children, rotations):
+		pose.addPose(j, dict(zip(("rx", "ry", "rz", "sx"), list(r)+[ 1 ])), time)
+	if setKeyframes and keys != None:
+		keys.update(pose)
+	elif setKeyframes:
+		__writeKeys__(pose)
+	else:
+		for node, attribute, values in pose.curves():
+			cmds.setAttr(node+"."+attribute, values[0][1])
+
+	patternCurve = __linkIndex__().target(joints[1], __patternCurve)
+	if patternCurve:
 		if onLeft:
 			if not cmds.attributeQuery(__twistRootLeft, n=patternCurve, ex=True):
 				cmds.addAttr(patternCurve, sn=__twistRootLeft, at="float", dv=0, h=True)
@@ -461,52 +660,6 @@ def matchJointsByIK(setKeyframes, twistRoot=0):
 				cmds.addAttr(patternCurve, sn=__twistRootRight, at="float", dv=0, h=True)
 			cmds.setAttr(patternCurve+"."+__twistRootRight, twistRoot)
 
-	child = joints[1]
-	parent = joints[0]
-	while child and parent:
-		parent = cmds.listRelatives(parent, c=True, typ='joint', f=True)
-		ik = cmds.ls(cmds.listConnections(child+'.message', d=True), typ='ikHandle', fl=True)
-		if ik and parent:
-			parent = parent[0]
-			ik = ik[0]
-			#
-			#	Setting translation is equivalent to making point constraint
-			#	t = cmds.joint(parent, q=True, p=True)
-			#	cmds.setAttr(ik+'.tx', t[0])
-			#	cmds.setAttr(ik+'.ty', t[1])
-			#	cmds.setAttr(ik+'.tz', t[2])
-			#
-			cmds.setAttr(child+'.sx', 1)
-			cmds.pointConstraint(parent, ik, offset=[ 0, 0, 0 ], weight=1)
-			cmds.setKeyframe(child, at='rx')
-			cmds.setKeyframe(child, at='ry')
-			cmds.setKeyframe(child, at='rz')
-			cmds.setKeyframe(child, at='sx')
-			cmds.pointConstraint(parent, ik, rm=True, mo=True)
-		child = cmds.listRelatives(child, c=True, typ='joint', f=True)
-		if child:
-			child = child[0]
-
-	cmds.select(joints[1], r=True)
-	__deleteIKs__()
-
-	__restoreConstraints(joints[1], weights)
-
-	# fix exaggerated rotations
-	l = cmds.listRelatives(joints[1], ad=True, type='joint', f=True)
-	if not l: l = []
-	for j in [joints[1]]+l:
-		keys = cmds.keyframe(j+".r", q=True, name=True)
-		if keys:
-			for k in keys:
-				timevalues = cmds.keyframe(k, q=True, tc=True, vc=True)
-				if len(timevalues) == 4:
-					if abs(timevalues[1] - timevalues[3]) > 180:
-						if timevalues[1] > timevalues[3]:
-							cmds.keyframe(k, e=True, a=True, t=(timevalues[2],timevalues[2]), vc=360+timevalues[3])
-						else:
-							cmds.keyframe(k, e=True, a=True, t=(timevalues[2],timevalues[2]), vc=timevalues[3]-360)
-
 
 def flattenJoints(*args):
 
@@ -548,15 +701,8 @@ def createStitchJoints(numberOfJoints, rebuildCurve=False):
 		if rebuildCurve:
 			# Rebuild according to rebuild options (TBD)
 			cmds.rebuildCurve(curve, ch=False, rpo=True, rt=4, end=1, kr=0, kcp=False, kep=False, kt=False, d=3, tol=0.01)
-		nLen = __findCurveLength__(curve)/numberOfJoints
-
-		points = []
-		points.append(cmds.pointOnCurve(curve, p=True, top=False, pr=cmds.getAttr(curve+".min")))
-
-		for i in range(1, numberOfJoints):
-			points.append(cmds.pointOnCurve(curve, p=True, top=False, pr=__findU__(curve, nLen*i)))
-
-		points.append(cmds.pointOnCurve(curve, p=True, top=False, pr=cmds.getAttr(curve+".max")))
+		table = __arcLength(curve)
+		points, tangents = table.curve.evaluate(table.uniformParameters(numberOfJoints), False)
 
 		# create joint chain
 
@@ -584,15 +730,14 @@ def	__findBorderVertices(curves, mirror=False, tolerance=0.01):
 	curves = cmds.listRelatives(ad=True, typ='nurbsCurve', f=True)
 
 	borderVertices = {}	# corresponding vertices of curves
-	bbox = {}			# bounding box of curves
 	curves2 = []		# curves whose corresponding vertices have not been found
 	patterns = []		# all the related patterns or garment which there's only one
 
+	links = __linkIndex__()
 	for curve in curves:
 		if cmds.attributeQuery(__pattern, n=curve, ex=True):
-			pattern = cmds.listConnections(curve+"."+__pattern)
+			pattern = links.target(curve, __pattern)
 			if pattern:
-				pattern = pattern[0]
 				if pattern not in patterns:
 					patterns.append(pattern)
 
@@ -607,39 +752,37 @@ def	__findBorderVertices(curves, mirror=False, tolerance=0.01):
 				else:
 					cmds.addAttr(curve, sn=__componentIndices, m=True, at="long", h=True)
 					curves2.append(curve)
-					bbox[curve] = cmds.exactWorldBoundingBox(curve)
 
 	if not cmds.pluginInfo('jcClothes',q=True,l=True):
 		# this calculation would be replaced by plugin command jcBorderVerticesOnCurves upon garment creation
 	
-		# create circle of radius equal to tolerance
-		c = cmds.circle(c=(0, 0, 0), nr=(0,0,1), sw=360, s=8, d=3, r=tolerance, ut=False, tol=0.01, ch=False)[0]
-	
+		# sample the curves into polylines and match all border vertices against them in one pass
+		# (a vertex is on a curve if the curve comes within tolerance of it in XY-plane)
+
 		indexReg = re.compile("\[([0-9]+)\]")
-	
+
 		vertices = []
 		for pattern in patterns:
 			vertices += cmds.ls(cmds.polyListComponentConversion(__selectBorderEdges(pattern), fe=True, tv=True), fl=True)
-	
-		for v in vertices:
-			p = cmds.pointPosition(v)
-			if not mirror and p[0] < 0:
-				continue
-			if mirror and p[0] < 0:
-				p[0] = -p[0]
+
+		if vertices and curves2:
+			p = cmds.xform(vertices, q=True, ws=True, t=True)
+			points = [ p[i:i+3] for i in range(0, len(p), 3) ]
+			polylines = []
 			for curve in curves2:
-				# intersect curve and circle only if vertex is within bounding box of curve
-				if p[0] < bbox[curve][0]-tolerance or p[0] > bbox[curve][3]+tolerance or p[1] < bbox[curve][1]-tolerance or p[1] > bbox[curve][4]+tolerance:
-					continue
-				cmds.move(p[0], p[1], p[2], c, a=True)
-				if cmds.curveIntersect(c, curve, ud=True, d=(0,0,1), ch=False):
-					borderVertices[curve].append(v)
+				name, cvs, knots, degree, form = __curveData(curve)
+				polylines.append(jc.nurbs.curve(cvs, knots, degree, form).polyline(tolerance*10))
+
+			indices = {}
+			for v, i in zip(vertices, jc.geometry.matchPointsToPolylines(points, polylines, tolerance, mirror)):
+				if i != None:
+					borderVertices[curves2[i]].append(v)
 					m = indexReg.search(v)
 					if m:
-						cmds.setAttr(curve+"."+__componentIndices+"["+str(cmds.getAttr(curve+"."+__componentIndices, s=True))+"]", int(m.group(1)))
-					break
-	
-		cmds.delete(c)
+						indices.setdefault(curves2[i], []).append(int(m.group(1)))
+
+			for curve, index in indices.iteritems():
+				cmds.setAttr(curve+"."+__componentIndices+"[0:"+str(len(index)-1)+"]", *index)
 
 	def f(x,y): return x+y
 	return reduce(f, borderVertices.values())
@@ -697,9 +840,9 @@ def createStitch(*args, **keywords):
 
 	if not numberOfJoints:
 		# deduce number of joints from resolution
-		if not cmds.attributeQuery(__locator, n=s[1], ex=True):
+		if not __linkIndex__().target(s[1], __locator):
 			raise Exception, "unable to determine resolution"
-		resolution = cmds.getAttr(cmds.listConnections(s[1]+"."+__locator)[0]+"."+__resolution)
+		resolution = cmds.getAttr(__linkIndex__().target(s[1], __locator)+"."+__resolution)
 		numberOfJoints = math.ceil(__findCurveLength__(s[0])*resolution/2)
 
 	# create stitch joints for first curve
@@ -712,9 +855,9 @@ def createStitch(*args, **keywords):
 	destinationJoint = joints[0]
 	outputJoints = [(destinationJoint)]
 	if 'mirror' not in keywords:
-		mirror = cmds.getAttr(cmds.listConnections(s[1]+"."+__locator)[0]+"."+__mirror)
+		mirror = cmds.getAttr(__linkIndex__().target(s[1], __locator)+"."+__mirror)
 	if len(s) > 2:
-		mirror = mirror and cmds.getAttr(cmds.listConnections(s[2]+"."+__locator)[0]+"."+__mirror)
+		mirror = mirror and cmds.getAttr(__linkIndex__().target(s[2], __locator)+"."+__mirror)
 	if mirror:
 		cmds.mirrorJoint(destinationJoint, myz=True, mb=True)
 		destinationJoint2 = cmds.ls(sl=True)[0]
@@ -742,61 +885,40 @@ def createStitch(*args, **keywords):
 		lengthRatio = patternLength/destinationLength
 
 		# match joint chain with the curve
-		startU = float(0)
-		rotationOffset = 360
-		currentJt = rootJt
-		nextJt = cmds.listRelatives(currentJt, c=True, typ='joint', f=True)
-		if stretch:
-			cmds.setAttr(currentJt+".sx", lengthRatio)
+		# the rotations are solved at once by intersecting a circle around each joint with the curve sampled as a polyline,
+		# the next joint is where the circle of radius equal to length of joint meets the curve further along
+		chain = [ rootJt ]
+		j = cmds.listRelatives(rootJt, c=True, typ='joint', f=True)
+		while j:
+			chain.append(j[0])
+			j = cmds.listRelatives(j[0], c=True, typ='joint', f=True)
+		chain2 = []
 		if mirror:
-			currentJt2 = rootJt2
-			nextJt2 = cmds.listRelatives(currentJt2, c=True, typ='joint', f=True)
-			if stretch:
-				cmds.setAttr(currentJt2+".sx", lengthRatio)
-		while nextJt:
-			nextJt = nextJt[0]
-			if mirror:
-				nextJt2 = nextJt2[0]
-
-			# create circle at current joint and of radius equal to length of joint and with 360 sections (=degree)
-			c = cmds.circle(c=cmds.joint(currentJt, q=True, a=True, p=True), nr=(0,0,1), sw=360, s=360, d=3, r=cmds.getAttr(nextJt+".tx")*cmds.getAttr(currentJt+".sx"), ut=False, tol=0.01, ch=False)[0]
-
-			# intersect curve with circle
-			ci = cmds.curveIntersect(patternCurve, c, ud=True, d=(0,0,1), ch=True)
-			p1 = list(cmds.getAttr(ci+".p1")[0])	# intersection points on curve
-			p2 = list(cmds.getAttr(ci+".p2")[0])	# intersection points on circle (equal to degree)
-
-			# clean up
-			cmds.delete(c)
-			cmds.delete(ci)
-
-			# look for the intersection point further along the curve from current joint position (startU)
-			while p1 and min(p1) <= startU:
-				i = p1.index(min(p1))
-				del p1[i]
-				del p2[i]
-
-			if not p1:
-				raise Exception, "can't determine rotation of last joint, pattern curve too short"
-
-			# set rotation of current joint for the choosen intersection point on circle
-			cmds.setAttr(currentJt+".rz", min(p2)-rotationOffset+90)
-			if mirror:
-				cmds.setAttr(currentJt2+".rz", -(min(p2)-rotationOffset+90))
-
-			# prepare for next iteration
-			startU = min(p1)
-			rotationOffset += cmds.getAttr(currentJt+".rz")
-			currentJt = nextJt
-			nextJt = cmds.listRelatives(nextJt, c=True, typ='joint', f=True)
-			if stretch:
-				cmds.setAttr(currentJt+".sx", lengthRatio)
-			if mirror:
-				currentJt2 = nextJt2
-				nextJt2 = cmds.listRelatives(nextJt2, c=True, typ='joint', f=True)
-				if stretch:
-					cmds.setAttr(currentJt2+".sx", lengthRatio)
-				
+			chain2 = [ rootJt2 ]
+			j = cmds.listRelatives(rootJt2, c=True, typ='joint', f=True)
+			while j:
+				chain2.append(j[0])
+				j = cmds.listRelatives(j[0], c=True, typ='joint', f=True)
+
+		if stretch:
+			for j in chain + chain2:
+				cmds.setAttr(j+".sx", lengthRatio)
+
+		lengths = []
+		for i in range(len(chain)-1):
+			lengths.append(cmds.getAttr(chain[i+1]+".tx")*cmds.getAttr(chain[i]+".sx"))
+
+		if lengths:
+			name, cvs, knots, degree, form = __curveData(patternCurve)
+			c = jc.nurbs.curve(cvs, knots, degree, form)
+			params = c.sampleParameters(min(lengths)/20)
+			rotations = jc.geometry.solveChainRotations(p, lengths, [ c.point(u) for u in params ], params, c.minU)
+
+			for i in range(len(rotations)):
+				cmds.setAttr(chain[i]+".rz", rotations[i])
+				if mirror:
+					cmds.setAttr(chain2[i]+".rz", -rotations[i])
+
 		cmds.addAttr(rootJt, sn=__destinationJoint, at="message", h=True)
 		cmds.connectAttr(destinationJoint+".message", rootJt+"."+__destinationJoint)
 		if mirror:
@@ -815,9 +937,8 @@ def createStitch(*args, **keywords):
 
 		if bind:
 			if cmds.attributeQuery(__pattern, n=cmds.listRelatives(patternCurve, s=True, f=True)[0], ex=True):
-				pattern = cmds.listConnections(patternCurve+"."+__pattern)
+				pattern = __linkIndex__().target(patternCurve, __pattern)
 				if pattern:
-					pattern = pattern[0]
 	
 					# bind pattern to stitch
 					ncloth = cmds.ls(cmds.listHistory(pattern), typ="nCloth")
@@ -889,9 +1010,10 @@ def	createWeldConstraint(*args, **keywords):
 	unmirroredCurves = curves
 	borderVertices = []
 
+	links = __linkIndex__()
 	def mirror(x):
-		if cmds.attributeQuery(__locator, n=x, ex=True):
-			return cmds.getAttr(cmds.listConnections(x+"."+__locator)[0]+"."+__mirror)
+		if links.target(x, __locator):
+			return cmds.getAttr(links.target(x, __locator)+"."+__mirror)
 		return False
 	mirroredCurves = filter(mirror, cmds.listRelatives(curves, s=True, f=True))
 	if mirroredCurves:
@@ -978,23 +1100,14 @@ def createPattern(*args, **keywords):
 	# check if the curves are closed or intersecting
 	if curves:
 		if len(curves) > 1:
-			for curve in curves:
-				count = 0
-				for curve1 in curves:
-					if curve == curve1:
-						continue
-					s = cmds.curveIntersect(curve, curve1)
-					if s:
-						count += 1
-					if count > 1:
-						break
-				if count < 1:
-					raise Exception, "the curves are not closed"
+			# 0.001 is the default tolerance of curveIntersect
+			if not jc.geometry.endpointGraph(__curveEnds__(curves), 0.001).isClosed():
+				raise Exception, "the curves are not closed"
 		elif cmds.getAttr(curves[0]+'.form') < 1:
 				raise Exception, "the curve is not closed"
 
 
-	# create NURBS plane
+	# find the plane of the pattern
 
 	bbox = cmds.exactWorldBoundingBox(curves, ii=True)
 
@@ -1038,45 +1151,48 @@ def createPattern(*args, **keywords):
 	elif round(bbox[2],10) == round(bbox[5],10):
 		pivot = [ minW+width/2, minL+length/2, bbox[2] ]
 
-	planeNURBS = cmds.nurbsPlane(p=pivot, ax=axis, w=width, lr=1, d=3, u=math.ceil(width*resolution), v=math.ceil(length*resolution), ch=0)
-	bbox1 = cmds.exactWorldBoundingBox(planeNURBS)
-
-	# project curves onto NURBS plane
+	# the boundary of the pattern in the plane, in anti-clockwise order looking against the axis
+	# (the grid is laid in the coordinates (a, b) where a, b and the axis are right-handed, so that the faces point along the axis as the NURBS plane did)
+	a, b = { 0:(1, 2), 1:(2, 0), 2:(0, 1) }[axis.index(1)]
+	spacing = 1.0/resolution
+	boundary = __patternBoundary__(curves, a, b, spacing)
 
-	projectCurves = []
-	for curve in curves:
-		try:
-			s = cmds.projectCurve(curve, planeNURBS, ch=False, rn=False, un=False, tol=0.01)
-			projectCurves = projectCurves + s
-		except:
-			continue
-	if not projectCurves:
-		raise Exception, "fail to project curves"
-
-	# find uv position of locator within the NURBS plane
-	
-	lowerLeft = cmds.pointOnSurface(planeNURBS, p=True, u=0, v=0)
-	upperRight = cmds.pointOnSurface(planeNURBS, p=True, u=1, v=1)
 	p = cmds.pointPosition(locator, w=True)
-	u = (p[0] - lowerLeft[0])/(upperRight[0] - lowerLeft[0])
-	v = (p[1] - lowerLeft[1])/(upperRight[1] - lowerLeft[1])
-	if u < 0 or u > 1 or v < 0 or v > 1:
-		raise Exception, "locator falls outside the NURBS plane"
-
-	# trim, convert into polygon and delete NURBS plane
-
-	cmds.trim(planeNURBS, projectCurves, ch=0, o=1, rpo=1, lu=u, lv=v)
-	pattern = cmds.nurbsToPoly(planeNURBS, mnd=1, ch=0, f=2, pt=1, pc=200, chr=0.1, ft=0.01, mel=0.001, d=0.1, ut=3, un=1, vt=3, vn=1, uch=0, ucr=0, cht=0.01, es=0, ntr=0, mrt=0, uss=1)[0]
-	bbox2 = cmds.exactWorldBoundingBox(pattern)
-	cmds.delete(planeNURBS)
-
-	if abs(bbox1[0]-bbox2[0]) < 0.01 and \
-		abs(bbox1[1]-bbox2[1]) < 0.01 and \
-		abs(bbox1[2]-bbox2[2]) < 0.01 and \
-		abs(bbox1[3]-bbox2[3]) < 0.01 and \
-		abs(bbox1[4]-bbox2[4]) < 0.01 and \
-		abs(bbox1[5]-bbox2[5]) < 0.01:
-		raise Exception, "fail to create pattern due to trimming, check curves, or adjust their positions in space"
+	if not __insidePolygon((p[a], p[b]), boundary):
+		raise Exception, "locator falls outside the pattern"
+
+	# mesh the inside of the boundary by squares of size 1/resolution, UV as it was on the NURBS plane
+	points, faces = jc.mesher.planarMesh(boundary, spacing)
+	if not faces:
+		raise Exception, "fail to create pattern, check curves, or adjust their positions in space"
+	w, l = { 0:(2, 1), 1:(0, 2), 2:(0, 1) }[axis.index(1)]
+	level = bbox[axis.index(1)]
+	vertexArray = om.MFloatPointArray()
+	uArray = []
+	vArray = []
+	for x, y in points:
+		q = [ level, level, level ]
+		q[a] = x
+		q[b] = y
+		vertexArray.append(om.MFloatPoint(q[0], q[1], q[2]))
+		uArray.append((q[w] - (pivot[w]-width/2)) / width)
+		vArray.append((q[l] - (pivot[l]-length/2)) / length)
+
+	util = om.MScriptUtil()
+	counts = om.MIntArray()
+	util.createIntArrayFromList([ len(f) for f in faces ], counts)
+	connects = om.MIntArray()
+	util.createIntArrayFromList([ i for f in faces for i in f ], connects)
+	us = om.MFloatArray()
+	util.createFloatArrayFromList(uArray, us)
+	vs = om.MFloatArray()
+	util.createFloatArrayFromList(vArray, vs)
+
+	meshFn = om.MFnMesh()
+	obj = meshFn.create(len(points), len(faces), vertexArray, counts, connects, us, vs)
+	meshFn.assignUVs(counts, connects)
+	pattern = om.MFnDagNode(obj).partialPathName()
+	cmds.sets(pattern, e=True, forceElement="initialShadingGroup")
 
 	if reverseNormal:
 		cmds.polyNormal(pattern, nm=4, ch=False)
@@ -1095,9 +1211,8 @@ def createPattern(*args, **keywords):
 		pattern = s
 
 		# mirror locator only if it doesn't exist and locator is on the left (not in the middle)
-		plugs = cmds.listConnections(locator+".message", t='locator', p=True)
 		p = cmds.pointPosition(locator, w=True)
-		if (not plugs or __locator not in plugs[0]) and round(p[0],10) > 0:
+		if not __linkIndex__().linked(locator, __locator, "locator") and round(p[0],10) > 0:
 			locatorRt = cmds.listRelatives(cmds.duplicate(locator, n=cmds.listRelatives(locator, p=True)[0].replace('Lf','Rt'))[0], s=True)[0]
 			cmds.move(-p[0], p[1], p[2], locatorRt, a=True, ws=True)
 			cmds.addAttr(locatorRt, sn=__locator, at="message", h=True)
@@ -1396,34 +1511,37 @@ def matchUVScale():
 def __updateNClothAttribute(vertices, attribute, value):
 # usage: select one cloth polygon object
 
+	__updateNClothAttributes(vertices, { attribute: value })
+
+
+def __updateNClothAttributes(vertices, values):
+# usage: select one cloth polygon object
+#	vertices: vertex components, flattened or not, or their indices
+#	values: dictionary of attribute and value, which is a number or a list of numbers in the order of vertex indices
+# each per-vertex map is read and written once by setAttr with the whole array, instead of a mel command holding every value as text
+
 	pattern = cmds.ls(sl=True)
 	if pattern:
 		ncloth = jc.helper.findTypeInHistory( pattern[0], "nCloth", True, True )
 		if ncloth:
 			attrDict = __nClothAttributes()
-			if attribute in attrDict:
-				perVertAttr = attrDict[attribute][0]
-				mapType = attrDict[attribute][1]
-
-				if cmds.attributeQuery(perVertAttr, node=ncloth, ex=True):
-					cmds.setAttr(ncloth+"."+mapType, 1)
-					vals = cmds.getAttr(ncloth+"."+perVertAttr)
-					if not vals:
-						raise Exception, "fails to get "+perVertAttr+" for "+ncloth
-
-					indexReg = re.compile("\[([0-9]+)\]")
-					for v in vertices:
-						m = indexReg.search(v)
-						if m:
-							i = int(m.group(1))
-							if i < len(vals):
-								vals[i] = value
-
-					c = "setAttr \"" + ncloth + "."+perVertAttr+"\" -type \"doubleArray\" " + str(len(vals))
-					for v in vals:
-						c += " " + str(v)
-					c += ";"
-					mel.eval(c)
+			indices = None
+			for attribute, value in values.iteritems():
+				if attribute in attrDict:
+					perVertAttr = attrDict[attribute][0]
+					mapType = attrDict[attribute][1]
+
+					if cmds.attributeQuery(perVertAttr, node=ncloth, ex=True):
+						cmds.setAttr(ncloth+"."+mapType, 1)
+						vals = cmds.getAttr(ncloth+"."+perVertAttr)
+						if not vals:
+							raise Exception, "fails to get "+perVertAttr+" for "+ncloth
+
+						if indices == None:
+							indices = vertices
+							if vertices and not isinstance(vertices[0], int):
+								indices = jc.weights.componentIndices(vertices)
+						cmds.setAttr(ncloth+"."+perVertAttr, jc.weights.mergeMap(vals, indices, value), type="doubleArray")
 
 
 def updateNClothAttribute(attribute, defaultValue=0, borderValue=1):
@@ -1506,45 +1624,38 @@ def setKeyframes(*args, **keywords):
 		opt = setKeyframesOptions()
 			
 		if opt[0] in setKeyframesFor:
-			currentTime = cmds.currentTime(q=True)
+			# the keys of the joints at stitchStartTime and stitchEndTime and of the blend attributes are written together,
+			# each animation curve gets all its keys at once
+			keys = jc.keys.keyTable()
 	
+			links = __linkIndex__()
 			joints = cmds.ls(cmds.listHistory(g), typ='joint', fl=True)
 			if joints:
 				for j in joints:
-					if cmds.attributeQuery(__destinationJoint, n=j, ex=True):
-						destJoint = cmds.listConnections(j+"."+__destinationJoint)
-						if destJoint:
-							destJoint = destJoint[0]
-							#weights = __disableConstraints(j)
+					destJoint = links.target(j, __destinationJoint)
+					if destJoint:
+						#weights = __disableConstraints(j)
 		
-							# animate the stitch on pattern
-							cmds.currentTime(stitchStartTime, u=True)
-							cmds.select(j, r=True)
-							keyJoints(True)
-
-							twistRoot = 0
-							twistRoot = cmds.getAttr(cmds.listConnections(j+"."+__patternCurve)[0]+"."+__twistRootLeft)
-							if cmds.xform(j, q=True, ws=True, rp=True)[0] < 0:
-								twistRoot = cmds.getAttr(cmds.listConnections(j+"."+__patternCurve)[0]+"."+__twistRootRight)
+						# animate the stitch on pattern
+						cmds.select(j, r=True)
+						keyJoints(True, stitchStartTime, keys)
+
+						twistRoot = 0
+						twistRoot = cmds.getAttr(links.target(j, __patternCurve)+"."+__twistRootLeft)
+						if cmds.xform(j, q=True, ws=True, rp=True)[0] < 0:
+							twistRoot = cmds.getAttr(links.target(j, __patternCurve)+"."+__twistRootRight)
 	
-							cmds.select(j, r=True)
-							matchJoints(stitchStartTime, stitchEndTime, twistRoot)
-
-							cmds.currentTime(currentTime, u=True)
+						cmds.select(j, r=True)
+						matchJoints(stitchStartTime, stitchEndTime, twistRoot, keys)
 		
-							#__restoreConstraints(j, weights)
+						#__restoreConstraints(j, weights)
 		
-							# set keyframes for all blend attributes
-							for s in cmds.attributeInfo(j, all=True):
-								if "blend" in s:
-									currentTime = cmds.currentTime(q=True)
-									cmds.currentTime(stitchStartTime + (stitchEndTime - stitchStartTime)*0.9, u=False)
-									cmds.setAttr(j+"."+s, 1)
-									cmds.setKeyframe(j, at=s)
-									cmds.currentTime(stitchEndTime, u=False)
-									cmds.setAttr(j+"."+s, 0)
-									cmds.setKeyframe(j, at=s)
-									cmds.currentTime(currentTime, u=True)
+						# set keyframes for all blend attributes
+						for s in cmds.attributeInfo(j, all=True):
+							if "blend" in s:
+								keys.addBlend(j, s, stitchStartTime, stitchEndTime)
+
+			__writeKeys__(keys)
 
 		if opt[1] in setKeyframesFor and ncloth:
 			constraints = cmds.ls(cmds.listHistory(ncloth, f=True), typ="dynamicConstraint", fl=True)
@@ -1630,14 +1741,9 @@ def	attachAdjacentStitches(*args, **keywords):
 		mel.eval("warning \"no keyframe has been set on "+o+"\"")
 		return
 	
-	currentTime = cmds.currentTime(q=True)
-	cmds.currentTime(stitchStartTime + (stitchEndTime - stitchStartTime)*0.9, u=False)
-	cmds.setAttr(o+".blendPoint1", 1)
-	cmds.setKeyframe(o, at="blendPoint1")
-	cmds.currentTime(stitchEndTime, u=False)
-	cmds.setAttr(o+".blendPoint1", 0)
-	cmds.setKeyframe(o, at="blendPoint1")
-	cmds.currentTime(currentTime, u=True)
+	blends = jc.keys.keyTable()
+	blends.addBlend(o, "blendPoint1", stitchStartTime, stitchEndTime)
+	__writeKeys__(blends)
 
 	if ncloth:
 		cmds.setAttr(ncloth[0]+".isd", isd)
@@ -1666,9 +1772,10 @@ def	deleteGarment(*args):
 		if sk:
 			joints = cmds.ls(cmds.listHistory(sk), typ="joint", fl=True)
 			cmds.skinCluster(g, e=True, ub=True)
+			links = __linkIndex__()
 			for j in joints:
 				if cmds.objExists(j) and cmds.attributeQuery(__destinationJoint, n=j, ex=True):
-					c = cmds.listConnections(j+"."+__destinationJoint)
+					c = links.target(j, __destinationJoint)
 					if c:
 						cmds.delete(c)
 					cmds.delete(j)
@@ -1697,6 +1804,7 @@ def	duplicateGarment(*args, **keywords):
 
 	constraintSet = set([])
 	newNCloth = {}
+	attributes = {}		# snapshot of the attributes of the nCloth objects
 
 	for garment in meshes:
 
@@ -1753,8 +1861,8 @@ def	duplicateGarment(*args, **keywords):
 		# assign rest shape to the new ncloth
 		cmds.connectAttr(restShape+".worldMesh", ncloth+".restShapeMesh", force=True)
 
-		# copy attributes (copyAttr doesn't work for nCloth)
-		for a in [ 
+		# copy attributes (copyAttr doesn't work for nCloth), they're set on all new nCloth objects at once below
+		attributes.update(jc.helper.getAttributes([ nc ], [ 
 			#"pfc",
 			"srl", "thss", "boce", "fron", "stck", "adng", "cofl", "scfl", "msci", "mxit", \
 			"pmss", "rlsc", "cold", "scld", "cll", "wsdi", "wsds", "apds", "apvy", "pou", \
@@ -1763,9 +1871,7 @@ def	duplicateGarment(*args, **keywords):
 			#"imat",
 			"iadm", "wms", "basc", "stlk", "aclk", "sdmp", "scws", "scpu", "stpc", "pres", \
 			"stpe", "incm", "prdg", "pure", "aits", "shol", "igsg", "igsw", "wssh", "lft", \
-			"drg", "tdrg" ]:
-			if cmds.attributeQuery(a, node=nc, ex=True):
-				cmds.setAttr(ncloth+"."+a, cmds.getAttr(nc+"."+a))
+			"drg", "tdrg" ]))
 
 		for a in ["inputAttractMap", "thicknessMap", "bounceMap", "frictionMap", \
 					"stickinessMap", "massMap", "stretchMap", "bendMap", \
@@ -1795,6 +1901,8 @@ def	duplicateGarment(*args, **keywords):
 			cmds.connectAttr(f+'.outRotate', t+'.rotate')
 			cmds.editDisplayLayerMembers('defaultLayer', t)
 
+	jc.helper.setAttributes(attributes, newNCloth)
+
 	# duplicate constraints
 
 	for c in list(constraintSet):
@@ -1819,48 +1927,37 @@ def	duplicateGarment(*args, **keywords):
 		cmds.connectAttr(constraint[0]+".evalStart[0]", solver+".inputStart["+str(j)+"]")
 
 
-def __vertexSequence(vertices, edge):
-# 'vertices' is a list of ordered vertices along a continuous edge
-# 'edge' contains only one edge in which there are only two vertices
-# compare these two vertices with starting and ending vertices of 'vertices'
-# if any comparison succeeds, 'edge' would extend the continuous edge
-# and the extra vertex would be put in front of or at the back of 'vertices'
-	v = cmds.ls(cmds.polyListComponentConversion(edge, tv=True), fl=True)
-	if not vertices:
-		for i in v:
-			vertices.append(i)
-	elif vertices[0] == v[0]:
-		vertices.insert(0,v[1])
-	elif vertices[0] == v[1]:
-		vertices.insert(0,v[0])
-	elif vertices[-1] == v[0]:
-		vertices.append(v[1])
-	elif vertices[-1] == v[1]:
-		vertices.append(v[0])
-
-
-def __findContinuousEdge(vertices, edges):
-# find one continous edge from 'edges' and put it into 'vertices'
-# return the remaining edges outside the continuous edge
-	prevEdges = []
-	nextEdges = edges
-	while set(prevEdges) != set(nextEdges):
-		prevEdges = nextEdges
-		nextEdges = []
-		for e in prevEdges:
-			prevVertices = copy.copy(vertices)
-			__vertexSequence(vertices, e)
-			if prevVertices == vertices:
-				nextEdges.append(e)
-	return nextEdges
+def __findAllContinuousEdges(edges):
+# 'edges' is a list of edge components
+# return: list of continuous edges, each of which is a list of ordered vertices
+# the edge-vertex pairs are queried once for each object and chained up by jc.geometry.edgeChains()
 
+	indexReg = re.compile("\[([0-9]+)\]")
+	infoReg = re.compile("EDGE\s+([0-9]+):\s+([0-9]+)\s+([0-9]+)")
+
+	objects = []
+	objectEdges = {}
+	for e in edges:
+		o = e.split('.')[0]
+		if o not in objectEdges:
+			objects.append(o)
+			objectEdges[o] = []
+		objectEdges[o].append(e)
 
-def __findAllContinuousEdges(edges):
 	continuousEdges = []
-	while edges:
-		vertices = []
-		edges = __findContinuousEdge(vertices, edges)
-		continuousEdges.append(vertices)
+	for o in objects:
+		pairs = {}
+		for info in cmds.polyInfo(objectEdges[o], ev=True):
+			m = infoReg.search(info)
+			if m:
+				pairs[int(m.group(1))] = (int(m.group(2)), int(m.group(3)))
+		l = []
+		for e in objectEdges[o]:
+			m = indexReg.search(e)
+			if m and int(m.group(1)) in pairs:
+				l.append(pairs[int(m.group(1))])
+		for chain in jc.geometry.edgeChains(l):
+			continuousEdges.append([ o+".vtx["+str(v)+"]" for v in chain ])
 	return continuousEdges
 
 
@@ -2061,6 +2158,139 @@ def	deleteGroupConstraint():
 			cmds.delete(s)
 
 
+def	__groupStitches__(locator, joints, rightJoints=None):
+# parent stitch joints to the pattern locator, those on the right to the mirrored locator
+	cmds.parent(joints, locator)
+	if rightJoints:
+		cmds.parent(rightJoints, cmds.listConnections(cmds.listRelatives(locator, s=True, f=True)[0], t='locator')[0])
+
+
+def	__placePattern__(locator, curves, destinations, passiveCollider, reverseNormal, timeOrigin, stitchStartTime):
+# key the pattern locator where it is at timeOrigin, and moved to the destination curves of its stitches at stitchStartTime,
+# unless it's been keyed at stitchStartTime already (eg. by the last build)
+#	curves: pattern curves
+#	reverseNormal: "True" or "False" as the option of the pattern
+
+	# check to see if there's keyframe at ty for time = stitchStartTime
+	n = cmds.listConnections(locator+'.ty', t='animCurveTL')
+	if n:
+		size = cmds.getAttr(n[0]+".ktv", s=True)
+		if size > 0:
+			for t,v in cmds.getAttr(n[0]+".ktv[:"+str(size-1)+"]"):
+				if t == float(stitchStartTime):
+					return
+
+	# bounding boxes of the pattern and its destination curves are used to calculate the y and x displacements of the locator
+	bbx1 = cmds.exactWorldBoundingBox(curves)
+	bbx2 = cmds.exactWorldBoundingBox(destinations)
+
+	# bounding box of the passive collider is used to calculate the horizontal (x, z) displacement of the stitch groups
+	bbx3 = cmds.exactWorldBoundingBox(passiveCollider)
+
+	moves = []
+	moves.append(((bbx2[4]+bbx2[1])/2-(bbx1[4]+bbx1[1])/2, { 'r':True, 'y':True }))
+
+	# move locator depending on its placement dedeuced from reverse normal
+	if reverseNormal == "False":
+		moves.append((bbx3[5]+abs(bbx3[5]-bbx3[2])/2, { 'a':True, 'z':True }))
+	elif reverseNormal == "True":
+		moves.append((bbx3[2]-abs(bbx3[5]-bbx3[2])/2, { 'a':True, 'z':True }))
+
+	if round(bbx1[0],10) > 0:
+		moves.append(((bbx2[3]+bbx2[0])/2-(bbx1[3]+bbx1[0])/2, { 'r':True, 'x':True }))
+
+	attributes = [ "tx", "ty", "tz", "rx", "ry", "rz" ]
+	before = list(cmds.getAttr(locator+".t")[0]) + list(cmds.getAttr(locator+".r")[0])
+	for d, flags in moves:
+		cmds.move(d, locator, **flags)
+	after = list(cmds.getAttr(locator+".t")[0]) + list(cmds.getAttr(locator+".r")[0])
+
+	keys = jc.keys.keyTable()
+	for a, v0, v1 in zip(attributes, before, after):
+		keys.add(locator, a, timeOrigin, v0)
+		keys.add(locator, a, stitchStartTime, v1)
+	__writeKeys__(keys)
+
+
+def	__constrainToAttachable__(attachable, *curves):
+# point-to-surface constraint of the curves to the passive collider or the garment having the attachable
+
+	mesh = None
+	if cmds.ls(cmds.listHistory(attachable, f=True), typ='nRigid'):
+		mesh = attachable
+	else:
+		c = cmds.ls(cmds.listHistory(attachable, f=True), typ='nurbsCurve')
+		if c:
+			m = cmds.ls(cmds.listHistory(c), typ='transform')
+			if m:
+				m = list(set(m))
+				if cmds.ls(cmds.listHistory(m), typ='nCloth'):
+					mesh = m[0]
+	if mesh:
+		createWeldConstraint(mesh, *curves)
+
+
+def	__fingerprint__(node):
+# return: state of an object read by a garment build step, CVs in world space for a curve, world matrix otherwise
+	if cmds.listRelatives(node, s=True, typ='nurbsCurve'):
+		return repr(cmds.xform(node+".cv[*]", q=True, ws=True, t=True))
+	return repr(cmds.xform(node, q=True, ws=True, m=True))
+
+
+def	__exists__(result):
+# return: whether all nodes in the result of a garment build step are still in the scene
+	if isinstance(result, (types.ListType, types.TupleType)):
+		for r in result:
+			if not __exists__(r):
+				return False
+		return True
+	if isinstance(result, types.StringTypes):
+		return cmds.objExists(result)
+	return True
+
+
+def	__buildPlan__(plan, options, verbose=False):
+# run the build plan of a garment
+#	options: globals of the garment
+#	verbose: whether to print the timings of the steps
+# The scheduler of a garment is kept by its passive collider until another scene is opened, so that building it again
+# runs only the steps whose inputs have changed, or resumes from the step failed last time.
+# return: scheduler having the timings of the steps
+
+	passiveCollider = options['passiveCollider']
+	solver = cmds.ls(cmds.listHistory(passiveCollider, f=True), typ='nucleus')
+	if not solver:
+		raise Exception, 'Fail to find nucleus node from passive collider: '+passiveCollider
+	mel.eval("getActiveNucleusNode(true, false);")
+	mel.eval("setActiveNucleusNode(\""+solver[0]+"\");")
+
+	__installCallbacks__()
+	if passiveCollider not in __garmentSchedulers:
+		__garmentSchedulers[passiveCollider] = jc.plan.scheduler(__fingerprint__, __exists__)
+	scheduler = __garmentSchedulers[passiveCollider]
+
+	turnOffUndo = options['turnOffUndo'] == "True"
+	stitchStartTime = int(options['stitchStartTime'])
+	undoState = cmds.undoInfo(q=True, state=True)
+	if turnOffUndo: cmds.undoInfo(state=False)
+	autoKeyframeState = cmds.autoKeyframe(q=True, state=True)
+	cmds.autoKeyframe(state=False)
+	try:
+		cmds.currentTime(int(options['timeOrigin']))
+		scheduler.run(plan)
+		if "keyframes" in plan.steps:
+			cmds.currentTime(stitchStartTime)
+	finally:
+		if turnOffUndo: cmds.undoInfo(state=undoState)
+		cmds.autoKeyframe(state=autoKeyframeState)
+		solver = mel.eval('getActiveNucleusNode(true, false);')
+		if cmds.objExists(solver) and cmds.getAttr(solver+'.startFrame') > stitchStartTime:
+			cmds.setAttr(solver+'.startFrame', stitchStartTime)
+		if verbose:
+			print scheduler.report()
+	return scheduler
+
+
 class	pattern:
 	serial = 0
 
@@ -2289,13 +2519,28 @@ class	garment:
 			raise Exception, "no selection or selection invalid"
 
 
-	def	generateScript(self):
+	def	compilePlan(self):
+	# return: build plan (jc.plan.buildPlan) of the garment
+	# The steps are:
+	#	pattern:<locator>		createPattern
+	#	garment:<layout>		createGarment
+	#	buttons:<layout>		attachButtons
+	#	rebuildUV				rebuildUV of all garments
+	#	stitch:<destination>	createStitch
+	#	weld:<i>, weld:<i>:<j>	createWeldConstraint within subgarment i and between subgarments i and j
+	#	constraint:<name>		point-to-surface constraint of a subgarment (eg. pockets)
+	#	group:<locator>			parent stitch joints to pattern locator
+	#	place:<locator>			key pattern locator at timeOrigin and moved to its destination at stitchStartTime, unless it's keyed already
+	#	keyframes				setKeyframes of all garments
+	#	attach<n>				attachAdjacentStitches
+	# The steps depend only on the garment, not on the state of the scene, so that the plan is the same when it's built again.
+
 		def validName(s): return s.replace('|','').replace(':','')
-	
-		def	delimited(s): return "["+s+"]"
 
 		def add(x,y): return x+y
 
+		def	isTrue(s): return s == "True"
+
 		if not self.globals['passiveCollider']:
 			raise Exception, "missing passive collider"
 		elif not self.subgarments:
@@ -2305,42 +2550,20 @@ class	garment:
 		elif not self.stitches:
 			raise Exception, "missing stitches"
 
-		script  = "import traceback, sys\nimport maya.cmds as cmds\nimport maya.mel as mel\n\n"
-		script += "turnOffUndo = "+self.globals['turnOffUndo']+"\n"
-		script += "attachStitches = "+self.globals['attachStitches']+"\n"
-		script += "rebuildUV = "+self.globals['rebuildUV']+"\n"
-		script += "rebuildDestinationCurve = "+self.globals['rebuildDestinationCurve']+"\n"
-		script += "resolution = "+self.globals['resolution']+"\n"
-		script += "timeOrigin = "+self.globals['timeOrigin']+"\n"
-		script += "stitchStartTime = "+self.globals['stitchStartTime']+"\n"
-		script += "stitchEndTime = "+self.globals['stitchEndTime']+"\n"
-		script += "turnOnConstraintsTime = "+self.globals['turnOnConstraintsTime']+"\n"
-		script += "turnOffInputMeshAttractTime = "+self.globals['turnOffInputMeshAttractTime']+"\n"
-		script += "passiveCollider = '"+self.globals['passiveCollider']+"'\n"
-		script += "solver = cmds.ls(cmds.listHistory(passiveCollider, f=True), typ='nucleus')\n"
-		script += "if not solver:\n"
-		script += "\traise Exception, 'Fail to find nucleus node from passive collider: '+passiveCollider\n"
-		script += "mel.eval(\"getActiveNucleusNode(true, false);\")\n"
-		script += "mel.eval(\"setActiveNucleusNode(\\\"\"+solver[0]+\"\\\");\")\n"
-
-
-		script += "\n\n"
-
-		script += "undoState = cmds.undoInfo(q=True, state=True)\n"
-		script += "if turnOffUndo: cmds.undoInfo(state=False)\n\n"
-		script += "autoKeyframeState = cmds.autoKeyframe(q=True, state=True)\n"
-		script += "cmds.autoKeyframe(state=False)\n"
-		script += "try:\n"
-		script += "\tgarments = []\n"
-		script += "\tcmds.currentTime(timeOrigin)\n"
-
-		group = ""			# script to group stitches
+		timeOrigin = int(self.globals['timeOrigin'])
+		stitchStartTime = int(self.globals['stitchStartTime'])
+		stitchEndTime = int(self.globals['stitchEndTime'])
+		turnOnConstraintsTime = int(self.globals['turnOnConstraintsTime'])
+		turnOffInputMeshAttractTime = int(self.globals['turnOffInputMeshAttractTime'])
+
+		plan = jc.plan.buildPlan()
+		garments = []		# outputs of createGarment
+		groups = []			# arguments of steps to group stitches
+		places = []			# arguments of steps to place patterns
 		pcurves = []		# all pattern curves
 		scurves = []		# all stitch curves
 		mirrored = []		# all mirrored pattern curves
-		keyframe0 = ""	# script to set keyframe for generated stitch groups at time=timeOrigin
-		keyframe1 = ""	# script to set keyframe for generated stitch groups at time=stitchStartTime
-		attach = ""			# script to attach adjacent stitches
+		attachables = []	# pairs of (curve, side) of adjacent stitches, side is None for unmirrored patterns
 
 		# validity check
 
@@ -2359,161 +2582,80 @@ class	garment:
 		if objs:
 			raise Exception, "some objects are not present: "+", ".join(objs)
 
-		if not int(self.globals['timeOrigin']) < int(self.globals['stitchStartTime']) < int(self.globals['stitchEndTime']) < int(self.globals['turnOnConstraintsTime']) < int(self.globals['turnOffInputMeshAttractTime']):
+		if not timeOrigin < stitchStartTime < stitchEndTime < turnOnConstraintsTime < turnOffInputMeshAttractTime:
 			raise Exception, "invalid time options"
 
+		# joints of stitch curve c, where stitches are found by createStitch
+		def	stitchJoints(c):
+			for s in self.stitches:
+				if c in s.curves:
+					return jc.plan.output("stitch:"+s.destination)[s.curves.index(c)+1]
+
 
 		# loop over subgarments, patterns and stitches
 
 		for sg in self.subgarments:
+			patterns = []
 			for p in sg.patterns:
 				if p.mirror == "True":
 					mirrored += p.curves
 
-				script += "\t"+validName(p.locator)+" = jc.clothes.createPattern('"+p.locator+"', "
-				script += "'"+"', '".join(p.curves)+"', "
-
-				# check to see if there's keyframe at ty for time = stitchStartTime
-				keyTY = False
-				n = cmds.listConnections(p.locator+'.ty', t='animCurveTL')
-				if n:
-					size = cmds.getAttr(n[0]+".ktv", s=True)
-					if size > 0:
-						for t,v in cmds.getAttr(n[0]+".ktv[:"+str(size-1)+"]"):
-							if t == float(self.globals['stitchStartTime']):
-								keyTY = True
-
-				if not keyTY:
-					# write scripts into keyframe0, keyframe1
-
-					bbx1 = cmds.exactWorldBoundingBox(p.curves)
-
-					# find destination curves of current pattern and hence their bounding box
-					# which is used to calculate the y and x displacements of the pattern locator
-					destinations = []
-					for s in self.stitches:
-						for c in s.curves:
-							if c in p.curves:
-								destinations.append(s.destination)
-								break
-					if not destinations:
-						continue
-					bbx2 = cmds.exactWorldBoundingBox(destinations)
-
-					# bounding box of the passive collider is used to calculate the horizontal (x, z) displacement of the stitch groups
-					bbx3 = cmds.exactWorldBoundingBox(self.globals['passiveCollider'])
-
-					keyframe1 += "\tcmds.move("+str((bbx2[4]+bbx2[1])/2-(bbx1[4]+bbx1[1])/2)+", '"+p.locator+"', r=True, y=True)\n"
-
-					# move locator depending on its placement dedeuced from reverse normal
-					if p.reverseNormal == "False":
-						keyframe1 += "\tcmds.move("+str(bbx3[5]+abs(bbx3[5]-bbx3[2])/2)+", '"+p.locator+"', a=True, z=True)\n"
-					elif p.reverseNormal == "True":
-						keyframe1 += "\tcmds.move("+str(bbx3[2]-abs(bbx3[5]-bbx3[2])/2)+", '"+p.locator+"', a=True, z=True)\n"
-
-					if round(bbx1[0],10) > 0:
-						keyframe1 += "\tcmds.move("+str((bbx2[3]+bbx2[0])/2-(bbx1[3]+bbx1[0])/2)+", '"+p.locator+"', r=True, x=True)\n"
-
-					keyframe0 += "\tcmds.setKeyframe('"+p.locator+"', at='t')\n"
-					keyframe0 += "\tcmds.setKeyframe('"+p.locator+"', at='r')\n"
-
-					keyframe1 += "\tcmds.setKeyframe('"+p.locator+"', at='t')\n"
-					keyframe1 += "\tcmds.setKeyframe('"+p.locator+"', at='r')\n"
-
-				side = ""
-				if p.mirror == "True" and round(cmds.xform(p.locator, q=True, ws=True, rp=True)[0], 10) > 0:
-					side = "[0]"	# left
-				def f(x): return x in scurves
-				stitchOnlyCurves = filter(f, p.curves)
-				if stitchOnlyCurves:
-					group  += "\tcmds.parent("+(side+", ").join(map(delimited, stitchOnlyCurves))+side+", '"+p.locator+"')\n"
-					if side:
-						side = "[1]"	#right
-						group += "\tcmds.parent("+(side+", ").join(map(delimited, stitchOnlyCurves))+side+", cmds.listConnections(cmds.listRelatives('"+p.locator+"', s=True, f=True)[0], t='locator')[0])\n"
-
-				script += "mirror="+p.mirror+", "
-				if self.globals['useGlobalResolution'] == "True":
-					script += "resolution=resolution, "
-				else:
-					script += "resolution="+p.resolution+", "
-				script += "reverseNormal="+p.reverseNormal
-				script += ")\n"
-
-				# find all possible attachments
-				# find all attachable pairs from p.curves
-				attachables = []
-				tolerance = 0.01
-				dist = cmds.distanceDimension(sp=[0,0,0], ep=[1,1,1])
-				sp = cmds.listConnections(dist+".sp")[0]
-				ep = cmds.listConnections(dist+".ep")[0]
+				resolution = float(self.globals['resolution'])
+				if self.globals['useGlobalResolution'] != "True":
+					resolution = float(p.resolution)
+				patterns.append(plan.add("pattern:"+p.locator, createPattern, [ p.locator ]+p.curves,
+					{ 'mirror':isTrue(p.mirror), 'resolution':resolution, 'reverseNormal':isTrue(p.reverseNormal) },
+					sources=p.curves, transient=True))
 
 				def f(x): return x in scurves
 				stitchOnlyCurves = filter(f, p.curves)
 
-				for i in range(0,len(stitchOnlyCurves)):
-					for j in range(i+1,len(stitchOnlyCurves)):
-						# see if stitchOnlyCurves[i] and stitchOnlyCurves[j] are attachable (ie. if their end points are within tolerance)
-						ia = cmds.pointOnCurve(stitchOnlyCurves[i], p=True, top=False, pr=cmds.getAttr(stitchOnlyCurves[i]+".min"))
-						ib = cmds.pointOnCurve(stitchOnlyCurves[i], p=True, top=False, pr=cmds.getAttr(stitchOnlyCurves[i]+".max"))
-						ja = cmds.pointOnCurve(stitchOnlyCurves[j], p=True, top=False, pr=cmds.getAttr(stitchOnlyCurves[j]+".min"))
-						jb = cmds.pointOnCurve(stitchOnlyCurves[j], p=True, top=False, pr=cmds.getAttr(stitchOnlyCurves[j]+".max"))
-						pair = []
-
-						cmds.move(ib[0], ib[1], ib[2], sp, a=True)
-						cmds.move(ja[0], ja[1], ja[2], ep, a=True)
-						if cmds.getAttr(dist+".distance") < tolerance:
-							pair = [stitchOnlyCurves[i], stitchOnlyCurves[j]]
-						else:
-							cmds.move(jb[0], jb[1], jb[2], sp, a=True)
-							cmds.move(ia[0], ia[1], ia[2], ep, a=True)
-							if cmds.getAttr(dist+".distance") < tolerance:
-								pair = [stitchOnlyCurves[j], stitchOnlyCurves[i]]
-
-						if pair:
-							if p.mirror == "False":
-								attachables.append(map(delimited, pair))
-							else:
-								# temporarily assume both stitches are mirrored
-								attachables.append([delimited(pair[0])+"[0]", delimited(pair[1])+"[0]"])
-								attachables.append([delimited(pair[0])+"[1]", delimited(pair[1])+"[1]"])
+				# find destination curves of current pattern, the pattern locator is moved to them
+				destinations = []
+				for s in self.stitches:
+					for c in s.curves:
+						if c in p.curves:
+							destinations.append(s.destination)
+							break
+				if destinations:
+					places.append((p.locator, p.curves, destinations, self.globals['passiveCollider'], p.reverseNormal, timeOrigin, stitchStartTime))
 
-				cmds.delete(cmds.listRelatives(dist, p=True, f=True))
-				cmds.delete(sp)
-				cmds.delete(ep)
+				if stitchOnlyCurves:
+					if p.mirror == "True" and round(cmds.xform(p.locator, q=True, ws=True, rp=True)[0], 10) > 0:
+						# left and right
+						groups.append((p.locator, [ stitchJoints(c)[0] for c in stitchOnlyCurves ], [ stitchJoints(c)[1] for c in stitchOnlyCurves ]))
+					else:
+						groups.append((p.locator, [ stitchJoints(c) for c in stitchOnlyCurves ]))
 
-				# generate attach statements with pairs of curves
-				for pair in attachables:
-					attach += "\t\tjc.clothes.attachAdjacentStitches("+pair[0]+", "+pair[1]+", stitchStartTime=stitchStartTime, stitchEndTime=stitchEndTime)\n"
+				# find all possible attachments
+				# curves are attachable if the end of one is within tolerance of the start of the other
+				graph = jc.geometry.endpointGraph(__curveEnds__(stitchOnlyCurves), 0.01)
+				for pair in graph.adjacentPairs():
+					if p.mirror == "False":
+						attachables.append(((pair[0], None), (pair[1], None)))
+					else:
+						# temporarily assume both stitches are mirrored
+						attachables.append(((pair[0], 0), (pair[1], 0)))
+						attachables.append(((pair[0], 1), (pair[1], 1)))
 
-			script += "\tgarment = jc.clothes.createGarment("+', '.join([ validName(x.locator) for x in sg.patterns ])+", prefix='"+sg.prefix+"', nClothPreset='"+sg.nClothPreset+"')\n\n"
+			g = plan.add("garment:"+sg.layout, createGarment, patterns, { 'prefix':sg.prefix, 'nClothPreset':sg.nClothPreset })
 			if sg.buttons:
-				script += "\tjc.clothes.attachButtons(garment, '"+"', '".join([ validName(x) for x in sg.buttons ])+"', buttonType='"+buttonOptions()[0]+"')\n\n"
-			script += "\tgarments.append(garment)\n\n"
+				plan.add("buttons:"+sg.layout, attachButtons, [ g ]+[ validName(x) for x in sg.buttons ], { 'buttonType':buttonOptions()[0] })
+			garments.append(g)
 
-		script += "\tif len(garments) > 1 and rebuildUV:\n"
-		script += "\t\tcmds.select(garments, r=True)\n"
-		script += "\t\tjc.clothes.rebuildUV()\n\n"
+		if len(garments) > 1 and self.globals['rebuildUV'] == "True":
+			plan.add("rebuildUV", rebuildUV, garments, after=[ n for n in plan.names if n.startswith("buttons:") ])
 
+		stitches = []
 		for s in self.stitches:
-			script += "\t"+validName(s.destination)+" = jc.clothes.createStitch('"+s.destination+"', "
-			script += "'"+"', '".join(s.curves)+"', "
-			script += "numberOfJoints="+s.numberOfJoints+", "
-			script += "rebuildDestinationCurve="+self.globals['rebuildDestinationCurve']+", "
-			script += "stretch="+s.stretch+", "
-			script += "bind="+s.bind
-			script += ")\n"
-
-			for c in s.curves:
-				group = group.replace(delimited(c), validName(s.destination)+"["+str(s.curves.index(c)+1)+"]")
-				if not not (set(s.curves) - set(mirrored)):
-					attach = attach.replace(delimited(c)+"[0]", validName(s.destination)+"["+str(s.curves.index(c)+1)+"]")
-					attach = attach.replace(delimited(c)+"[1]", validName(s.destination)+"["+str(s.curves.index(c)+1)+"]")
-				attach = attach.replace(delimited(c), validName(s.destination)+"["+str(s.curves.index(c)+1)+"]")
-
-		script += "\n"
+			stitches.append(plan.add("stitch:"+s.destination, createStitch, [ s.destination ]+s.curves,
+				{ 'numberOfJoints':int(s.numberOfJoints), 'rebuildDestinationCurve':isTrue(self.globals['rebuildDestinationCurve']),
+				'stretch':isTrue(s.stretch), 'bind':isTrue(s.bind) },
+				after=[ g.name for g in garments ]+[ n for n in plan.names if n.startswith("buttons:") or n == "rebuildUV" ], sources=[ s.destination ]+s.curves).name)
 
 
 		# create weld constraint for within each subgarment and among two subgarments
+		welds = []
 		sgcurves = []
 		for i in range(len(self.subgarments)):
 			curves = []
@@ -2524,7 +2666,7 @@ class	garment:
 					if set(s.curves) == set(s.curves) & set(reduce(add, [ p.curves for p in self.subgarments[i].patterns ])):
 						curves += s.curves
 			if len(curves) > 0:
-				script += "\tjc.clothes.createWeldConstraint('"+"', '".join(curves)+"')\n\n"
+				welds.append(plan.add("weld:"+str(i), createWeldConstraint, curves, after=stitches).name)
 			sgcurves.append(curves)
 		for i in range(len(self.subgarments)):
 			for j in range(i+1, len(self.subgarments)):
@@ -2535,56 +2677,63 @@ class	garment:
 						if set(s.curves) == set(s.curves) & inclusion:
 							curves += s.curves
 				if len(curves) > 0:
-					script += "\tjc.clothes.createWeldConstraint('"+"', '".join(curves)+"')\n\n"
+					welds.append(plan.add("weld:"+str(i)+":"+str(j), createWeldConstraint, curves, after=stitches).name)
 
 
 		# create point-to-surface constraint for subgarment (eg. pockets)
-		script += "\tdef findMesh(attachable):\n"
-		script += "\t\tif cmds.ls(cmds.listHistory(attachable, f=True), typ='nRigid'):\n"
-		script += "\t\t\treturn attachable\n"
-		script += "\t\tcurves = cmds.ls(cmds.listHistory(attachable, f=True), typ='nurbsCurve')\n"
-		script += "\t\tif curves:\n"
-		script += "\t\t\tmesh = cmds.ls(cmds.listHistory(curves), typ='transform')\n"
-		script += "\t\t\tif mesh:\n"
-		script += "\t\t\t\tmesh = list(set(mesh))\n"
-		script += "\t\t\t\tncloth = cmds.ls(cmds.listHistory(mesh), typ='nCloth')\n"
-		script += "\t\t\t\tif ncloth:\n"
-		script += "\t\t\t\t\treturn mesh[0]\n\n"
 		for w in self.constraints:
-			script += "\tmesh = findMesh('"+w.attachable+"')\n"
-			script += "\tif mesh:\n"
-			script += "\t\tjc.clothes.createWeldConstraint(mesh, '"+"', '".join(w.curves)+"')\n\n"
-
-
-		if group:
-			script += "\tcmds.currentTime(timeOrigin)\n"
-			script += group+"\n"
-			script += keyframe0
-			script += "\tcmds.currentTime(stitchStartTime)\n"
-			script += keyframe1
-			script += "\tcmds.select(garments, r=True)\n"
-			script += "\tjc.clothes.setKeyframes(setKeyframesFor=[\"Stitches\", \"nConstraints\", \"nCloth\"], "
-			script += "stitchStartTime=stitchStartTime"
-			script += ", stitchEndTime=stitchEndTime"
-			script += ", turnOnConstraintsTime=turnOnConstraintsTime"
-			script += ", turnOffInputMeshAttractTime=turnOffInputMeshAttractTime"
-			script += ")\n\n"
-
-		if attach:
-			script += "\tif attachStitches:\n"
-			for line in attach.split("\n"):
+			welds.append(plan.add("constraint:"+w.name, __constrainToAttachable__, [ w.attachable ]+w.curves,
+				after=stitches+welds, sources=[ w.attachable ]).name)
+
+
+		# group stitches to pattern locators, key the locators at timeOrigin and moved to their destinations at stitchStartTime,
+		# then set keyframes of the garments
+		afterKeyframes = []
+		if groups:
+			grouped = []
+			for args in groups:
+				grouped.append(plan.add("group:"+args[0], __groupStitches__, args, after=welds).name)
+			placed = []
+			for args in places:
+				placed.append(plan.add("place:"+args[0], __placePattern__, args, after=[ n for n in grouped if n == "group:"+args[0] ]).name)
+			plan.add("keyframes", setKeyframes, garments,
+				{ 'setKeyframesFor':[ "Stitches", "nConstraints", "nCloth" ], 'stitchStartTime':stitchStartTime, 'stitchEndTime':stitchEndTime,
+				'turnOnConstraintsTime':turnOnConstraintsTime, 'turnOffInputMeshAttractTime':turnOffInputMeshAttractTime },
+				after=grouped+placed)
+			afterKeyframes = [ "keyframes" ]
+
+		if attachables and self.globals['attachStitches'] == "True":
+			unmirrored = set()		# curves of stitches having unmirrored curves
+			for s in self.stitches:
+				if set(s.curves) - set(mirrored):
+					unmirrored |= set(s.curves)
+			pairs = []
+			for pair in attachables:
+				joints = []
+				sides = []
+				for c, side in pair:
+					if side == None or c in unmirrored:
+						joints.append(stitchJoints(c))
+						sides.append(None)
+					else:
+						joints.append(stitchJoints(c)[side])
+						sides.append(side)
 				# remove those on the right for unmirrored stitches
-				if not re.compile("[^\]]\[\d+\][^\[].*\[\d+\]\[1\]").search(line) and not re.compile("\[\d+\]\[1\].*[^\]]\[\d+\][^\[]").search(line):
-					script += line+"\n"
+				if None in sides and 1 in sides:
+					continue
+				if repr(joints) not in pairs:
+					pairs.append(repr(joints))
+					plan.add("attach"+str(len(pairs)), attachAdjacentStitches, joints,
+						{ 'stitchStartTime':stitchStartTime, 'stitchEndTime':stitchEndTime }, after=afterKeyframes)
+
+		return plan
 
-		#script += "except:\n\ttraceback.print_exc(limit=2, file=sys.stderr)\n"
-		script += "finally:\n\tif turnOffUndo: cmds.undoInfo(state=undoState)\n"
-		script += "\tcmds.autoKeyframe(state=autoKeyframeState)\n"
-		script += "\tsolver = mel.eval('getActiveNucleusNode(true, false);')\n"
-		script += "\tif cmds.objExists(solver) and cmds.getAttr(solver+'.startFrame') > stitchStartTime:\n"
-		script += "\t\tcmds.setAttr(solver+'.startFrame', stitchStartTime)\n"
 
-		return script
+	def	build(self, verbose=False):
+	# build the garment by its plan, in the same scene only the steps whose inputs have changed since the last build are run
+	#	verbose: whether to print the timings of the steps
+	# return: scheduler having the timings of the steps, eg. print g.build().report()
+		return __buildPlan__(self.compilePlan(), self.globals, verbose)
 
 
 	def	parseCSV(self, fileObj):
@@ -2695,11 +2844,12 @@ class	garment:
 				else:
 					fileObj.write("i 155 0.6 0.1 0.6 0 65 -5 8\n")
 				for c, v in corners:
+					nc = __nurbsCurve__(c)
 					r = ''
-					if __dist__(v, cmds.pointOnCurve(c, pr=cmds.getAttr(c+'.min'), p=True)) > 1.0e-10:
+					if __dist__(v, nc.point(nc.minU)) > 1.0e-10:
 						r = 'r'
 					fileObj.write("v%s %f %f\n" % (r, v[0], v[1]))
-					if cmds.getAttr(c+'.degree') == 3:
+					if nc.degree == 3:
 						for pt in getEdgePoints(c, v):
 							fileObj.write("p %f %f\n" % (pt[0], pt[1]))
 				fileObj.write("\n")
@@ -2713,12 +2863,13 @@ class	garment:
 				a = findPat(s.curves[0])
 				b = findPat(s.curves[1])
 				fileObj.write("stitch %s %s %d %s %d\n" % (s.destination, a.locator, a.edges.index(cmds.ls(s.curves[0], l=True)[0]), b.locator, b.edges.index(cmds.ls(s.curves[1], l=True)[0])))
-				v = cmds.pointOnCurve(s.destination, pr=cmds.getAttr(s.destination+'.min'), p=True)
+				nc = __nurbsCurve__(s.destination)
+				v = nc.point(nc.minU)
 				fileObj.write("v %f %f %f\n" % (v[0], v[1], v[2]))
-				if cmds.getAttr(s.destination+'.degree') == 3:
+				if nc.degree == 3:
 					for pt in getEdgePoints(s.destination, v):
 						fileObj.write("p %f %f %f\n" % (pt[0], pt[1], pt[2]))
-				v = cmds.pointOnCurve(s.destination, pr=cmds.getAttr(s.destination+'.max'), p=True)
+				v = nc.point(nc.maxU)
 				fileObj.write("v %f %f %f\n" % (v[0], v[1], v[2]))
 				fileObj.write("\n")
 
@@ -2990,7 +3141,7 @@ class	garmentBuilderClass:
 			garmentName = ""
 
 		self.open(garmentName)
-		exec(self.__garment.generateScript())
+		self.__garment.build()
 
 
 	def	showWindow(self, garmentName=None):
@@ -3501,7 +3652,7 @@ class	garmentBuilderClass:
 		action = keywords['action']
 
 		if action == 'build':
-			exec(self.__garment.generateScript())
+			self.__garment.build()
 			return
 
 		if action == 'edit':
@@ -3767,7 +3918,7 @@ def	buildGarmentFromFile(fileName=None):
 		file = open(fileName, "rb")
 		g.parseCSV(file)
 		file.close()
-		exec(g.generateScript())
+		g.build()
 
 
 def	garmentOptions():
@@ -3806,33 +3957,26 @@ def	attachLayer(*args, **keywords):
 		if not nc:
 			raise Exception, "selected object is not an ncloth object"
 
-		patternCurves = cmds.listConnections(cmds.listRelatives(garment, p=True, f=True)[0]+".message", p=True)
-		if patternCurves:
-			curves = set()
-			locators = set()
-			joints = set()
-			for p in patternCurves:
-				if __pattern in p:
-					c = cmds.listRelatives(p.split('.')[0], p=True, f=True)[0]
-					curves.add(c)
-					if cmds.attributeQuery(__destinationCurve, n=c, ex=True):
-						curves.add(cmds.listConnections(c+"."+__destinationCurve)[0])
-					s = cmds.listRelatives(c, s=True, f=True)[0]
-					if cmds.attributeQuery(__locator, n=s, ex=True):
-						l = cmds.listConnections(s+"."+__locator)[0]
-						locators.add(l)
-						s = cmds.listRelatives(l, s=True, f=True)[0]
-						l = cmds.ls(cmds.listRelatives(cmds.listConnections(s), s=True, f=True), type='locator')
-						if l:
-							locators.add(cmds.listRelatives(l, p=True, f=True)[0])
-					if cmds.listConnections(c+".message", p=True):
-						for j in cmds.listConnections(c+".message", p=True):
-							if __patternCurve in j:
-								j = j.split('.')[0]
-								if cmds.attributeQuery(__destinationJoint, n=j, ex=True):
-									joints.add(cmds.listConnections(j+"."+__destinationJoint)[0])
-			if list(curves|locators|joints):
-				cmds.editDisplayLayerMembers(layer, list(curves|locators|joints))
+		links = __linkIndex__()
+		curves = set()
+		locators = set()
+		joints = set()
+		for c in links.linked(cmds.listRelatives(garment, p=True, f=True)[0], __pattern):
+			curves.add(c)
+			if links.target(c, __destinationCurve):
+				curves.add(links.target(c, __destinationCurve))
+			l = links.target(c, __locator)
+			if l:
+				# the locator and the one mirrored from or to it
+				locators.add(l)
+				for m in links.linked(l, __locator, "locator") + [ links.target(l, __locator) ]:
+					if m:
+						locators.add(m)
+			for j in links.linked(c, __patternCurve):
+				if links.target(j, __destinationJoint):
+					joints.add(links.target(j, __destinationJoint))
+		if list(curves|locators|joints):
+			cmds.editDisplayLayerMembers(layer, list(curves|locators|joints))
 
 		dc = cmds.ls(cmds.listHistory(nc, f=True), type='dynamicConstraint')
 		if dc:
@@ -3926,6 +4070,12 @@ def	__assembleCmd(action):
 
 
 def	batchSimulate(*args, **keywords):
+# Cache the selected garments by mayabatch, the jobs are run by jc/jobs.py
+# separate: cache each garment by its own mayabatch process, only if the garments don't interact
+# workers: number of concurrent mayabatch processes
+# memory: maximum memory of each process in megabytes, 0 for no limit (not supported on Windows)
+# retries: number of times a failed job is run again
+
 	if 'cache' not in keywords.keys():
 		raise Exception, "argument error"
 	elif keywords['cache'] not in cacheOptions():
@@ -3936,8 +4086,16 @@ def	batchSimulate(*args, **keywords):
 
 	startNow = True
 	shutdown = False
+	separate = False
+	workers = 1
+	memory = 0
+	retries = 0
 	if 'startNow' in keywords: startNow = keywords['startNow']
 	if 'shutdown' in keywords: shutdown = keywords['shutdown']
+	if 'separate' in keywords: separate = keywords['separate']
+	if 'workers' in keywords: workers = keywords['workers']
+	if 'memory' in keywords: memory = keywords['memory']
+	if 'retries' in keywords: retries = keywords['retries']
 
 	if not cmds.ls(sl=True) or not cmds.listRelatives(type='mesh', f=True, s=True, ni=True):
 		raise Exception, "no garment selected"
@@ -3952,38 +4110,78 @@ def	batchSimulate(*args, **keywords):
 	if not garments:
 		raise Exception, "no garment selected"
 
-	mayabatch = os.path.join(os.path.abspath(os.getenv('MAYA_LOCATION')), "bin")
+	binDirectory = os.path.join(os.path.abspath(os.getenv('MAYA_LOCATION')), "bin")
 	if cmds.about(nt=True):
-		mayabatch = os.path.join(mayabatch, "mayabatch.exe")
+		mayabatch = os.path.join(binDirectory, "mayabatch.exe")
+		mayapy = os.path.join(binDirectory, "mayapy.exe")
 	else:
-		mayabatch = os.path.join(mayabatch, "maya")
+		mayabatch = os.path.join(binDirectory, "maya")
+		mayapy = os.path.join(binDirectory, "mayapy")
+	runner = os.path.splitext(os.path.abspath(jc.jobs.__file__))[0]+".py"
 
 	projectDirectory = cmds.workspace(q=True, rd=True)
 
 	currentScene = os.path.abspath(cmds.file(q=True, sn=True))
 
 	def f(x): return x.isalpha()
-	melProc = "".join(filter(f, os.path.split(currentScene)[1].split('.')[0]))+"_"+"_".join(garments).replace(':','').replace('|','')+"_cache"
+	sceneName = "".join(filter(f, os.path.split(currentScene)[1].split('.')[0]))
+	def f(x): return x.replace(':','').replace('|','')
+	melProc = sceneName+"_"+"_".join(map(f, garments))+"_cache"
 
 	batchCmdPath = projectDirectory
 	if 'scene' in cmds.workspace(q=True, frl=True):
 		batchCmdPath = os.path.join(projectDirectory, cmds.workspace(fre='scene'), melProc)
+	jobsPath = batchCmdPath+".json"
 	if cmds.about(nt=True):
 		batchCmdPath += ".bat"
 
 	melScriptPath = projectDirectory
 	if 'mel' in cmds.workspace(q=True, frl=True):
 		melScriptPath = os.path.join(projectDirectory, cmds.workspace(fre='mel'))
+	melDirectory = melScriptPath
 	melScriptPath = os.path.join(melScriptPath, melProc+".mel")
 
+	# one job of all garments, or one job for each
+	groups = [ garments ]
+	if separate:
+		groups = [ [ g ] for g in garments ]
+
+	cacheCmd = ""
+	if keywords['cache'] == cacheOptions()[0]:
+		cacheCmd = __assembleCmd("add")
+	elif keywords['cache'] == cacheOptions()[1]:
+		cacheCmd = __assembleCmd("replace")
+	elif keywords['cache'] == cacheOptions()[2]:
+		cacheCmd = __assembleCmd("merge")
+	elif keywords['cache'] == cacheOptions()[3]:
+		cacheCmd = __assembleCmd("append")
+
+	melScript = ""
+	jobs = []
+	for group in groups:
+		proc = melProc
+		if separate:
+			proc = sceneName+"_"+f(group[0])+"_cache"
+		melScript += "global proc "+proc+"()\n"
+		melScript += "{\n"
+		melScript += "\tselect -r "+" ".join(group)+";\n"
+		#melScript += '\tdoCreateNclothCache 4 { "3", "1", "100", "OneFile", "1", "","0","","0", "add", "0", "1", "1","0","1" } ;\n'
+		melScript += "\t"+cacheCmd+";\n"
+		melScript += "}\n"
+
+		command = [ mayabatch ]
+		if not cmds.about(nt=True):
+			command.append("-batch")
+		command += [ "-proj", projectDirectory, "-file", currentScene, "-script", melScriptPath, "-command", proc+"();" ]
+		jobs.append(jc.jobs.job(proc, command, os.path.join(melDirectory, proc+".log")))
+
 	quote = ""
 	if cmds.about(nt=True):
 		quote = '"'
-	batchCmd = " -proj "+quote+projectDirectory+quote+" -file "+quote+currentScene+quote+" -script "+quote+melScriptPath+quote+" -command \""+melProc+"();\"\n"
-	if cmds.about(nt=True):
-		batchCmd = '"'+mayabatch+'"' + batchCmd
-	else:
-		batchCmd = mayabatch + " -batch" + batchCmd
+	batchCmd = quote+mayapy+quote+" "+quote+runner+quote+" -w %d -r %d" % (workers, retries)
+	if memory:
+		batchCmd += " -m %d" % memory
+	batchCmd += " "+quote+jobsPath+quote+"\n"
 
 	if shutdown:
 		if cmds.about(nt=True):
@@ -3991,20 +4189,6 @@ def	batchSimulate(*args, **keywords):
 		else:
 			batchCmd += "shutdown -P 0"
 
-	melScript = "global proc "+melProc+"()\n"
-	melScript += "{\n"
-	melScript += "\tselect -r "+" ".join(garments)+";\n"
-	#melScript += '\tdoCreateNclothCache 4 { "3", "1", "100", "OneFile", "1", "","0","","0", "add", "0", "1", "1","0","1" } ;\n'
-	if keywords['cache'] == cacheOptions()[0]:
-		melScript += "\t"+__assembleCmd("add")+";\n"
-	elif keywords['cache'] == cacheOptions()[1]:
-		melScript += "\t"+__assembleCmd("replace")+";\n"
-	elif keywords['cache'] == cacheOptions()[2]:
-		melScript += "\t"+__assembleCmd("merge")+";\n"
-	elif keywords['cache'] == cacheOptions()[3]:
-		melScript += "\t"+__assembleCmd("append")+";\n"
-	melScript += "}"
-
 	# save files
 	file = open(batchCmdPath, "w+")
 	if not cmds.about(nt=True):
@@ -4016,10 +4200,13 @@ def	batchSimulate(*args, **keywords):
 	file = open(melScriptPath, "w+")
 	file.write(melScript)
 	file.close()
+	jc.jobs.saveJobs(jobsPath, jobs)
 
 	# check paths existence
 	if not os.path.exists(mayabatch):
 		raise Exception, "missing file "+mayabatch
+	if not os.path.exists(mayapy):
+		raise Exception, "missing file "+mayapy
 	if not os.path.exists(batchCmdPath):
 		raise Exception, "missing file "+batchCmdPath
 	if not os.path.exists(melScriptPath):
@@ -4029,6 +4216,7 @@ def	batchSimulate(*args, **keywords):
 
 	print "batch file: "+batchCmdPath
 	print "mel file: "+melScriptPath
+	print "job file: "+jobsPath
 
 	if startNow:
 		pid = os.spawnl(os.P_NOWAIT, batchCmdPath,  batchCmdPath)
@@ -4065,7 +4253,7 @@ def	doMenu(do=True, parent=None):
 			m = jc.menu.createMenu(__moduleName, parent)
 
 		i = jc.menu.commandItem(m, __moduleName+".garmentBuilder", "Garment Builder", annotation="Open Garment Builder")
-		jc.menu.listOption(i, "garment", garmentOptions()[0], garmentOptions)
+		jc.menu.listOption(i, "garment", jc.menu.first(garmentOptions), garmentOptions)
 
 		#i = jc.menu.commandItem(m, __moduleName+".buildGarmentFromFile", "Build Garment From File", annotation="Open File")
 
@@ -4080,7 +4268,7 @@ def	doMenu(do=True, parent=None):
 
 		i = jc.menu.commandItem(m, __moduleName+".createGarment", "Create Garment", annotation="Select pattern(s)")
 		jc.menu.stringOption(i, "prefix", "")
-		jc.menu.listOption(i, "nCloth Preset", getNClothPresetsCallback()[0], getNClothPresetsCallback)
+		jc.menu.listOption(i, "nCloth Preset", jc.menu.first(getNClothPresetsCallback), getNClothPresetsCallback)
 
 		i = jc.menu.commandItem(m, __moduleName+".createStitch", "Create Stitch", annotation="Select pattern curves and destination curve")
 		jc.menu.integerOption(i, "number Of Joints", 10)
@@ -4094,8 +4282,8 @@ def	doMenu(do=True, parent=None):
 		i = jc.menu.commandItem(m, __moduleName+".rebuildUV", "Rebuild UV", annotation="Select garments")
 
 		i = jc.menu.commandItem(m, __moduleName+".attachButtons", "Attach Buttons", annotation="Select garment and buttons")
-		jc.menu.listOption(i, "button Type", buttonOptions()[0], buttonOptions)
-		jc.menu.listOption(i, "nCloth Preset", getNClothPresetsCallback()[0], getNClothPresetsCallback)
+		jc.menu.listOption(i, "button Type", jc.menu.first(buttonOptions), buttonOptions)
+		jc.menu.listOption(i, "nCloth Preset", jc.menu.first(getNClothPresetsCallback), getNClothPresetsCallback)
 		jc.menu.stringOption(i, "group Name", "buttons")
 
 		i = jc.menu.commandItem(m, __moduleName+".setKeyframes", "Set Keyframes", annotation="Select garment")
@@ -4119,12 +4307,16 @@ def	doMenu(do=True, parent=None):
 		i = jc.menu.commandItem(m, __moduleName+".duplicateGarment", "Duplicate Garment", annotation="Select garment")
 
 		i = jc.menu.commandItem(m, __moduleName+".attachLayer", "Attach Layer", annotation="Select garment")
-		jc.menu.listOption(i, "layer", layerOptions()[0], layerOptions)
+		jc.menu.listOption(i, "layer", jc.menu.first(layerOptions), layerOptions)
 
 		i = jc.menu.commandItem(m, __moduleName+".batchSimulate", "Batch Simulate", annotation="Select garment")
-		jc.menu.listOption(i, "cache", cacheOptions()[0], cacheOptions)
+		jc.menu.listOption(i, "cache", jc.menu.first(cacheOptions), cacheOptions)
 		jc.menu.booleanOption(i, "start Now", True)
 		jc.menu.booleanOption(i, "shutdown", False)
+		jc.menu.booleanOption(i, "separate", False)
+		jc.menu.integerOption(i, "workers", 1)
+		jc.menu.integerOption(i, "memory", 0)
+		jc.menu.integerOption(i, "retries", 0)
 
 		jc.menu.dividerItem(m)
 
@@ -0,0 +1,1470 @@
+# fakemaya.py
+# A stand-in for maya.cmds, maya.mel and maya.OpenMaya which counts the calls made to it,
+# so that the jc modules can be run and benchmarked by plain python outside Maya.
+# It models just enough of a scene for that: transforms, joints, NURBS curves, polygon meshes,
+# dynamic attributes, connections (and history through them), selection, option variables, existence of UI elements
+# and callbacks on nodes added, removed, renamed, parented and connected. Nodes under different parents can have
+# the same name, and are given by their shortest unique paths as in Maya.
+# Commands which aren't modelled are counted as well and return None.
+#
+# usage (before any jc module using Maya is imported):
+#	import jc.fakemaya
+#	jc.fakemaya.install()
+#	jc.fakemaya.scene.createCurve("curve1", cvs, knots, degree)
+#	jc.fakemaya.calls.reset()
+#	...
+#	print jc.fakemaya.calls.total(), jc.fakemaya.calls.top()
+#
+# Installation:
+# This file implements the module called jc.fakemaya.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import sys, os, re, types, tempfile
+import jc.nurbs
+
+
+
+class	recorder:
+# number of calls of each command
+
+	def	__init__(self):
+		self.counts = {}
+
+	def	reset(self):
+		self.counts = {}
+
+	def	record(self, name):
+		self.counts[name] = self.counts.get(name, 0) + 1
+
+	def	total(self):
+		return sum(self.counts.values())
+
+	def	top(self, n=5):
+	# return: list of (name, count) of the most called commands
+		l = [ (c, name) for name, c in self.counts.iteritems() ]
+		l.sort(reverse=True)
+		return [ (name, c) for c, name in l[:n] ]
+
+
+calls = recorder()
+
+
+###############################################################################
+# scene
+
+
+class	node:
+
+	def	__init__(self, name, type, parent=None):
+		self.name = name
+		self.type = type
+		self.parent = parent
+		self.children = []
+		self.attrs = { "translate":[ 0.0, 0.0, 0.0 ], "rotate":[ 0.0, 0.0, 0.0 ], "scale":[ 1.0, 1.0, 1.0 ] }
+		self.multi = set()
+		self.intermediate = False
+		self.data = None
+		if parent:
+			parent.children.append(self)
+
+	def	isDag(self):
+		return self.type in ("transform", "joint") or self.parent != None
+
+	def	path(self):
+		if self.parent:
+			return self.parent.path()+"|"+self.name
+		return "|"+self.name
+
+	def	transform(self):
+		if self.type in ("transform", "joint") or not self.parent:
+			return self
+		return self.parent
+
+	def	shape(self):
+		if self.type not in ("transform", "joint"):
+			return self
+		for c in self.children:
+			if c.type not in ("transform", "joint") and not c.intermediate:
+				return c
+		return None
+
+	def	worldPosition(self):
+		t = self.attrs["translate"]
+		if self.parent:
+			p = self.parent.worldPosition()
+			s = self.parent.attrs["scale"]
+			return [ p[0]+t[0]*s[0], p[1]+t[1]*s[1], p[2]+t[2]*s[2] ]
+		return list(t)
+
+
+class	curveData:
+
+	def	__init__(self, cvs, knots, degree, form=0):
+		self.cvs = [ tuple(p) for p in cvs ]
+		self.knots = list(knots)
+		self.degree = degree
+		self.form = form
+		self.curve = jc.nurbs.curve(cvs, knots, degree, form)
+
+
+class	meshData:
+
+	def	__init__(self, points, faces, uvs=None):
+	# uvs: list of (u, v) of each face vertex, none by default
+		self.points = [ list(p) for p in points ]
+		self.faces = [ list(f) for f in faces ]
+		self.u = []
+		self.v = []
+		self.uvIds = []
+		if uvs:
+			self.u = [ float(uv[0]) for uv in uvs ]
+			self.v = [ float(uv[1]) for uv in uvs ]
+			self.uvIds = range(len(uvs))
+		self.edges = []
+		self.edgeFaces = []
+		index = {}
+		for i in range(len(self.faces)):
+			f = self.faces[i]
+			for j in range(len(f)):
+				e = tuple(sorted((f[j], f[(j+1)%len(f)])))
+				if e not in index:
+					index[e] = len(self.edges)
+					self.edges.append(e)
+					self.edgeFaces.append([])
+				self.edgeFaces[index[e]].append(i)
+
+	def	normals(self):
+	# return: vertex normals, averages of the (Newell) normals of the faces around
+		sums = [ [ 0.0, 0.0, 0.0 ] for p in self.points ]
+		for f in self.faces:
+			n = [ 0.0, 0.0, 0.0 ]
+			for j in range(len(f)):
+				a = self.points[f[j-1]]
+				b = self.points[f[j]]
+				n[0] += (a[1]-b[1])*(a[2]+b[2])
+				n[1] += (a[2]-b[2])*(a[0]+b[0])
+				n[2] += (a[0]-b[0])*(a[1]+b[1])
+			l = (n[0]**2 + n[1]**2 + n[2]**2)**0.5 or 1.0
+			for i in f:
+				for k in range(3):
+					sums[i][k] += n[k]/l
+		result = []
+		for n in sums:
+			l = (n[0]**2 + n[1]**2 + n[2]**2)**0.5 or 1.0
+			result.append([ x/l for x in n ])
+		return result
+
+	def	border(self, e):
+	# return: edge indices of the border loop containing edge e, empty if e isn't on a border
+		if len(self.edgeFaces[e]) != 1:
+			return []
+		adjacency = {}
+		for k in range(len(self.edges)):
+			if len(self.edgeFaces[k]) == 1:
+				for v in self.edges[k]:
+					adjacency.setdefault(v, []).append(k)
+		loop = [ e ]
+		visited = set(loop)
+		stack = list(self.edges[e])
+		while stack:
+			v = stack.pop()
+			for k in adjacency.get(v, []):
+				if k not in visited:
+					visited.add(k)
+					loop.append(k)
+					stack += list(self.edges[k])
+		return sorted(loop)
+
+
+class	fakeScene:
+
+	def	__init__(self):
+		self.callbacks = {}		# id: (message, function, client data), kept when the scene is cleared
+		self.nextCallback = 1
+		self.nodes = {}
+		self.named = {}
+		self.clear()
+
+	def	clear(self):
+		for n in self.all():
+			self.notify("nodeRemoved", MObject(n))
+		self.nodes = {}			# name: the first node of the name
+		self.named = {}			# name: all nodes of the name, under different parents
+		self.selection = []
+		self.connections = []		# (source plug, destination plug)
+		self.optionVars = {}
+		self.ui = { "MayaWindow":"window" }
+		self.counters = {}
+		self.currentTime = 0.0
+
+	def	uniqueName(self, prefix):
+		i = self.counters.get(prefix, 0)
+		while True:
+			i += 1
+			if prefix+str(i) not in self.named:
+				break
+		self.counters[prefix] = i
+		return prefix+str(i)
+
+	def	createNode(self, type, name=None, parent=None):
+	# a node can have the name of another one under a different parent, as in Maya
+		if not name or [ n for n in self.named.get(name, []) if n.parent == parent ]:
+			name = self.uniqueName(name or type)
+		n = node(name, type, parent)
+		self.add(n)
+		self.notify("nodeAdded", MObject(n))
+		return n
+
+	def	add(self, n):
+		self.nodes.setdefault(n.name, n)
+		self.named.setdefault(n.name, []).append(n)
+
+	def	remove(self, n):
+		l = self.named[n.name]
+		l.remove(n)
+		if not l:
+			del self.named[n.name]
+			del self.nodes[n.name]
+		elif self.nodes[n.name] == n:
+			self.nodes[n.name] = l[0]
+
+	def	all(self):
+		l = []
+		for nodes in self.named.values():
+			l += nodes
+		return l
+
+	def	createCurve(self, name, cvs, knots, degree, form=0):
+	# return: transform of the curve
+		t = self.createNode("transform", name)
+		s = self.createNode("nurbsCurve", t.name+"Shape", t)
+		s.data = curveData(cvs, knots, degree, form)
+		return t
+
+	def	createMesh(self, name, points, faces, uvs=None):
+		t = self.createNode("transform", name)
+		s = self.createNode("mesh", t.name+"Shape", t)
+		s.data = meshData(points, faces, uvs)
+		return t
+
+	def	plug(self, plug):
+	# return: plug of the full path of its node, as the plugs are kept, the plug itself if there's no such node
+		n = self.find(plug)
+		if not n:
+			return plug
+		return n.path() + plug[plug.index("."):]
+
+	def	connect(self, source, destination):
+		source = self.plug(source)
+		destination = self.plug(destination)
+		for c in self.connections:
+			if c[1] == destination:
+				self.disconnect(c[0], destination)
+		self.connections.append((source, destination))
+		self.notify("connection", MPlug(source), MPlug(destination), True)
+
+	def	disconnect(self, source, destination):
+		source = self.plug(source)
+		destination = self.plug(destination)
+		if (source, destination) in self.connections:
+			self.connections.remove((source, destination))
+			self.notify("connection", MPlug(source), MPlug(destination), False)
+
+	def	rewire(self, change):
+	# make the change, which can move nodes to other paths, keeping the connections on them
+		plugs = [ [ (self.find(p), p) for p in c ] for c in self.connections ]
+		change()
+		def	plug(n, p):
+			if not n:
+				return p
+			return n.path() + p[p.index("."):]
+		self.connections = [ (plug(*a), plug(*b)) for a, b in plugs ]
+
+	def	rename(self, n, name):
+		old = n.name
+		def	change():
+			self.remove(n)
+			n.name = name
+			self.add(n)
+		self.rewire(change)
+		self.notify("nameChanged", MObject(n), old)
+
+	def	reparent(self, n, parent):
+		def	change():
+			if n.parent:
+				n.parent.children.remove(n)
+			n.parent = parent
+			if parent:
+				parent.children.append(n)
+		self.rewire(change)
+		self.notify("parentAdded", MDagPath(n), MDagPath(parent))
+
+	def	addCallback(self, message, function, clientData=None):
+		id = self.nextCallback
+		self.nextCallback += 1
+		self.callbacks[id] = (message, function, clientData)
+		return id
+
+	def	notify(self, message, *args):
+		for m, function, clientData in self.callbacks.values():
+			if m == message:
+				function(*(args + (clientData,)))
+
+	def	match(self, name):
+	# return: nodes of name, which can be a partial or full path, a plug or a component
+		name = name.split(".")[0]
+		nodes = self.named.get(name.split("|")[-1], [])
+		if "|" in name:
+			nodes = [ n for n in nodes if n.path() == name or n.path().endswith("|"+name) ]
+		return nodes
+
+	def	find(self, name):
+	# return: node of name, None if there's none, raises ValueError if there are several as commands do
+		nodes = self.match(name)
+		if len(nodes) > 1:
+			raise ValueError, "More than one object matches name: "+name
+		return nodes and nodes[0] or None
+
+	def	partialName(self, n):
+	# return: shortest path of the node which no other node of its name ends with, as Maya gives the names of nodes
+		others = [ o.path() for o in self.named.get(n.name, []) if o != n ]
+		if not others:
+			return n.name
+		path = n.path().split("|")
+		for k in range(1, len(path)+1):
+			name = "|".join(path[-k:])
+			if not [ o for o in others if o == name or o.endswith("|"+name) ]:
+				return name
+		return n.path()
+
+
+scene = fakeScene()
+
+
+###############################################################################
+# maya.cmds
+
+
+__component__ = re.compile(r"^(.*)\.(vtx|e|f|cv)\[(\d+|\*)(?::(\d+))?\]$")
+
+
+def	__flatten__(args):
+	l = []
+	for a in args:
+		if isinstance(a, (types.ListType, types.TupleType)):
+			l += __flatten__(a)
+		elif a != None:
+			l.append(a)
+	return l
+
+
+def	__expand__(name):
+# return: (node, component type, indices) of a component, (node, None, None) otherwise
+	m = __component__.match(name)
+	if not m:
+		return scene.find(name), None, None
+	n = scene.find(m.group(1)).shape()
+	if m.group(3) == "*":
+		if m.group(2) == "vtx": count = len(n.data.points)
+		elif m.group(2) == "e": count = len(n.data.edges)
+		elif m.group(2) == "f": count = len(n.data.faces)
+		else: count = len(n.data.cvs)
+		return n, m.group(2), range(count)
+	a = int(m.group(3))
+	b = a
+	if m.group(4):
+		b = int(m.group(4))
+	return n, m.group(2), range(a, b+1)
+
+
+def	__componentNames__(n, typ, indices):
+	t = scene.partialName(n.transform())
+	return [ "%s.%s[%d]" % (t, typ, i) for i in indices ]
+
+
+def	__nodeName__(n, long):
+	if long:
+		return n.path()
+	return scene.partialName(n)
+
+
+def	__option__(keywords, *names):
+	for name in names:
+		if name in keywords:
+			return keywords[name]
+	return None
+
+
+class	commands:
+
+	def	ls(self, *args, **keywords):
+		if keywords.get('sl') or keywords.get('selection'):
+			items = list(scene.selection)
+		else:
+			items = __flatten__(args)
+			if not args:
+				items = [ n.path() for n in scene.all() ]
+		# nodes having an attribute, eg. "*.jcp", and all the nodes of a name
+		for i in list(items):
+			if i.startswith("*."):
+				items.remove(i)
+				items += sorted([ n.path() for n in scene.all() if i[2:] in n.attrs ])
+			elif "." not in i and len(scene.match(i)) > 1:
+				items.remove(i)
+				items += [ n.path() for n in scene.match(i) ]
+		typ = __option__(keywords, 'type', 'typ')
+		long = keywords.get('l') or keywords.get('long')
+		result = []
+		for i in items:
+			n, c, indices = __expand__(i)
+			if not n:
+				continue
+			if keywords.get('o'):
+				i = __nodeName__(n, long)
+			elif c and keywords.get('fl'):
+				result += __componentNames__(n, c, indices)
+				continue
+			elif not c:
+				i = __nodeName__(n, long)
+			if typ and (c or not [ t for t in __flatten__([ typ ]) if n.type == t or t == "transform" and n.type == "joint" ]):
+				continue
+			result.append(i)
+			if keywords.get('st') or keywords.get('showType'):
+				result.append(n.type)
+		return result
+
+	def	select(self, *args, **keywords):
+		items = __flatten__(args)
+		if keywords.get('cl'):
+			scene.selection = []
+		elif keywords.get('add'):
+			scene.selection += items
+		else:
+			scene.selection = items
+
+	def	listRelatives(self, *args, **keywords):
+		items = __flatten__(args)
+		if not args:
+			items = scene.selection
+		typ = __option__(keywords, 'type', 'typ')
+		long = keywords.get('f') or keywords.get('fullPath')
+		result = []
+		for i in items:
+			n = scene.find(i)
+			if not n:
+				continue
+			if keywords.get('p') or keywords.get('parent'):
+				related = [ n.parent ]
+			elif keywords.get('ad') or keywords.get('allDescendents'):
+				related = []
+				stack = list(n.children)
+				while stack:
+					c = stack.pop(0)
+					related.append(c)
+					stack = c.children + stack
+			elif keywords.get('s') or keywords.get('shapes'):
+				related = [ c for c in n.children if c.type not in ("transform", "joint") ]
+				if n.type not in ("transform", "joint"):
+					related = [ n ]
+			else:
+				related = n.children
+			for r in related:
+				if r == None or typ and r.type != typ:
+					continue
+				if keywords.get('ni') and r.intermediate:
+					continue
+				name = __nodeName__(r, long)
+				if name not in result:
+					result.append(name)
+		return result or None
+
+	def	nodeType(self, name, **keywords):
+		return scene.find(name).type
+
+	def	objectType(self, name, **keywords):
+		n = scene.find(name)
+		if not n:
+			raise RuntimeError, "No object matches name: "+name
+		return n.type
+
+	def	objExists(self, name):
+		return len(scene.match(name)) > 0
+
+	def	createNode(self, type, n=None, name=None, p=None, parent=None, **keywords):
+		parent = p or parent
+		if parent:
+			parent = scene.find(parent)
+		return scene.partialName(scene.createNode(type, n or name, parent))
+
+	def	delete(self, *args, **keywords):
+		for i in __flatten__(args):
+			n = scene.find(i)
+			if n:
+				stack = [ n ]
+				while stack:
+					c = stack.pop()
+					stack += c.children
+					for source, destination in list(scene.connections):
+						if scene.find(source) == c or scene.find(destination) == c:
+							scene.disconnect(source, destination)
+					scene.notify("nodeRemoved", MObject(c))
+					scene.remove(c)
+				if n.parent:
+					n.parent.children.remove(n)
+
+	def	__plug(self, plug):
+	# return: node, attribute name, indices (or None)
+		n = scene.find(plug)
+		attr = plug.split(".", 1)[1]
+		m = re.match(r"^(\w+)\[(\d*):?(\d*)\]$", attr)
+		if m:
+			a = m.group(2) and int(m.group(2)) or 0
+			b = a
+			if ":" in attr:
+				b = int(m.group(3))
+			return n, m.group(1), range(a, b+1)
+		return n, attr, None
+
+	def	getAttr(self, plug, **keywords):
+		n, attr, indices = self.__plug(plug)
+		if keywords.get('mi') or keywords.get('multiIndices'):
+			return sorted((n.attrs.get(attr) or {}).keys()) or None
+		if keywords.get('type'):
+			value = n.attrs.get(attr)
+			if isinstance(value, types.ListType):
+				return "doubleArray"
+			if isinstance(value, types.StringTypes):
+				return "string"
+			return "double"
+		if attr in ("min", "max", "minValue", "maxValue"):
+			c = n.shape().data.curve
+			if attr.startswith("min"):
+				return c.minU
+			return c.maxU
+		if attr == "intermediateObject":
+			return n.intermediate
+		axes = { "x":0, "y":1, "z":2 }
+		if len(attr) == 2 and attr[0] in "trs" and attr[1] in axes:
+			return n.transform().attrs[{ "t":"translate", "r":"rotate", "s":"scale" }[attr[0]]][axes[attr[1]]]
+		if attr in ("t", "r", "s"):
+			attr = { "t":"translate", "r":"rotate", "s":"scale" }[attr]
+		if attr in ("translate", "rotate", "scale"):
+			return [ tuple(n.transform().attrs[attr]) ]
+		value = n.attrs.get(attr)
+		if attr in n.multi:
+			value = value or {}
+			if keywords.get('s') or keywords.get('size'):
+				if not value:
+					return 0
+				return max(value.keys())+1
+			if indices == None:
+				return [ value[i] for i in sorted(value.keys()) ]
+			if len(indices) == 1 and "[" in plug and ":" not in plug:
+				return value.get(indices[0], 0)
+			return [ value.get(i, 0) for i in indices ]
+		return value
+
+	def	setAttr(self, plug, *values, **keywords):
+		n, attr, indices = self.__plug(plug)
+		if keywords.get('type') in ("pointArray", "vectorArray", "stringArray"):
+			# the number of items before them
+			values = [ list(values[1:]) ]
+		if attr == "intermediateObject":
+			n.intermediate = bool(values[0])
+			return
+		axes = { "x":0, "y":1, "z":2 }
+		if len(attr) == 2 and attr[0] in "trs" and attr[1] in axes:
+			n.transform().attrs[{ "t":"translate", "r":"rotate", "s":"scale" }[attr[0]]][axes[attr[1]]] = float(values[0])
+			return
+		if attr in ("translate", "rotate", "scale"):
+			n.transform().attrs[attr] = [ float(v) for v in values ]
+			return
+		if indices != None:
+			if attr not in n.multi:
+				n.multi.add(attr)
+			value = n.attrs.get(attr) or {}
+			if len(values) > len(indices) and len(values) % len(indices) == 0:
+				# compound elements, eg. the (time, value) of keyTimeValue
+				k = len(values)/len(indices)
+				values = [ tuple(values[i:i+k]) for i in range(0, len(values), k) ]
+			for i, v in zip(indices, values):
+				value[i] = v
+			n.attrs[attr] = value
+		elif len(values) == 1:
+			n.attrs[attr] = values[0]
+		else:
+			n.attrs[attr] = list(values)
+
+	def	addAttr(self, *args, **keywords):
+		n = scene.find(__flatten__(args)[0])
+		name = __option__(keywords, 'sn', 'shortName', 'ln', 'longName')
+		if keywords.get('m') or keywords.get('multi'):
+			n.multi.add(name)
+			n.attrs[name] = {}
+		else:
+			n.attrs[name] = __option__(keywords, 'dv', 'defaultValue')
+
+	def	deleteAttr(self, *args, **keywords):
+		if args and "." in args[0]:
+			n = scene.find(args[0])
+			attr = args[0].split(".", 1)[1]
+		else:
+			n = scene.find(args[0])
+			attr = __option__(keywords, 'at', 'attribute')
+		n.attrs.pop(attr, None)
+		n.multi.discard(attr)
+		for source, destination in list(scene.connections):
+			if scene.find(destination) == n and destination.split(".", 1)[1] == attr:
+				scene.disconnect(source, destination)
+
+	def	attributeQuery(self, attr, n=None, node=None, ex=False, exists=False, **keywords):
+		n = scene.find(n or node)
+		return attr in n.attrs or attr in n.transform().attrs
+
+	def	connectAttr(self, source, destination, **keywords):
+		scene.connect(source, destination)
+
+	def	disconnectAttr(self, source, destination, **keywords):
+		scene.disconnect(source, destination)
+
+	def	rename(self, name, newName, **keywords):
+		n = scene.find(name)
+		scene.rename(n, newName)
+		return newName
+
+	def	listHistory(self, *args, **keywords):
+	# nodes upstream (downstream with f) through the connections, breadth first, the nodes themselves first
+		future = keywords.get('f') or keywords.get('future')
+		levels = __option__(keywords, 'lv', 'levels') or 0
+		edges = {}
+		for source, destination in scene.connections:
+			a = scene.find(source)
+			b = scene.find(destination)
+			if future:
+				edges.setdefault(a, []).append(b)
+			else:
+				edges.setdefault(b, []).append(a)
+		result = []
+		visited = set()
+		level = []
+		for i in __flatten__(args):
+			n = scene.find(i)
+			if n and n.type in ("transform", "joint") and n.shape():
+				n = n.shape()
+			if n and n not in visited:
+				visited.add(n)
+				level.append(n)
+		depth = 0
+		while level:
+			result += [ n.name for n in level ]
+			depth += 1
+			if levels and depth > levels:
+				break
+			next = []
+			for n in level:
+				for c in edges.get(n, ()):
+					if c not in visited:
+						visited.add(c)
+						next.append(c)
+			level = next
+		return result or None
+
+	def	listConnections(self, *args, **keywords):
+		long = keywords.get('sh') or keywords.get('shapes')
+		pairs = keywords.get('c') or keywords.get('connections')
+		full = keywords.get('fnn') or keywords.get('fullNodeName')
+		items = __flatten__(args)
+		names = set([ i.split(".")[0].split("|")[-1] for i in items ])
+		connections = {}		# node: connections from and to it
+		for c in scene.connections:
+			for plug in c:
+				if plug.split(".")[0].split("|")[-1] in names:
+					connections.setdefault(scene.find(plug), []).append(c)
+		result = []
+		for i in items:
+			n = scene.find(i)
+			for source, destination in connections.get(n, ()):
+				if "." in i:
+					attr = i.split(".", 1)[1]
+					if scene.find(destination) == n and destination.split(".", 1)[1] == attr:
+						result.append((i, source))
+					elif scene.find(source) == n and source.split(".", 1)[1] == attr:
+						result.append((i, destination))
+				elif scene.find(destination) == n:
+					result.append((scene.partialName(n)+destination[destination.index("."):], source))
+				elif scene.find(source) == n:
+					result.append((scene.partialName(n)+source[source.index("."):], destination))
+		typ = __option__(keywords, 't', 'type')
+		nodes = []
+		for own, plug in result:
+			c = scene.find(plug)
+			if typ and c.type != typ:
+				continue
+			if not long:
+				c = c.transform()
+			name = __nodeName__(c, full)
+			if pairs:
+				nodes += [ own, name ]
+			elif name not in nodes:
+				nodes.append(name)
+		return nodes or None
+
+	def	move(self, *args, **keywords):
+	# move transforms by the values along the axes given, or by one value along the axis flag, relatively with r
+		values = [ a for a in args if not isinstance(a, types.StringTypes) ]
+		relative = keywords.get('r') or keywords.get('relative')
+		axes = [ k for k in range(3) if keywords.get("xyz"[k]) ]
+		if not axes:
+			axes = range(3)
+		for i in __flatten__([ a for a in args if isinstance(a, types.StringTypes) ]) or scene.selection:
+			t = scene.find(i).transform().attrs["translate"]
+			for k, v in zip(axes, values):
+				if relative:
+					t[k] += float(v)
+				else:
+					t[k] = float(v)
+
+	def	parent(self, *args, **keywords):
+	# the last one is the parent of the others
+		items = __flatten__(args)
+		p = scene.find(items[-1])
+		result = []
+		for i in items[:-1]:
+			n = scene.find(i)
+			scene.reparent(n, p)
+			result.append(scene.partialName(n))
+		return result
+
+	def	pointOnCurve(self, curve, **keywords):
+		c = scene.find(curve).shape().data.curve
+		u = __option__(keywords, 'pr', 'parameter')
+		if u == None:
+			u = c.minU
+		if keywords.get('top') or keywords.get('turnOnPercentage'):
+			u = c.minU + (c.maxU-c.minU)*u
+		if keywords.get('t') or keywords.get('tangent') or keywords.get('nt') or keywords.get('normalizedTangent'):
+			return c.derivative(u)
+		return c.point(u)
+
+	def	arclen(self, curve, **keywords):
+		return jc.nurbs.arcLength(scene.find(curve).shape().data.curve).total
+
+	def	exactWorldBoundingBox(self, *args, **keywords):
+		points = []
+		for i in __flatten__(args):
+			n = scene.find(i).shape()
+			if n.data.__class__ == curveData:
+				points += [ p[:3] for p in n.data.cvs ]
+			else:
+				points += n.data.points
+		xs = [ p[0] for p in points ]
+		ys = [ p[1] for p in points ]
+		zs = [ p[2] for p in points ]
+		return [ min(xs), min(ys), min(zs), max(xs), max(ys), max(zs) ]
+
+	def	xform(self, *args, **keywords):
+		result = []
+		for i in __flatten__(args):
+			n, c, indices = __expand__(i)
+			if c == "vtx":
+				for v in indices:
+					result += n.data.points[v]
+			elif c == "cv":
+				for v in indices:
+					result += list(n.data.cvs[v][:3])
+			elif keywords.get('ws') or keywords.get('worldSpace'):
+				result += n.transform().worldPosition()
+			else:
+				result += n.transform().attrs["translate"]
+		return result
+
+	def	pointPosition(self, name, **keywords):
+		return self.xform(name)
+
+	def	polyEvaluate(self, *args, **keywords):
+		n = scene.find(__flatten__(args)[0]).shape()
+		if keywords.get('v') or keywords.get('vertex'):
+			return len(n.data.points)
+		if keywords.get('e') or keywords.get('edge'):
+			return len(n.data.edges)
+		if keywords.get('f') or keywords.get('face'):
+			return len(n.data.faces)
+		return None
+
+	def	polySelect(self, obj, **keywords):
+		n = scene.find(obj).shape()
+		e = __option__(keywords, 'eb', 'edgeBorder')
+		loop = n.data.border(e)
+		if not loop:
+			return None
+		if keywords.get('ass') or keywords.get('asSelectString'):
+			return __componentNames__(n, "e", loop)
+		return loop
+
+	def	polyInfo(self, *args, **keywords):
+		result = []
+		for i in __flatten__(args):
+			n, c, indices = __expand__(i)
+			if c == "e" and (keywords.get('ev') or keywords.get('edgeToVertex')):
+				for e in indices:
+					a, b = n.data.edges[e]
+					result.append("EDGE %6d: %6d %6d  Hard\n" % (e, a, b))
+		return result
+
+	def	polyListComponentConversion(self, *args, **keywords):
+		result = []
+		for i in __flatten__(args):
+			n, c, indices = __expand__(i)
+			n = n.shape()
+			d = n.data
+			if c == None:
+				c = "f"
+				indices = range(len(d.faces))
+			if c == "vtx": vertices = set(indices)
+			elif c == "e": vertices = set([ v for e in indices for v in d.edges[e] ])
+			else: vertices = set([ v for f in indices for v in d.faces[f] ])
+
+			if keywords.get('tv') or keywords.get('toVertex'):
+				result += __componentNames__(n, "vtx", sorted(vertices))
+			elif keywords.get('te') or keywords.get('toEdge'):
+				edges = [ k for k in range(len(d.edges)) if d.edges[k][0] in vertices or d.edges[k][1] in vertices ]
+				if keywords.get('internal') or keywords.get('in') or c == "f":
+					edges = [ k for k in range(len(d.edges)) if d.edges[k][0] in vertices and d.edges[k][1] in vertices ]
+				if keywords.get('bo') or keywords.get('border'):
+					edges = [ k for k in edges if len(d.edgeFaces[k]) == 1 ]
+				result += __componentNames__(n, "e", edges)
+			elif keywords.get('tf') or keywords.get('toFace'):
+				faces = [ k for k in range(len(d.faces)) if vertices & set(d.faces[k]) ]
+				if keywords.get('internal') or keywords.get('in'):
+					faces = [ k for k in range(len(d.faces)) if vertices >= set(d.faces[k]) ]
+				result += __componentNames__(n, "f", faces)
+		return result
+
+	def	joint(self, *args, **keywords):
+		if keywords.get('e') or keywords.get('edit') or keywords.get('q') or keywords.get('query'):
+			return None
+		parent = None
+		if scene.selection:
+			parent = scene.find(scene.selection[-1])
+			if parent and parent.type != "joint":
+				parent = None
+		n = scene.createNode("joint", __option__(keywords, 'n', 'name'), parent)
+		p = __option__(keywords, 'p', 'position') or (0.0, 0.0, 0.0)
+		if parent:
+			q = parent.worldPosition()
+			p = [ p[0]-q[0], p[1]-q[1], p[2]-q[2] ]
+		n.attrs["translate"] = [ float(x) for x in p ]
+		scene.selection = [ scene.partialName(n) ]
+		return scene.partialName(n)
+
+	def	keyTangent(self, *args, **keywords):
+		if keywords.get('q') or keywords.get('query'):
+			return [ "auto" ]
+		return None
+
+	def	currentTime(self, *args, **keywords):
+		if args:
+			scene.currentTime = float(args[0])
+		return scene.currentTime
+
+	def	parentConstraint(self, *args, **keywords):
+	# the weight aliases of the targets are the weight attributes, w0, w1, ...
+		if keywords.get('wal') or keywords.get('weightAliasList'):
+			n = scene.find(__flatten__(args)[0])
+			return sorted([ a for a in n.attrs.keys() if re.match(r"^w\d+$", a) ])
+		return None
+
+	def	pluginInfo(self, *args, **keywords):
+		return False
+
+	def	about(self, **keywords):
+		if keywords.get('nt') or keywords.get('windows') or keywords.get('mac'):
+			return False
+		return ""
+
+	def	internalVar(self, **keywords):
+		return tempfile.gettempdir()+"/"
+
+	def	optionVar(self, **keywords):
+		if 'ex' in keywords or 'exists' in keywords:
+			return __option__(keywords, 'ex', 'exists') in scene.optionVars
+		if 'q' in keywords or 'query' in keywords:
+			return scene.optionVars.get(__option__(keywords, 'q', 'query'), 0)
+		for flag in ('iv', 'fv', 'sv', 'intValue', 'floatValue', 'stringValue'):
+			if flag in keywords:
+				name, value = keywords[flag]
+				scene.optionVars[name] = value
+		for flag in ('sva', 'iva', 'fva', 'stringValueAppend', 'intValueAppend', 'floatValueAppend'):
+			if flag in keywords:
+				name, value = keywords[flag]
+				v = scene.optionVars.get(name)
+				if not isinstance(v, types.ListType):
+					v = []
+				scene.optionVars[name] = v + [ value ]
+		for flag in ('ca', 'clearArray'):
+			if flag in keywords:
+				scene.optionVars[keywords[flag]] = []
+		for flag in ('rm', 'remove'):
+			if flag in keywords:
+				scene.optionVars.pop(keywords[flag], None)
+
+	def	__ui(self, type, args, keywords):
+	# create, query existence of and edit UI elements
+		name = None
+		if args:
+			name = args[0]
+		if keywords.get('ex') or keywords.get('exists'):
+			return name in scene.ui
+		if keywords.get('q') or keywords.get('query') or keywords.get('e') or keywords.get('edit'):
+			return None
+		if not name:
+			name = scene.uniqueName(type)
+		parent = __option__(keywords, 'p', 'parent')
+		if parent:
+			name = parent+"|"+name
+		scene.ui[name] = type
+		scene.ui[name.split("|")[-1]] = type
+		return name
+
+	def	deleteUI(self, *args, **keywords):
+		for i in __flatten__(args):
+			scene.ui.pop(i, None)
+			scene.ui.pop(i.split("|")[-1], None)
+
+	def	objectTypeUI(self, name, **keywords):
+		if name not in scene.ui:
+			raise RuntimeError, "Object not found: "+name
+		return scene.ui[name]
+
+	def	__getattr__(self, name):
+		if name in ("window", "menu", "menuItem", "columnLayout", "rowLayout", "formLayout", "frameLayout", "tabLayout",
+				"button", "text", "textField", "textFieldGrp", "intSliderGrp", "floatSliderGrp", "checkBoxGrp",
+				"optionMenuGrp", "radioButtonGrp", "scrollLayout", "shelfLayout", "shelfButton", "popupMenu"):
+			def	f(*args, **keywords): return self.__ui(name, args, keywords)
+		else:
+			def	f(*args, **keywords): return None
+		return f
+
+
+class	recording:
+# Wraps an object, every call of its methods is counted by calls under the given prefix.
+
+	def	__init__(self, target, prefix=""):
+		self.__dict__['_target'] = target
+		self.__dict__['_prefix'] = prefix
+
+	def	__getattr__(self, name):
+		a = getattr(self._target, name)
+		if not callable(a) or name.startswith("_"):
+			return a
+		if isinstance(a, (types.ClassType, types.TypeType)) and not hasattr(a, "__init__"):
+			# classes of constants, eg. MFn
+			return a
+		key = self._prefix+name
+		def	f(*args, **keywords):
+			calls.record(key)
+			return a(*args, **keywords)
+		if isinstance(a, (types.ClassType, types.TypeType)):
+			# constants and static methods of the class, eg. MTime.uiUnit()
+			for k in a.__dict__.keys():
+				if not k.startswith("_"):
+					setattr(f, k, getattr(a, k))
+			return f
+		self.__dict__[name] = f
+		return f
+
+
+###############################################################################
+# maya.mel
+
+
+class	melCommands:
+# the setAttr commands in the script are run by setAttr of the fake commands, the others aren't modelled
+
+	def	__word(self, quoted, word):
+		if quoted:
+			return re.sub(r"\\(.)", lambda m: m.group(1) == "n" and "\n" or m.group(1), word[1:-1])
+		try:
+			return int(word)
+		except ValueError:
+			return float(word)
+
+	def	eval(self, command):
+		statements = [ [] ]
+		for quoted, semicolon, word in re.findall(r'("(?:[^"\\]|\\.)*")|(;)|([^\s;"]+)', command):
+			if semicolon:
+				statements.append([])
+			else:
+				statements[-1].append((quoted, quoted or word))
+		for words in statements:
+			if not words or words[0][1] != "setAttr":
+				continue
+			keywords = {}
+			if words[1][1] == "-type":
+				keywords['type'] = self.__word(*words[2])
+				words = words[2:]
+			values = [ self.__word(*w) for w in words[2:] ]
+			if keywords.get('type') in ("doubleArray", "floatArray", "Int32Array"):
+				# given by the number of items before them in MEL
+				values = [ values[1:] ]
+			commands().setAttr(self.__word(*words[1]), *values, **keywords)
+		return None
+
+
+###############################################################################
+# maya.OpenMaya
+
+
+class	MFn:
+	kNurbsCurve = 267
+	kMesh = 296
+	kTransform = 110
+	kJoint = 121
+	kDagNode = 107
+	kCamera = 250
+	kMeshVertComponent = 31
+	kNumericAttribute = 527
+	kDoubleAngleAttribute = 557
+	kDoubleLinearAttribute = 559
+	kFloatAngleAttribute = 561
+	kFloatLinearAttribute = 563
+
+
+class	MSpace:
+	kObject = 2
+	kWorld = 4
+
+
+class	MObject:
+
+	def	__init__(self, node=None):
+		self.node = node
+
+	def	isNull(self):
+		return self.node == None
+
+	def	hasFn(self, fn):
+		if fn == MFn.kDagNode:
+			return self.node.isDag()
+		return MDagPath(self.node).hasFn(fn)
+
+
+class	MDagPath:
+
+	def	__init__(self, node=None):
+		self.node = node
+
+	def	hasFn(self, fn):
+		if fn == MFn.kNurbsCurve:
+			return self.node.type == "nurbsCurve"
+		if fn == MFn.kMesh:
+			return self.node.type == "mesh"
+		if fn == MFn.kTransform:
+			return self.node.type in ("transform", "joint")
+		return False
+
+	def	extendToShape(self):
+		self.node = self.node.shape()
+
+	def	fullPathName(self):
+		return self.node.path()
+
+	def	partialPathName(self):
+		return scene.partialName(self.node)
+
+	def	getAPathTo(obj, path):
+		path.node = obj.node
+	getAPathTo = staticmethod(getAPathTo)
+
+
+class	MTime:
+# times and distances are in the UI units, angles in degrees, as the values of the scene
+
+	kFilm = 6
+
+	def	__init__(self, value=0.0, unit=kFilm):
+		self.time = value
+
+	def	uiUnit():
+		return MTime.kFilm
+	uiUnit = staticmethod(uiUnit)
+
+
+class	MDGContext:
+# the values of the scene don't change with time
+
+	def	__init__(self, time=None):
+		self.time = time
+
+
+class	MAngle:
+
+	kDegrees = 2
+
+	def	__init__(self, value=0.0, unit=kDegrees):
+		self.value = value
+
+	def	asUnits(self, unit):
+		return self.value
+
+	def	uiUnit():
+		return MAngle.kDegrees
+	uiUnit = staticmethod(uiUnit)
+
+
+class	MDistance:
+
+	kCentimeters = 6
+
+	def	__init__(self, value=0.0, unit=kCentimeters):
+		self.value = value
+
+	def	asUnits(self, unit):
+		return self.value
+
+	def	uiUnit():
+		return MDistance.kCentimeters
+	uiUnit = staticmethod(uiUnit)
+
+
+class	attributeObject(MObject):
+
+	def	__init__(self, name):
+		MObject.__init__(self)
+		self.attributeName = name
+
+	def	apiType(self):
+		if self.attributeName in ("tx", "ty", "tz", "translateX", "translateY", "translateZ"):
+			return MFn.kDoubleLinearAttribute
+		if self.attributeName in ("rx", "ry", "rz", "rotateX", "rotateY", "rotateZ"):
+			return MFn.kDoubleAngleAttribute
+		return MFn.kNumericAttribute
+
+
+class	MPlug:
+
+	def	__init__(self, name=""):
+		self.plug = name
+
+	def	name(self):
+		n = scene.find(self.plug)
+		if not n:
+			return self.plug
+		return scene.partialName(n) + self.plug[self.plug.index("."):]
+
+	def	node(self):
+		return MObject(scene.find(self.plug))
+
+	def	attribute(self):
+		return attributeObject(self.plug.split(".", 1)[1])
+
+	def	asDouble(self, context=None):
+		return float(commands().getAttr(self.plug))
+
+	def	connectedTo(self, plugs, asDst, asSrc, status=None):
+		del plugs[:]
+		n = scene.find(self.plug)
+		attr = self.plug.split(".", 1)[1]
+		for source, destination in scene.connections:
+			if asDst and scene.find(destination) == n and destination.split(".", 1)[1] == attr:
+				plugs.append(MPlug(source))
+			if asSrc and scene.find(source) == n and source.split(".", 1)[1] == attr:
+				plugs.append(MPlug(destination))
+		return bool(plugs)
+
+
+class	MFnDependencyNode:
+
+	def	__init__(self, obj=None):
+		self.node = obj and obj.node
+
+	def	setObject(self, obj):
+		self.node = obj.node
+
+	def	name(self):
+		return self.node.name
+
+	def	findPlug(self, attribute, wantNetworkedPlug=False):
+		return MPlug(self.node.path()+"."+attribute)
+
+
+class	messages:
+# MDGMessage, MNodeMessage, MDagMessage, MSceneMessage and MMessage, the callbacks are called by the scene on its changes
+# The scene messages (of files) are never sent.
+
+	kAfterNew = 3
+	kAfterImport = 5
+	kAfterOpen = 7
+	kAfterCreateReference = 41
+	kAfterRemoveReference = 43
+
+	def	addNodeAddedCallback(self, function, nodeType="dependNode", clientData=None):
+		return scene.addCallback("nodeAdded", function, clientData)
+
+	def	addNodeRemovedCallback(self, function, nodeType="dependNode", clientData=None):
+		return scene.addCallback("nodeRemoved", function, clientData)
+
+	def	addConnectionCallback(self, function, clientData=None):
+		return scene.addCallback("connection", function, clientData)
+
+	def	addNameChangedCallback(self, node, function, clientData=None):
+		return scene.addCallback("nameChanged", function, clientData)
+
+	def	addParentAddedCallback(self, function, clientData=None):
+		return scene.addCallback("parentAdded", function, clientData)
+
+	def	addCallback(self, message, function, clientData=None):
+		return scene.addCallback(("scene", message), function, clientData)
+
+	def	removeCallback(self, id):
+		scene.callbacks.pop(id, None)
+
+
+class	MSelectionList:
+
+	def	__init__(self):
+		self.items = []
+
+	def	add(self, name):
+		n = scene.find(name)
+		if not n:
+			raise RuntimeError, "(kInvalidParameter): Object does not exist"
+		self.items.append(n)
+
+	def	length(self):
+		return len(self.items)
+
+	def	getDagPath(self, i, dag, component=None):
+		dag.node = self.items[i]
+
+	def	getDependNode(self, i, obj):
+		obj.node = self.items[i]
+
+
+class	MPoint:
+
+	def	__init__(self, x=0.0, y=0.0, z=0.0, w=1.0):
+		self.x = x
+		self.y = y
+		self.z = z
+		self.w = w
+
+
+class	MVector(MPoint):
+
+	def	__init__(self, x=0.0, y=0.0, z=0.0):
+		MPoint.__init__(self, x, y, z)
+
+
+MFloatPoint = MPoint
+MFloatVector = MVector
+
+
+class	array(list):
+# base of the API array classes
+
+	def	length(self):
+		return len(self)
+
+	def	setLength(self, n):
+		del self[n:]
+		self += [ self.default() ]*(n-len(self))
+
+	def	set(self, value, i):
+		self[i] = value
+
+	def	clear(self):
+		del self[:]
+
+
+class	MPointArray(array):
+	def	default(self): return MPoint()
+
+
+class	MDoubleArray(array):
+	def	default(self): return 0.0
+
+
+class	MIntArray(array):
+	def	default(self): return 0
+
+
+class	MFloatArray(array):
+	def	default(self): return 0.0
+
+
+class	MFloatPointArray(array):
+	def	default(self): return MPoint()
+
+
+class	MVectorArray(array):
+	def	default(self): return MVector()
+
+
+class	MFloatVectorArray(array):
+	def	default(self): return MVector()
+
+
+class	MPlugArray(array):
+	def	default(self): return MPlug()
+
+
+class	MFnNurbsCurve:
+
+	def	__init__(self, dag=None):
+		self.data = None
+		if dag:
+			self.setObject(dag)
+
+	def	setObject(self, dag):
+		self.data = dag.node.shape().data
+
+	def	getCVs(self, points, space=MSpace.kObject):
+		points.clear()
+		for p in self.data.cvs:
+			w = 1.0
+			if len(p) > 3:
+				w = p[3]
+			points.append(MPoint(p[0], p[1], p[2], w))
+
+	def	getKnots(self, knots):
+		knots.clear()
+		knots += self.data.knots
+
+	def	degree(self):
+		return self.data.degree
+
+	def	form(self):
+		return self.data.form+1
+
+	def	numCVs(self):
+		return len(self.data.cvs)
+
+
+class	MFnMesh:
+# the points, faces, normals and UVs (of the default UV set only) of a mesh
+
+	def	__init__(self, dag=None):
+		self.data = None
+		if dag:
+			self.setObject(dag)
+
+	def	setObject(self, dag):
+		self.data = dag.node.shape().data
+
+	def	numVertices(self):
+		return len(self.data.points)
+
+	def	numPolygons(self):
+		return len(self.data.faces)
+
+	def	getPoints(self, points, space=MSpace.kObject):
+		points.clear()
+		for p in self.data.points:
+			points.append(MPoint(p[0], p[1], p[2]))
+
+	def	setPoints(self, points, space=MSpace.kObject):
+		self.data.points = [ [ p.x, p.y, p.z ] for p in points ]
+
+	def	getVertexNormals(self, angleWeighted, normals, space=MSpace.kObject):
+		normals.clear()
+		for n in self.data.normals():
+			normals.append(MVector(n[0], n[1], n[2]))
+
+	def	setVertexNormals(self, normals, vertices, space=MSpace.kObject):
+		pass
+
+	def	getVertices(self, counts, vertices):
+		counts.clear()
+		vertices.clear()
+		for f in self.data.faces:
+			counts.append(len(f))
+			vertices += f
+
+	def	getUVs(self, u, v, uvSet=None):
+		u.clear()
+		v.clear()
+		u += self.data.u
+		v += self.data.v
+
+	def	setUVs(self, u, v, uvSet=None):
+		self.data.u = list(u)
+		self.data.v = list(v)
+
+	def	getAssignedUVs(self, counts, ids, uvSet=None):
+		counts.clear()
+		ids.clear()
+		if self.data.uvIds:
+			for f in self.data.faces:
+				counts.append(len(f))
+			ids += self.data.uvIds
+		else:
+			counts += [ 0 ]*len(self.data.faces)
+
+	def	assignUVs(self, counts, ids, uvSet=None):
+		self.data.uvIds = list(ids)
+
+
+class	api:
+# the module maya.OpenMaya
+
+	MFn = MFn
+	MSpace = MSpace
+	MObject = MObject
+	MDagPath = MDagPath
+	MSelectionList = MSelectionList
+	MPoint = MPoint
+	MPointArray = MPointArray
+	MDoubleArray = MDoubleArray
+	MIntArray = MIntArray
+	MFloatArray = MFloatArray
+	MFloatPoint = MFloatPoint
+	MFloatPointArray = MFloatPointArray
+	MVector = MVector
+	MVectorArray = MVectorArray
+	MFloatVector = MFloatVector
+	MFloatVectorArray = MFloatVectorArray
+	MFnNurbsCurve = MFnNurbsCurve
+	MFnMesh = MFnMesh
+	MPlug = MPlug
+	MPlugArray = MPlugArray
+	MTime = MTime
+	MDGContext = MDGContext
+	MAngle = MAngle
+	MDistance = MDistance
+	MFnDependencyNode = MFnDependencyNode
+	MDGMessage = messages()
+	MNodeMessage = messages()
+	MDagMessage = messages()
+	MSceneMessage = messages()
+	MMessage = messages()
+
+	def	__getattr__(self, name):
+		raise AttributeError, "maya.OpenMaya."+name+" is not modelled by jc.fakemaya"
+
+
+###############################################################################
+
+
+def	install():
+# put the stand-in modules in place of maya, maya.cmds, maya.mel, maya.OpenMaya, maya.OpenMayaAnim and maya.utils
+
+	maya = types.ModuleType("maya")
+	maya.__path__ = []
+	maya.cmds = recording(commands(), "")
+	maya.mel = recording(melCommands(), "mel.")
+	maya.OpenMaya = recording(api(), "OpenMaya.")
+	maya.OpenMayaAnim = recording(api(), "OpenMayaAnim.")
+	maya.utils = types.ModuleType("maya.utils")
+	maya.utils.executeDeferred = lambda f, *args: f(*args)
+	sys.modules["maya"] = maya
+	sys.modules["maya.cmds"] = maya.cmds
+	sys.modules["maya.mel"] = maya.mel
+	sys.modules["maya.OpenMaya"] = maya.OpenMaya
+	sys.modules["maya.OpenMayaAnim"] = maya.OpenMayaAnim
+	sys.modules["maya.utils"] = maya.utils
@@ -0,0 +1,486 @@
+# geometry.py
+# This is a collection of geometric queries written in pure python.
+# They don't depend on Maya, so they can be tested and benchmarked with any python interpreter.
+#
+# Installation:
+# This file implements the module called jc.geometry.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import math, bisect
+
+
+
+def	distanceToSegment2D(p, a, b):
+# distance between point p and segment ab, projected along z
+
+	dx = b[0] - a[0]
+	dy = b[1] - a[1]
+	l = dx*dx + dy*dy
+	if l > 0:
+		t = ((p[0]-a[0])*dx + (p[1]-a[1])*dy) / l
+		if t < 0:
+			t = 0.0
+		elif t > 1:
+			t = 1.0
+	else:
+		t = 0.0
+	x = a[0] + t*dx - p[0]
+	y = a[1] + t*dy - p[1]
+	return math.sqrt(x*x + y*y)
+
+
+class	segmentGrid:
+# Uniform grid in XY-plane bucketing the segments of polylines.
+# Each segment is put into every cell overlapped by its bounding box expanded by the tolerance,
+# so that a point only needs to be tested against the segments in its own cell.
+
+	def	__init__(self, polylines, tolerance, cellSize=None):
+		self.tolerance = tolerance
+		self.segments = []		# (polyline index, a, b)
+		for i in range(len(polylines)):
+			pts = polylines[i]
+			for j in range(len(pts)-1):
+				self.segments.append((i, pts[j], pts[j+1]))
+
+		if not cellSize:
+			# average segment length, but never smaller than the tolerance
+			total = 0.0
+			for i, a, b in self.segments:
+				total += math.sqrt((b[0]-a[0])**2 + (b[1]-a[1])**2)
+			cellSize = tolerance
+			if self.segments:
+				cellSize = max(tolerance, total/len(self.segments))
+		self.cellSize = cellSize
+
+		self.cells = {}
+		for k in range(len(self.segments)):
+			i, a, b = self.segments[k]
+			x0, y0 = self.cell(min(a[0], b[0]) - tolerance, min(a[1], b[1]) - tolerance)
+			x1, y1 = self.cell(max(a[0], b[0]) + tolerance, max(a[1], b[1]) + tolerance)
+			for x in range(x0, x1+1):
+				for y in range(y0, y1+1):
+					self.cells.setdefault((x, y), []).append(k)
+
+	def	cell(self, x, y):
+		return int(math.floor(x/self.cellSize)), int(math.floor(y/self.cellSize))
+
+	def	nearest(self, p):
+	# return: (polyline index, distance) of the lowest indexed polyline within tolerance of p, (None, None) if none
+
+		found = None
+		distance = None
+		for k in self.cells.get(self.cell(p[0], p[1]), []):
+			i, a, b = self.segments[k]
+			if found != None and i > found:
+				continue
+			d = distanceToSegment2D(p, a, b)
+			if d <= self.tolerance:
+				if found == None or i < found or d < distance:
+					found = i
+					distance = d
+		return found, distance
+
+
+def	matchPointsToPolylines(points, polylines, tolerance=0.01, mirror=False):
+# Find which polyline each point lies on, this is what jc.clothes does to find border vertices on pattern curves.
+#	points: list of (x,y,z)
+#	polylines: list of lists of (x,y,z), all in XY-plane
+#	mirror: points at -x are matched by their reflection at +x, otherwise they're ignored
+# return: list of polyline indices (None if not matched) in the order of points, the first polyline wins if more than one are within tolerance
+
+	grid = segmentGrid(polylines, tolerance)
+	result = []
+	for p in points:
+		if p[0] < 0:
+			if not mirror:
+				result.append(None)
+				continue
+			p = (-p[0], p[1], p[2])
+		result.append(grid.nearest(p)[0])
+	return result
+
+
+def	circlePolylineIntersections(center, radius, points, params, start=0, end=None):
+# Intersections of a circle in XY-plane with a polyline, projected along z.
+#	points, params: points of the polyline and the curve parameters at them
+#	start, end: range of indices of the segments to be tested
+# return: list of (parameter on polyline, angle on circle), angle is in degrees anti-clockwise from +y within [0,360)
+# which is the parameterization of the circle created by cmds.circle(nr=(0,0,1), sw=360, s=360)
+
+	cx = center[0]
+	cy = center[1]
+	rr = radius*radius
+	hits = []
+	last = len(points)-2
+	if end == None or end > last+1:
+		end = last+1
+	for j in range(start, end):
+		ax = points[j][0] - cx
+		ay = points[j][1] - cy
+		dx = points[j+1][0] - points[j][0]
+		dy = points[j+1][1] - points[j][1]
+
+		# |a + t*d|^2 = r^2
+		a = dx*dx + dy*dy
+		if a == 0:
+			continue
+		b = 2*(ax*dx + ay*dy)
+		c = ax*ax + ay*ay - rr
+		disc = b*b - 4*a*c
+		if disc < 0:
+			continue
+		disc = math.sqrt(disc)
+		for t in ((-b - disc)/(2*a), (-b + disc)/(2*a)):
+			# shared end points are counted once, on the segment which starts there
+			if t < 0 or t > 1 or (t == 1 and j < last):
+				continue
+			x = ax + t*dx
+			y = ay + t*dy
+			angle = math.degrees(math.atan2(y, x)) - 90
+			while angle < 0:
+				angle += 360
+			while angle >= 360:
+				angle -= 360
+			hits.append((params[j] + t*(params[j+1]-params[j]), angle))
+	return hits
+
+
+class	polyline:
+# A polyline with its segments grouped into blocks of known bounding boxes,
+# blocks which a circle can't meet are skipped as a whole.
+
+	blockSize = 32
+
+	def	__init__(self, points, params):
+		self.points = points
+		self.params = params
+		self.blocks = []
+		for j0 in range(0, len(points)-1, self.blockSize):
+			j1 = min(j0+self.blockSize, len(points)-1)
+			xs = [ p[0] for p in points[j0:j1+1] ]
+			ys = [ p[1] for p in points[j0:j1+1] ]
+			self.blocks.append((j0, j1, min(xs), min(ys), max(xs), max(ys)))
+
+	def	circleIntersections(self, center, radius, start=0):
+	# same as circlePolylineIntersections()
+		cx = center[0]
+		cy = center[1]
+		hits = []
+		for j0, j1, x0, y0, x1, y1 in self.blocks:
+			if j1 <= start:
+				continue
+			if x0 > cx+radius or x1 < cx-radius or y0 > cy+radius or y1 < cy-radius:
+				continue
+			# the block is entirely inside the circle if its farthest corner is
+			dx = max(abs(x0-cx), abs(x1-cx))
+			dy = max(abs(y0-cy), abs(y1-cy))
+			if dx*dx + dy*dy < radius*radius:
+				continue
+			hits += circlePolylineIntersections(center, radius, self.points, self.params, max(start, j0), j1)
+		return hits
+
+
+def	solveChainRotations(start, lengths, points, params, startU=0.0):
+# Rotations of a flattened joint chain in XY-plane such that all its joints lie on a polyline.
+# It's equivalent to what jc.clothes.createStitch did by intersecting a circle around each joint with the pattern curve:
+# only the intersections further along the curve than the current joint are considered,
+# the rotation is taken from the smallest circle angle and the next joint is at the smallest curve parameter among them.
+#	start: position of the root joint
+#	lengths: distance from each joint to its child (the last joint excluded)
+#	points, params: polyline along the curve and the curve parameters at its points
+# return: local rotation about z in degrees for each joint in lengths
+
+	line = polyline(points, params)
+	rotations = []
+	offset = 360.0
+	x = start[0]
+	y = start[1]
+	u = startU
+	for r in lengths:
+		j = max(bisect.bisect_right(params, u) - 1, 0)
+		hits = [ h for h in line.circleIntersections((x, y), r, j) if h[0] > u ]
+		if not hits:
+			raise Exception, "can't determine rotation of last joint, pattern curve too short"
+
+		rz = min([ h[1] for h in hits ]) - offset + 90
+		rotations.append(rz)
+
+		# world rotation of the bone is the sum of all the rotations so far
+		offset += rz
+		angle = math.radians(offset - 360)
+		x += r*math.cos(angle)
+		y += r*math.sin(angle)
+		u = min([ h[0] for h in hits ])
+
+	return rotations
+
+
+def	edgeChains(edges):
+# Assemble edges into chains of continuous edges by walking a vertex adjacency map, each edge is visited once.
+#	edges: list of (vertex, vertex) pairs
+# return: list of vertex sequences in the order of the first edge of each chain,
+# a chain runs from the lower to the higher vertex of its first edge and is extended at both ends,
+# a closed chain starts and ends with the same vertex,
+# at a junction the chain continues along the first unvisited edge in the list
+
+	adjacency = {}
+	for k in range(len(edges)):
+		a, b = edges[k]
+		adjacency.setdefault(a, []).append(k)
+		adjacency.setdefault(b, []).append(k)
+	next = dict([ (v, 0) for v in adjacency.keys() ])	# position of the first unvisited edge in adjacency
+	visited = [ False ]*len(edges)
+
+	def	walk(v):
+		vertices = []
+		while True:
+			l = adjacency[v]
+			i = next[v]
+			while i < len(l) and visited[l[i]]:
+				i += 1
+			next[v] = i
+			if i == len(l):
+				return vertices
+			k = l[i]
+			visited[k] = True
+			a, b = edges[k]
+			if a == v:
+				v = b
+			else:
+				v = a
+			vertices.append(v)
+
+	chains = []
+	for k in range(len(edges)):
+		if visited[k]:
+			continue
+		visited[k] = True
+		a, b = sorted(edges[k])
+		back = walk(b)
+		front = walk(a)
+		front.reverse()
+		chains.append(front + [ a, b ] + back)
+	return chains
+
+
+def	coincidentPoints(points, targets, tolerance=0.0001):
+# Find which points coincide with any of the targets, ie. within tolerance along each axis.
+# Targets are hashed into a grid of cells as big as the tolerance, so each point only needs to look at the 27 cells around it.
+#	points, targets: list of (x,y,z)
+# return: list of booleans in the order of points
+
+	size = float(tolerance)
+	if size <= 0:
+		raise Exception, "tolerance must be positive"
+	def	cell(p): return int(math.floor(p[0]/size)), int(math.floor(p[1]/size)), int(math.floor(p[2]/size))
+
+	cells = {}
+	for p in targets:
+		cells.setdefault(cell(p), []).append(p)
+
+	result = []
+	for p in points:
+		x, y, z = cell(p)
+		found = False
+		for i in (x-1, x, x+1):
+			for j in (y-1, y, y+1):
+				for k in (z-1, z, z+1):
+					for q in cells.get((i, j, k), ()):
+						if abs(p[0]-q[0]) < tolerance and abs(p[1]-q[1]) < tolerance and abs(p[2]-q[2]) < tolerance:
+							found = True
+							break
+					if found: break
+				if found: break
+			if found: break
+		result.append(found)
+	return result
+
+
+class	endpointGraph:
+# Curves joined at their end points, eg. the boundary curves of a pattern.
+# The end points are hashed once into a grid of cells as big as the tolerance, so the curves touching an end point
+# are found by looking at the 27 cells around it, and closure, ordering and adjacency take linear time instead of testing every pair of curves.
+#	curves: list of (key, start point, end point), key is anything hashable, eg. the name of the curve
+#	tolerance: end points closer than it are joined
+
+	def	__init__(self, curves, tolerance=0.0001):
+		self.tolerance = float(tolerance)
+		if self.tolerance <= 0:
+			raise Exception, "tolerance must be positive"
+		self.keys = []
+		self.ends = {}		# key: (start point, end point)
+		self.cells = {}		# cell: list of (key, 0 for start or 1 for end)
+		for key, start, end in curves:
+			if key in self.ends:
+				continue
+			self.keys.append(key)
+			self.ends[key] = (start, end)
+			self.cells.setdefault(self.cell(start), []).append((key, 0))
+			self.cells.setdefault(self.cell(end), []).append((key, 1))
+
+	def	cell(self, p):
+		size = self.tolerance
+		return int(math.floor(p[0]/size)), int(math.floor(p[1]/size)), int(math.floor(p[2]/size))
+
+	def	touching(self, p, exclude=None):
+	# return: list of (key, 0 or 1) of the end points within tolerance of p, except those of the curve exclude
+		x, y, z = self.cell(p)
+		result = []
+		for i in (x-1, x, x+1):
+			for j in (y-1, y, y+1):
+				for k in (z-1, z, z+1):
+					for key, end in self.cells.get((i, j, k), ()):
+						if key == exclude:
+							continue
+						q = self.ends[key][end]
+						if (p[0]-q[0])**2 + (p[1]-q[1])**2 + (p[2]-q[2])**2 < self.tolerance**2:
+							result.append((key, end))
+		return result
+
+	def	isClosed(self):
+	# return: True if both ends of every curve are joined to another curve, or the only curve is joined to itself
+		if len(self.keys) == 1:
+			start, end = self.ends[self.keys[0]]
+			return (start[0]-end[0])**2 + (start[1]-end[1])**2 + (start[2]-end[2])**2 < self.tolerance**2
+		for key in self.keys:
+			for p in self.ends[key]:
+				if not self.touching(p, key):
+					return False
+		return True
+
+	def	order(self, first=None, reverseFirst=False):
+	# Walk from the end of the first curve to the next curve joined to it, and so on until all curves are visited.
+	# A curve joined by its end point is reversed.
+	# return: list of (key, reversed) in the order of walking
+		if not self.keys:
+			return []
+		if first == None:
+			first = self.keys[0]
+		result = [ (first, reverseFirst) ]
+		visited = set([ first ])
+		while len(result) < len(self.keys):
+			key, reverse = result[-1]
+			p = self.ends[key][not reverse and 1 or 0]
+			found = None
+			for other, end in self.touching(p, key):
+				if other not in visited:
+					found = (other, end == 1)
+					break
+			if not found:
+				raise Exception, "fail to find next connecting curve"
+			result.append(found)
+			visited.add(found[0])
+		return result
+
+	def	adjacentPairs(self):
+	# return: list of (a, b) where the end of curve a is joined to the start of curve b, at most one pair for any two curves,
+	#	in the order of the curves as given, ie. the same as testing every pair (a, b) and then (b, a)
+		index = dict([ (self.keys[i], i) for i in range(len(self.keys)) ])
+		pairs = {}
+		for a in self.keys:
+			for b, end in self.touching(self.ends[a][1], a):
+				if end != 0:
+					continue
+				i = min(index[a], index[b])
+				j = max(index[a], index[b])
+				if (i, j) not in pairs or index[a] < index[b]:
+					pairs[(i, j)] = (a, b)
+		return [ pairs[k] for k in sorted(pairs.keys()) ]
+
+
+def	faceNormals(points, counts, vertices):
+# Normals (by Newell's method, their length is twice the area of the face) and centroids (average of the vertices) of the faces of a mesh
+#	points: (x, y, z) of each vertex
+#	counts, vertices: number of vertices of each face and the vertex indices of each face one after another, as given by MFnMesh.getVertices()
+# return: (normals, centroids)
+
+	normals = []
+	centroids = []
+	k = 0
+	for n in counts:
+		face = [ points[i] for i in vertices[k:k+n] ]
+		k += n
+		nx = ny = nz = 0.0
+		cx = cy = cz = 0.0
+		a = face[-1]
+		for b in face:
+			nx += (a[1]-b[1])*(a[2]+b[2])
+			ny += (a[2]-b[2])*(a[0]+b[0])
+			nz += (a[0]-b[0])*(a[1]+b[1])
+			cx += b[0]
+			cy += b[1]
+			cz += b[2]
+			a = b
+		normals.append((nx, ny, nz))
+		centroids.append((cx/n, cy/n, cz/n))
+	return normals, centroids
+
+
+def	facingFaces(normals, centroids, cameras):
+# Faces facing any of the cameras, ie. not facing away from it, a face is tested against the cameras until one it faces is found.
+#	cameras: list of (eye, view direction, orthographic) in world space, eg. one for each camera at each sampled time
+# return: list of booleans, True for the faces facing any of the cameras
+
+	facing = [ False ]*len(normals)
+	remaining = range(len(normals))
+	for eye, direction, orthographic in cameras:
+		if not remaining:
+			break
+		left = []
+		if orthographic:
+			dx, dy, dz = direction
+			for i in remaining:
+				n = normals[i]
+				if dx*n[0] + dy*n[1] + dz*n[2] <= 0:
+					facing[i] = True
+				else:
+					left.append(i)
+		else:
+			ex, ey, ez = eye
+			for i in remaining:
+				n = normals[i]
+				c = centroids[i]
+				if (c[0]-ex)*n[0] + (c[1]-ey)*n[1] + (c[2]-ez)*n[2] <= 0:
+					facing[i] = True
+				else:
+					left.append(i)
+		remaining = left
+	return facing
+
+
+def	indexRanges(indices):
+# return: list of (first, last) of the runs of consecutive indices, eg. for component names like "f[first:last]"
+	result = []
+	for i in sorted(indices):
+		if result and result[-1][1] == i-1:
+			result[-1][1] = i
+		else:
+			result.append([ i, i ])
+	return [ tuple(r) for r in result ]
+
+
+def	uvRegion(u):
+# return: index of the U region of u, ie. 0 for U=0-1, 1 for U=1-2, ..., U below 0 is taken as region 1
+	region = int(math.ceil(u)) - 1
+	if region < 0:
+		region = 1
+	return region
+
+
+def	mirrorUVs(us):
+# return: u of each UV flipped upon the middle of its region
+	return [ 2*uvRegion(u) + 1 - u for u in us ]
+
+
+def	seamVertices(points, mirrored, distance=0.005):
+# Vertices on the mirror plane, ie. those close enough to their mirrored copies to be merged with them
+#	points, mirrored: (x, y, z) of each vertex and of its mirrored copy, in the same order
+# return: list of vertex indices
+	d = distance*distance
+	return [ i for i in range(len(points))
+		if (points[i][0]-mirrored[i][0])**2 + (points[i][1]-mirrored[i][1])**2 + (points[i][2]-mirrored[i][2])**2 <= d ]
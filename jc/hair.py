@@ -8,7 +8,7 @@
 # This file implements the module called jc.hair.
 # Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
 # Add PYTHONPATH to point to script directory in Maya.env.
-# menu.py is prerequisite.
+# menu.py, helper.py, batch.py and nurbs.py are prerequisite.
 #
 # URL:
 # http://sites.google.com/site/cgriders/jc/hair
@@ -21,6 +21,8 @@ import maya.mel as mel
 import maya.OpenMaya as OpenMaya
 import jc.menu
 import jc.helper
+import jc.batch
+import jc.nurbs
 
 
 __moduleName = "jc.hair"
@@ -950,25 +952,7 @@ def	getShaveGlobalsPresetsCallback():
 
 
 def	getPresets(node):
-	presetPaths = []
-	if 'MAYA_LOCATION' in os.environ:
-		presetPaths.append(os.path.join(os.environ['MAYA_LOCATION'], "attrPresets"))
-
-	if 'MAYA_PRESET_PATH' in os.environ:
-		for p in os.environ['MAYA_PRESET_PATH'].split([':',';'][cmds.about(nt=True)]):
-			presetPaths.append(os.path.join(p, "attrPresets"))
-
-	presetPaths.append(os.path.join(cmds.internalVar(ups=True), "attrPresets"))
-
-	p = [ "None" ]
-	for presetPath in presetPaths:
-		if os.path.isdir(presetPath):
-			for root, dirs, files in os.walk(presetPath):
-				if os.path.basename(root) == node:
-					for f in files:
-						if f.endswith('.mel'):
-							p.append(f[:-4])
-	return p
+	return jc.helper.getPresets(node)
 
 
 def	directionOptions():
@@ -1119,6 +1103,40 @@ def	displaceOptions():
 	return [ "Rotation", "Translation" ]
 
 
+def	__isoparm(patch, direction, param):
+# return: isoparm of the surface along the given direction ("U" or "V") at param of the other direction, as jc.nurbs.curve
+# the surface is read by one API query instead of a pointOnCurve on the isoparm for each point
+
+	slist = OpenMaya.MSelectionList()
+	slist.add(patch)
+	dag = OpenMaya.MDagPath()
+	slist.getDagPath(0, dag)
+	if not dag.hasFn(OpenMaya.MFn.kNurbsSurface):
+		dag.extendToShape()
+
+	surfaceFn = OpenMaya.MFnNurbsSurface(dag)
+	points = OpenMaya.MPointArray()
+	surfaceFn.getCVs(points, OpenMaya.MSpace.kWorld)
+	knotsU = OpenMaya.MDoubleArray()
+	knotsV = OpenMaya.MDoubleArray()
+	surfaceFn.getKnotsInU(knotsU)
+	surfaceFn.getKnotsInV(knotsV)
+	cvs = [ (points[i].x, points[i].y, points[i].z, points[i].w) for i in range(points.length()) ]
+	degreeU = surfaceFn.degreeU()
+	degreeV = surfaceFn.degreeV()
+	formU = surfaceFn.formInU()-1
+	formV = surfaceFn.formInV()-1
+
+	if direction.upper() == "U":
+		return jc.nurbs.isoparm(cvs, list(knotsU), list(knotsV), degreeU, degreeV, formU, formV, param)
+
+	# transpose the CVs to V-major order
+	numU = surfaceFn.numCVsInU()
+	numV = surfaceFn.numCVsInV()
+	cvs = [ cvs[i*numV+j] for j in range(numV) for i in range(numU) ]
+	return jc.nurbs.isoparm(cvs, list(knotsV), list(knotsU), degreeV, degreeU, formV, formU, param)
+
+
 def	createJointChain(*args, **keywords):
 # usage: select NURBS patches
 
@@ -1140,13 +1158,10 @@ def	createJointChain(*args, **keywords):
 				direction = "uv".replace(hairDirection.lower(), "")
 				min = cmds.getAttr(patch+'.minValue'+direction.upper())
 				max = cmds.getAttr(patch+'.maxValue'+direction.upper())
-				isoparm = "%s.%s[%f]" % (patch, direction, (min+max)/2)
 				cmds.select(patch, r=True)
 				knots = jc.helper.getKnots(direction=hairDirection)
-				points = []
-				for knot in knots:
-					cmds.select(isoparm, r=True)
-					points.append(cmds.pointOnCurve(p=True, pr=knot, top=False))
+				isoparm = __isoparm(patch, hairDirection, (min+max)/2)
+				points, tangents = isoparm.evaluate(knots, False)
 
 				# create joint chain
 				cmds.select(cl=True)
@@ -2158,6 +2173,8 @@ def	hairstyleOptions():
 
 
 def	batchRender(**keywords):
+# Render the frame range in chunks of frames by a number of concurrent render processes, see jc/batch.py
+# resume: skip frames whose images exist and are not empty
 
 	if not cmds.file(q=True, sn=True):
 		raise Exception, "scene must be saved"
@@ -2172,27 +2189,47 @@ def	batchRender(**keywords):
 	startNow = True
 	saveScene = True
 	shutdown = False
+	workers = 1
+	chunk = 10
+	resume = True
 	if 'startNow' in keywords.keys(): startNow = keywords['startNow']
 	if 'saveScene' in keywords.keys(): saveScene = keywords['saveScene']
 	if 'shutdown' in keywords.keys(): shutdown = keywords['shutdown']
+	if 'workers' in keywords.keys(): workers = keywords['workers']
+	if 'chunk' in keywords.keys(): chunk = keywords['chunk']
+	if 'resume' in keywords.keys(): resume = keywords['resume']
 	
 	startFrame = None
 	endFrame = None
 	if 'startFrame' in keywords.keys(): startFrame = keywords['startFrame']
 	if 'endFrame' in keywords.keys(): endFrame = keywords['endFrame']
-	if startFrame != None and endFrame != None and startFrame > endFrame:
+	if startFrame == None: startFrame = int(cmds.getAttr("defaultRenderGlobals.startFrame"))
+	if endFrame == None: endFrame = int(cmds.getAttr("defaultRenderGlobals.endFrame"))
+	if startFrame > endFrame:
 		raise Exception, "argument Error: startFrame > endFrame"
 
-	render = os.path.join(os.path.abspath(os.getenv('MAYA_LOCATION')), "bin")
+	binDirectory = os.path.join(os.path.abspath(os.getenv('MAYA_LOCATION')), "bin")
 	if cmds.about(nt=True):
-		render = os.path.join(render, "render.exe")
+		render = os.path.join(binDirectory, "render.exe")
+		mayapy = os.path.join(binDirectory, "mayapy.exe")
 	else:
-		render = os.path.join(render, "Render")
+		render = os.path.join(binDirectory, "Render")
+		mayapy = os.path.join(binDirectory, "mayapy")
+	batch = os.path.splitext(os.path.abspath(jc.batch.__file__))[0]+".py"
 
 	projectDirectory = cmds.workspace(q=True, rd=True)
 
 	currentScene = os.path.abspath(cmds.file(q=True, sn=True))
 
+	# image path with the frame number as '#'
+	images = ""
+	if resume:
+		padding = cmds.getAttr("defaultRenderGlobals.extensionPadding")
+		if renderLayer != None and renderLayer != "None":
+			images = cmds.renderSettings(fp=True, gin="#"*padding, cam=camera, lyr=renderLayer)[0]
+		else:
+			images = cmds.renderSettings(fp=True, gin="#"*padding, cam=camera)[0]
+
 	batchCmdPath = projectDirectory
 	if 'scene' in cmds.workspace(q=True, frl=True):
 		scene = cmds.file(q=True, sn=True, shn=True).replace('.', '_')
@@ -2206,36 +2243,44 @@ def	batchRender(**keywords):
 	batchCmd  = ""
 	if cmds.about(nt=True):
 		batchCmd += "echo off\n"
+		batchCmd += "set mayapy="+quote+mayapy+quote+"\n"
+		batchCmd += "set batch="+quote+batch+quote+"\n"
 		batchCmd += "set render="+quote+render+quote+"\n"
 		batchCmd += "set proj="+quote+projectDirectory+quote+"\n"
 		batchCmd += "set scene="+quote+currentScene+quote+"\n"
 		batchCmd += "set camera="+quote+camera+quote+"\n"
 		if renderLayer != None and renderLayer != "None":
 			batchCmd += "set layer="+quote+renderLayer+quote+"\n"
+		if images:
+			batchCmd += "set images="+quote+images+quote+"\n"
 		batchCmd += "set MI_MAYA_BATCH_OPTIONS="+quote+"NumThreadAuto=1;MemLimitAuto=1;LogVerbosity=5"+quote+"\n"
 		batchCmd += "echo on\n"
-		if startFrame != None and endFrame != None and endFrame >= startFrame:
-			batchCmd += "%%render%% -r mr -proj %%proj%% -cam %%camera%% -s %d -e %d" % (startFrame, endFrame)
-		else:
-			batchCmd += "%render% -r mr -proj %proj% -cam %camera%"
+		batchCmd += "%%mayapy%% %%batch%% -s %d -e %d -w %d -c %d" % (startFrame, endFrame, workers, chunk)
+		if images:
+			batchCmd += " -o %images%"
+		batchCmd += " -- %render% -r mr -proj %proj% -cam %camera% -s {start} -e {end}"
 		if renderLayer != None and renderLayer != "None":
 			batchCmd += " -rl %layer%"
 		batchCmd += " %scene%\n"
 	else:
-		batchCmd += "render="+quote+render+quote+"\n"
-		batchCmd += "proj="+quote+projectDirectory+quote+"\n"
-		batchCmd += "scene="+quote+currentScene+quote+"\n"
-		batchCmd += "camera="+quote+camera+quote+"\n"
+		batchCmd += "mayapy=\""+mayapy+"\"\n"
+		batchCmd += "batch=\""+batch+"\"\n"
+		batchCmd += "render=\""+render+"\"\n"
+		batchCmd += "proj=\""+projectDirectory+"\"\n"
+		batchCmd += "scene=\""+currentScene+"\"\n"
+		batchCmd += "camera=\""+camera+"\"\n"
 		if renderLayer != None and renderLayer != "None":
-			batchCmd += "layer="+quote+renderLayer+quote+"\n"
-		batchCmd += "export MI_MAYA_BATCH_OPTIONS="+quote+"NumThreadAuto=1;MemLimitAuto=1;LogVerbosity=5"+quote+"\n"
-		if startFrame != None and endFrame != None and endFrame >= startFrame:
-			batchCmd += "$render -r mr -proj $proj -cam $camera -s %d -e %d" % (startFrame, endFrame)
-		else:
-			batchCmd += "$render -r mr -proj $proj -cam $camera"
+			batchCmd += "layer=\""+renderLayer+"\"\n"
+		if images:
+			batchCmd += "images=\""+images+"\"\n"
+		batchCmd += "export MI_MAYA_BATCH_OPTIONS=\"NumThreadAuto=1;MemLimitAuto=1;LogVerbosity=5\"\n"
+		batchCmd += "\"$mayapy\" \"$batch\" -s %d -e %d -w %d -c %d" % (startFrame, endFrame, workers, chunk)
+		if images:
+			batchCmd += " -o \"$images\""
+		batchCmd += " -- \"$render\" -r mr -proj \"$proj\" -cam \"$camera\" -s {start} -e {end}"
 		if renderLayer != None and renderLayer != "None":
-			batchCmd += " -rl $layer"
-		batchCmd += " $scene\n"
+			batchCmd += " -rl \"$layer\""
+		batchCmd += " \"$scene\"\n"
 
 	if shutdown:
 		if cmds.about(nt=True):
@@ -2255,6 +2300,8 @@ def	batchRender(**keywords):
 	# check paths existence
 	if not os.path.exists(render):
 		raise Exception, "missing file "+render
+	if not os.path.exists(mayapy):
+		raise Exception, "missing file "+mayapy
 	if not os.path.exists(batchCmdPath):
 		raise Exception, "missing file "+batchCmdPath
 	if not os.path.exists(currentScene):
@@ -2682,57 +2729,60 @@ def	doMenu(do=True, parent=None):
 			m = jc.menu.createMenu(__moduleName, parent)
 
 		i = jc.menu.commandItem(m, __moduleName+".hairstyleBuilder", "Hairstyle Builder", annotation="Open Hairstyle Builder")
-		jc.menu.listOption(i, "hairstyle", hairstyleOptions()[0], hairstyleOptions)
+		jc.menu.listOption(i, "hairstyle", jc.menu.first(hairstyleOptions), hairstyleOptions)
 
 		jc.menu.dividerItem(m)
 
 		i = jc.menu.commandItem(m, __moduleName+".createHairSystems", "Create Hair Systems", annotation="Select NURBS patch(es)")
-		jc.menu.listOption(i, "hair Direction", directionOptions()[0], directionOptions, True)
-		jc.menu.listOption(i, "extract", extractOptions()[0], extractOptions, True)
+		jc.menu.listOption(i, "hair Direction", jc.menu.first(directionOptions), directionOptions, True)
+		jc.menu.listOption(i, "extract", jc.menu.first(extractOptions), extractOptions, True)
 		jc.menu.integerOption(i, "curve Count", 5)
 		jc.menu.booleanOption(i, "visible Only", True, True)
-		jc.menu.listOption(i, "hair System Preset", getHairSystemPresetsCallback()[0], getHairSystemPresetsCallback)
+		jc.menu.listOption(i, "hair System Preset", jc.menu.first(getHairSystemPresetsCallback), getHairSystemPresetsCallback)
 
 		i = jc.menu.commandItem(m, __moduleName+".convertPFX2Shave", "Convert PFX to Shave", annotation="Select pfxHair nodes")
-		jc.menu.listOption(i, "shave Preset", getShaveHairPresetsCallback()[0], getShaveHairPresetsCallback)
+		jc.menu.listOption(i, "shave Preset", jc.menu.first(getShaveHairPresetsCallback), getShaveHairPresetsCallback)
 		jc.menu.booleanOption(i, "match Hair Count", True)
-		jc.menu.listOption(i, "shave Nodes", shaveNodesOptions()[0], shaveNodesOptions)
+		jc.menu.listOption(i, "shave Nodes", jc.menu.first(shaveNodesOptions), shaveNodesOptions)
 		jc.menu.booleanOption(i, "delete History", False, True)
 
 		i = jc.menu.commandItem(m, __moduleName+".createHairs", "Create Hairs", annotation="Select NURBS patch(es)")
 		jc.menu.listOption(i, "hair Direction", directionOptions()[1], directionOptions, True)
-		jc.menu.listOption(i, "extract", extractOptions()[0], extractOptions, True)
+		jc.menu.listOption(i, "extract", jc.menu.first(extractOptions), extractOptions, True)
 		jc.menu.integerOption(i, "curve Count", 5)
 		jc.menu.booleanOption(i, "visible Only", True, True)
 		jc.menu.booleanOption(i, "match Hair Count", True)
-		jc.menu.listOption(i, "shave Nodes", shaveNodesOptions()[0], shaveNodesOptions)
-		jc.menu.listOption(i, "hair System Preset", getHairSystemPresetsCallback()[0], getHairSystemPresetsCallback)
-		jc.menu.listOption(i, "shave Preset", getShaveHairPresetsCallback()[0], getShaveHairPresetsCallback)
-		jc.menu.listOption(i, "shave Globals Preset", getShaveGlobalsPresetsCallback()[0], getShaveGlobalsPresetsCallback, True)
+		jc.menu.listOption(i, "shave Nodes", jc.menu.first(shaveNodesOptions), shaveNodesOptions)
+		jc.menu.listOption(i, "hair System Preset", jc.menu.first(getHairSystemPresetsCallback), getHairSystemPresetsCallback)
+		jc.menu.listOption(i, "shave Preset", jc.menu.first(getShaveHairPresetsCallback), getShaveHairPresetsCallback)
+		jc.menu.listOption(i, "shave Globals Preset", jc.menu.first(getShaveGlobalsPresetsCallback), getShaveGlobalsPresetsCallback, True)
 		jc.menu.booleanOption(i, "polygon", True)
-		jc.menu.listOption(i, "render Layer", getRenderLayersCallback()[0], getRenderLayersCallback, True)
-		jc.menu.listOption(i, "render Layer Shadow", getRenderLayersCallback()[0], getRenderLayersCallback, True)
+		jc.menu.listOption(i, "render Layer", jc.menu.first(getRenderLayersCallback), getRenderLayersCallback, True)
+		jc.menu.listOption(i, "render Layer Shadow", jc.menu.first(getRenderLayersCallback), getRenderLayersCallback, True)
 		jc.menu.booleanOption(i, "delete History", False, True)
 
 		i = jc.menu.commandItem(m, __moduleName+".createPolygonHair", "Create Polygon Hair", annotation="Select pfxHair nodes")
 		#jc.menu.stringOption(i, "file Name", "")
-		#jc.menu.listOption(i, "file Type", fileTypeOptions()[0], fileTypeOptions)
-		jc.menu.listOption(i, "render Layer Shadow", getRenderLayersCallback()[0], getRenderLayersCallback, True)
+		#jc.menu.listOption(i, "file Type", jc.menu.first(fileTypeOptions), fileTypeOptions)
+		jc.menu.listOption(i, "render Layer Shadow", jc.menu.first(getRenderLayersCallback), getRenderLayersCallback, True)
 		jc.menu.integerOption(i, "poly Limit", 500000)
 		jc.menu.booleanOption(i, "delete History", False, True)
 
 		i = jc.menu.commandItem(m, __moduleName+".createNClothWrapDeformer", "Create nCloth Wrap Deformer", annotation="Select NURBS patches and a passive collision object")
 		jc.menu.listOption(i, "hair Direction", directionOptions()[1], directionOptions, True)
-		jc.menu.listOption(i, "nCloth Preset", getNClothPresetsCallback()[0], getNClothPresetsCallback)
+		jc.menu.listOption(i, "nCloth Preset", jc.menu.first(getNClothPresetsCallback), getNClothPresetsCallback)
 
 		i = jc.menu.commandItem(m, __moduleName+".batchRender", "Batch Render", annotation="Render scene in batch mode")
-		jc.menu.listOption(i, "camera", cameraOptions()[0], cameraOptions)
-		jc.menu.listOption(i, "render Layer", getRenderLayersCallback()[0], getRenderLayersCallback, True)
+		jc.menu.listOption(i, "camera", jc.menu.first(cameraOptions), cameraOptions)
+		jc.menu.listOption(i, "render Layer", jc.menu.first(getRenderLayersCallback), getRenderLayersCallback, True)
 		jc.menu.booleanOption(i, "start Now", True)
 		jc.menu.booleanOption(i, "save Scene", True)
 		jc.menu.booleanOption(i, "shutdown", False)
 		jc.menu.integerOption(i, "start Frame", 1)
 		jc.menu.integerOption(i, "end Frame", 24)
+		jc.menu.integerOption(i, "workers", 1)
+		jc.menu.integerOption(i, "chunk", 10)
+		jc.menu.booleanOption(i, "resume", True)
 
 		i = jc.menu.commandItem(m, __moduleName+".destroyHairstyle", "Destroy Hairstyle", annotation="Delete nodes under a hairstyle definition")
 		jc.menu.listOption(i, "hairstyle", "None", hairstyleOptions1)
@@ -2750,13 +2800,13 @@ def	doMenu(do=True, parent=None):
 		i = jc.menu.commandItem(m, __moduleName+".updateHairOcclusionObjects", "Update Hair Occlusion Objects", annotation="Select object(s)")
 
 		i = jc.menu.commandItem(m, __moduleName+".hideHairInRenderLayers", "Hide Hair in Render Layers", annotation="Select NURBS patch(es)")
-		jc.menu.listOption(i, "exception", getRenderLayersCallback()[0], getRenderLayersCallback, True)
+		jc.menu.listOption(i, "exception", jc.menu.first(getRenderLayersCallback), getRenderLayersCallback, True)
 
 		jc.menu.dividerItem(m)
 
 		i = jc.menu.commandItem(m, __moduleName+".createHairClumps", "Create Hair Clumps", annotation="Select NURBS patch(es)")
 		jc.menu.listOption(i, "hair Direction", directionOptions()[1], directionOptions, True)
-		jc.menu.listOption(i, "extract", extractOptions()[0], extractOptions, True)
+		jc.menu.listOption(i, "extract", jc.menu.first(extractOptions), extractOptions, True)
 		jc.menu.integerOption(i, "curve Count", 5)
 		jc.menu.booleanOption(i, "visible Only", True, True)
 
@@ -2764,16 +2814,16 @@ def	doMenu(do=True, parent=None):
 		jc.menu.listOption(i, "hair Direction", directionOptions()[1], directionOptions, True)
 		jc.menu.floatOption(i, "ratio", 0.5)
 		jc.menu.booleanOption(i, "randomize", True)
-		jc.menu.listOption(i, "trim", trimOptions()[0], trimOptions)
+		jc.menu.listOption(i, "trim", jc.menu.first(trimOptions), trimOptions)
 
 		i = jc.menu.commandItem(m, __moduleName+".displace", "Displace", annotation="Select NURBS curve(s) anc/or surface(s)")
 		jc.menu.floatOption(i, "amplitude", 3.0)
-		jc.menu.listOption(i, "displace", displaceOptions()[0], displaceOptions)
+		jc.menu.listOption(i, "displace", jc.menu.first(displaceOptions), displaceOptions)
 
 		i = jc.menu.commandItem(m, __moduleName+".convertClumps2Shave", "Convert Clumps to Shave", annotation="Select hair clumps (groups of curves)")
-		jc.menu.listOption(i, "shave Preset", getShaveHairPresetsCallback()[0], getShaveHairPresetsCallback)
+		jc.menu.listOption(i, "shave Preset", jc.menu.first(getShaveHairPresetsCallback), getShaveHairPresetsCallback)
 		jc.menu.booleanOption(i, "match Hair Count", True, True)
-		jc.menu.listOption(i, "shave Nodes", shaveNodesOptions()[0], shaveNodesOptions, True)
+		jc.menu.listOption(i, "shave Nodes", jc.menu.first(shaveNodesOptions), shaveNodesOptions, True)
 
 		i = jc.menu.commandItem(m, __moduleName+".createJointChain", "Create Joint Chain", annotation="Select NURBS patch(es)")
 		jc.menu.listOption(i, "hair Direction", directionOptions()[1], directionOptions, True)
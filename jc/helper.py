@@ -2,44 +2,364 @@ import types, os
 import maya.cmds as cmds
 import maya.mel as mel
 import maya.OpenMaya as OpenMaya
+import jc.presets
+import jc.snapshot
+
+
+class	historyCache:
+# Histories of nodes listed once during an operation, so that walking many joints and meshes
+# doesn't list the same history again and again. The histories are given by listHistory with the same flags, eg.
+#	jc.helper.history.open()
+#	try:
+#		jc.helper.history.ofType("pCube1", "skinCluster", lv=1)
+#	finally:
+#		jc.helper.history.close()
+# Outside of open and close nothing is kept and no callback is installed. In between, callbacks on node added,
+# node removed, connection made or broken and name changed drop the whole cache, as the history of any node
+# may go through the changed one. The callbacks are removed by the last close.
+
+	def	__init__(self):
+		self.histories = {}		# (nodes, flags): history
+		self.types = {}			# (nodes, flags, type): nodes of the type in history
+		self.callbacks = []
+		self.depth = 0			# number of open operations
+
+	def	clear(self, *args):
+		self.histories = {}
+		self.types = {}
+
+	def	open(self):
+		if not self.depth:
+			self.install()
+		self.depth += 1
+
+	def	close(self):
+		self.depth = max(self.depth-1, 0)
+		if not self.depth:
+			self.uninstall()
+
+	def	install(self):
+		if self.callbacks:
+			return
+		self.callbacks.append(OpenMaya.MDGMessage.addNodeAddedCallback(self.clear, "dependNode"))
+		self.callbacks.append(OpenMaya.MDGMessage.addNodeRemovedCallback(self.clear, "dependNode"))
+		self.callbacks.append(OpenMaya.MDGMessage.addConnectionCallback(self.clear))
+		self.callbacks.append(OpenMaya.MNodeMessage.addNameChangedCallback(OpenMaya.MObject(), self.clear))
+
+	def	uninstall(self):
+		while self.callbacks:
+			OpenMaya.MMessage.removeCallback(self.callbacks.pop())
+		self.clear()
+
+	def	__key(self, obj, flags):
+		if isinstance(obj, (types.ListType, types.TupleType)):
+			obj = tuple(obj)
+		return obj, tuple(sorted(flags.items()))
+
+	def	listHistory(self, obj, **flags):
+	# return: list of nodes in history of obj, as listHistory with the flags
+		if not self.depth:
+			return cmds.listHistory(obj, **flags) or []
+		k = self.__key(obj, flags)
+		if k not in self.histories:
+			self.histories[k] = cmds.listHistory(obj, **flags) or []
+		return list(self.histories[k])
+
+	def	ofType(self, obj, type, **flags):
+	# return: list of nodes of the type in history of obj, in the order of the history
+		if not self.depth:
+			h = self.listHistory(obj, **flags)
+			return h and cmds.ls(h, type=type) or []
+		k = self.__key(obj, flags) + (type,)
+		if k not in self.types:
+			h = self.listHistory(obj, **flags)
+			self.types[k] = h and cmds.ls(h, type=type) or []
+		return list(self.types[k])
+
+
+# a reload of this module removes the callbacks of the cache it replaces
+try:
+	history.uninstall()
+except NameError:
+	pass
+history = historyCache()
 
 
 def	findTypeInHistory(obj, type, future=False, past=True):
 # This is translated from the mel procedure of the same name.
+# The histories are kept in jc.helper.history while an operation has it open.
 
 	if past and future:
 		# In the case that the object type exists in both past and future
 		# find the one that is fewer connections away.
-		pasts = cmds.listHistory(obj, f=0, bf=1, af=1)
-		futures = cmds.listHistory(obj, f=1, bf=1, af=1)
-		pastObjs = cmds.ls(pasts, type=type)
-		futureObjs = cmds.ls(futures, type=type)
+		# Each history is listed once and the nodes of the type are taken from it.
+		pasts = history.listHistory(obj, f=0, bf=1, af=1)
+		futures = history.listHistory(obj, f=1, bf=1, af=1)
+		pastObjs = pasts and cmds.ls(pasts, type=type) or []
+		futureObjs = futures and cmds.ls(futures, type=type) or []
 		if len(pastObjs) > 0:
 			if len(futureObjs) > 0:
-				for i in range( min( len(pasts), len(futures) ) ):
-					if pasts[i] == pastObjs[0]:
-						return pastObjs[0]
-					if futures[i] == futureObjs[0]:
-						return futureObjs[0]
-			else:
-				return pastObjs[0]
+				if futures.index(futureObjs[0]) < pasts.index(pastObjs[0]):
+					return futureObjs[0]
+			return pastObjs[0]
 		elif len(futureObjs) > 0:
 			return futureObjs[0]
 	else:
 		if past:
-			hist = cmds.listHistory(obj, f=0, bf=1, af=1)
-			objs = cmds.ls(hist, type=type)
+			objs = history.ofType(obj, type, f=0, bf=1, af=1)
 			if len(objs) > 0:
 				return objs[0]
 		if future:
-			hist = cmds.listHistory(obj, f=1, bf=1, af=1)
-			objs = cmds.ls(hist, type=type)
+			objs = history.ofType(obj, type, f=1, bf=1, af=1)
 			if len(objs) > 0:
 				return objs[0]
 
 	return None
 
 
+def	toList(array):
+# return: list of the items of an API array (eg. MIntArray, MDoubleArray) or a python sequence
+	if isinstance(array, (types.ListType, types.TupleType)):
+		return list(array)
+	return [ array[i] for i in range(array.length()) ]
+
+
+def	toTuples(array):
+# return: list of (x, y, z) of the items of an API array of points or vectors (eg. MPointArray, MFloatVectorArray) or a python sequence
+	items = toList(array)
+	if items and hasattr(items[0], "x"):
+		return [ (p.x, p.y, p.z) for p in items ]
+	return [ tuple(p[:3]) for p in items ]
+
+
+def	toArray(values, arrayType, itemType=None):
+# return: API array of the type (eg. OpenMaya.MIntArray) having the values, values are returned as they are if they aren't a python sequence
+#	itemType: type of the items of point or vector arrays (eg. OpenMaya.MPoint), values are given as (x, y, z)
+	if not isinstance(values, (types.ListType, types.TupleType)):
+		return values
+	a = arrayType()
+	a.setLength(len(values))
+	if itemType:
+		for i in range(len(values)):
+			p = values[i]
+			a.set(itemType(p[0], p[1], p[2]), i)
+	else:
+		for i in range(len(values)):
+			a.set(values[i], i)
+	return a
+
+
+class	meshData:
+# Bulk access to the data of a mesh, each kind of data is read or written by one call of MFnMesh,
+# instead of one call for each vertex or UV. The data are given as lists:
+#	points, normals: (x, y, z) of each vertex
+#	faces: (number of vertices of each face, vertex indices of each face one after another)
+#	uvs: (u of each UV, v of each UV)
+#	assignedUVs: (number of UVs of each face, UV indices of each face one after another)
+# usage:
+#	m = jc.helper.meshData("pPlane1")
+#	points = m.points(OpenMaya.MSpace.kWorld)
+#	m.setPoints([ (x, y+1, z) for x, y, z in points ], OpenMaya.MSpace.kWorld)
+
+	def	__init__(self, mesh):
+		slist = OpenMaya.MSelectionList()
+		slist.add(mesh)
+		self.dagPath = OpenMaya.MDagPath()
+		slist.getDagPath(0, self.dagPath)
+		try:
+			self.dagPath.extendToShape()
+		except:
+			pass
+		if not self.dagPath.hasFn(OpenMaya.MFn.kMesh):
+			raise Exception, mesh+" is not a mesh"
+		self.fn = OpenMaya.MFnMesh(self.dagPath)
+
+	def	points(self, space=OpenMaya.MSpace.kObject):
+		a = OpenMaya.MPointArray()
+		self.fn.getPoints(a, space)
+		return toTuples(a)
+
+	def	pointsAt(self, time):
+	# return: points in world space of the mesh evaluated at the time, eg. of a deforming mesh at another frame than the current one,
+	# read from its world mesh in a DG context instead of changing the current time
+		context = OpenMaya.MDGContext(OpenMaya.MTime(time, OpenMaya.MTime.uiUnit()))
+		plug = self.fn.findPlug("worldMesh").elementByLogicalIndex(self.dagPath.instanceNumber())
+		a = OpenMaya.MPointArray()
+		OpenMaya.MFnMesh(plug.asMObject(context)).getPoints(a)
+		return toTuples(a)
+
+	def	normals(self, space=OpenMaya.MSpace.kObject):
+	# return: vertex normals, averages of the normals of the faces around
+		a = OpenMaya.MFloatVectorArray()
+		self.fn.getVertexNormals(False, a, space)
+		return toTuples(a)
+
+	def	faces(self):
+		counts = OpenMaya.MIntArray()
+		vertices = OpenMaya.MIntArray()
+		self.fn.getVertices(counts, vertices)
+		return toList(counts), toList(vertices)
+
+	def	uvs(self, uvSet=None):
+		u = OpenMaya.MFloatArray()
+		v = OpenMaya.MFloatArray()
+		if uvSet:
+			self.fn.getUVs(u, v, uvSet)
+		else:
+			self.fn.getUVs(u, v)
+		return toList(u), toList(v)
+
+	def	assignedUVs(self, uvSet=None):
+		counts = OpenMaya.MIntArray()
+		ids = OpenMaya.MIntArray()
+		if uvSet:
+			self.fn.getAssignedUVs(counts, ids, uvSet)
+		else:
+			self.fn.getAssignedUVs(counts, ids)
+		return toList(counts), toList(ids)
+
+	def	setPoints(self, points, space=OpenMaya.MSpace.kObject):
+		self.fn.setPoints(toArray(points, OpenMaya.MPointArray, OpenMaya.MPoint), space)
+
+	def	setNormals(self, normals, space=OpenMaya.MSpace.kObject):
+	# normals of all vertices
+		self.fn.setVertexNormals(toArray(normals, OpenMaya.MVectorArray, OpenMaya.MVector), toArray(range(len(normals)), OpenMaya.MIntArray), space)
+
+	def	setUVs(self, u, v, uvSet=None):
+		if uvSet:
+			self.fn.setUVs(toArray(u, OpenMaya.MFloatArray), toArray(v, OpenMaya.MFloatArray), uvSet)
+		else:
+			self.fn.setUVs(toArray(u, OpenMaya.MFloatArray), toArray(v, OpenMaya.MFloatArray))
+
+	def	setAssignedUVs(self, counts, ids, uvSet=None):
+		if uvSet:
+			self.fn.assignUVs(toArray(counts, OpenMaya.MIntArray), toArray(ids, OpenMaya.MIntArray), uvSet)
+		else:
+			self.fn.assignUVs(toArray(counts, OpenMaya.MIntArray), toArray(ids, OpenMaya.MIntArray))
+
+
+def	__attributeValue__(plug):
+# return: value of the plug as kept in a snapshot (see jc.snapshot), None if it doesn't exist or can't be set back
+	try:
+		value = cmds.getAttr(plug)
+	except:
+		return None
+	if isinstance(value, types.ListType):
+		if len(value) == 1 and isinstance(value[0], types.TupleType):
+			return value[0]
+		t = cmds.getAttr(plug, type=True)
+		if t not in jc.snapshot.dataTypes:
+			return None
+		return { 'type':t, 'value':value }
+	return value
+
+
+def	getAttributes(nodes, attributes):
+# Snapshot of the attributes of the nodes (see jc.snapshot), read in one pass without querying their existence first.
+#	attributes: attribute names, a multi attribute followed by "[*]" for all its elements, eg. [ "thss", "w[*]" ]
+# return: dictionary of node: { plug: value }, attributes missing on a node are left out
+
+	snapshot = {}
+	for node in nodes:
+		values = {}
+		for a in attributes:
+			if a.endswith("[*]"):
+				a = a[:-3]
+				try:
+					indices = cmds.getAttr(node+"."+a, mi=True) or []
+				except:
+					indices = []
+				for i in indices:
+					v = __attributeValue__("%s.%s[%d]" % (node, a, i))
+					if v != None:
+						values["%s[%d]" % (a, i)] = v
+			else:
+				v = __attributeValue__(node+"."+a)
+				if v != None:
+					values[a] = v
+		snapshot[node] = values
+	return snapshot
+
+
+def	setAttributes(snapshot, names={}, current=None):
+# Set the attributes in the snapshot by setAttr commands run by one mel.eval, in one undo chunk so that they're undone at once.
+#	names: dictionary of nodes in the snapshot and those to be set instead, eg. { "nClothShape1":"nClothShape2" } to copy the attributes
+#	current: snapshot of the values the nodes have now if it's known, those already equal to them aren't set again
+# return: number of attributes set
+	snapshot = jc.snapshot.remap(snapshot, names)
+	if current != None:
+		snapshot = jc.snapshot.diff(current, snapshot)
+	commands = [ jc.snapshot.setAttrCommand(node+"."+p, snapshot[node][p]) for node in sorted(snapshot.keys()) for p in sorted(snapshot[node].keys()) ]
+	if commands:
+		cmds.undoInfo(openChunk=True)
+		try:
+			mel.eval("\n".join(commands))
+		finally:
+			cmds.undoInfo(closeChunk=True)
+	return len(commands)
+
+
+def	__plugs__(attributes):
+# attributes: list of (node, attribute)
+# return: list of MPlug of the attributes, found by the nodes in one selection list instead of a command for each
+
+	nodes = []
+	for n, a in attributes:
+		if n not in nodes:
+			nodes.append(n)
+	selection = OpenMaya.MSelectionList()
+	for n in nodes:
+		selection.add(n)
+	index = dict([ (nodes[i], i) for i in range(len(nodes)) ])
+	obj = OpenMaya.MObject()
+	fn = OpenMaya.MFnDependencyNode()
+	plugs = []
+	current = None
+	for n, a in attributes:
+		if n != current:
+			selection.getDependNode(index[n], obj)
+			fn.setObject(obj)
+			current = n
+		plugs.append(fn.findPlug(a))
+	return plugs
+
+
+def	getAttributesAt(nodes, attributes, time):
+# Numeric attributes of the nodes evaluated at the time, as getAttr -t of each of them would give,
+# read from the plugs of the nodes in one DG context instead of running a command for each of them.
+#	attributes: names of numeric attributes, eg. [ "tx", "rx", "sx" ]
+# return: dictionary of node: { attribute: value } in UI units
+
+	context = OpenMaya.MDGContext(OpenMaya.MTime(time, OpenMaya.MTime.uiUnit()))
+	angle = OpenMaya.MAngle(1.0).asUnits(OpenMaya.MAngle.uiUnit())
+	distance = OpenMaya.MDistance(1.0).asUnits(OpenMaya.MDistance.uiUnit())
+	pairs = [ (n, a) for n in nodes for a in attributes ]
+	result = {}
+	for (n, a), plug in zip(pairs, __plugs__(pairs)):
+		t = plug.attribute().apiType()
+		if t in (OpenMaya.MFn.kDoubleAngleAttribute, OpenMaya.MFn.kFloatAngleAttribute):
+			v = plug.asDouble(context)*angle
+		elif t in (OpenMaya.MFn.kDoubleLinearAttribute, OpenMaya.MFn.kFloatLinearAttribute):
+			v = plug.asDouble(context)*distance
+		else:
+			v = plug.asDouble(context)
+		result.setdefault(n, {})[a] = v
+	return result
+
+
+def	drivenAttributes(attributes):
+# attributes: list of (node, attribute)
+# return: set of those having an incoming connection (eg. from an animation curve or a constraint), without listConnections of each
+
+	result = set()
+	sources = OpenMaya.MPlugArray()
+	for pair, plug in zip(attributes, __plugs__(attributes)):
+		plug.connectedTo(sources, True, False)
+		if sources.length():
+			result.add(pair)
+	return result
+
+
 def	getVertexUV():
 # usage: select uv components
 # return: a dictionary in which key is uv component index, value is a tuple of (u,v)
@@ -71,18 +391,17 @@ def	getVertexUV():
 	if selUVs.length() < 1:
 		raise Exception, "invalid selection"
 
-	uScriptUtil = OpenMaya.MScriptUtil()
-	vScriptUtil = OpenMaya.MScriptUtil()
-	uPtr = uScriptUtil.asFloatPtr()
-	vPtr = vScriptUtil.asFloatPtr()
-
 	meshFn = OpenMaya.MFnMesh()
 	meshFn.setObject(mesh)
-	
+
+	# all UVs in one call
+	u = OpenMaya.MFloatArray()
+	v = OpenMaya.MFloatArray()
+	meshFn.getUVs(u, v)
+
 	uv = {}
 	for i in selUVs:
-		meshFn.getUV(i, uPtr, vPtr)
-		uv[i] = ( float(uScriptUtil.getFloat(uPtr)), float(vScriptUtil.getFloat(vPtr)) )
+		uv[i] = ( float(u[i]), float(v[i]) )
 
 	return uv
 	
@@ -180,15 +499,7 @@ def	getPresets(node, includeUser=True):
 	if includeUser:
 		presetPaths.append(os.path.join(cmds.internalVar(ups=True), "attrPresets"))
 
-	p = [ "None" ]
-	for presetPath in presetPaths:
-		if os.path.isdir(presetPath):
-			for root, dirs, files in os.walk(presetPath):
-				if os.path.basename(root) == node:
-					for f in files:
-						if f.endswith('.mel'):
-							p.append(f[:-4])
-	return p
+	return [ "None" ] + jc.presets.getPresets(node, presetPaths)
 
 
 def	applyAttrPreset(node, preset):
@@ -0,0 +1,203 @@
+# instrument.py
+# Opt-in instrumentation of the calls made by the jc modules to maya.cmds, maya.mel and maya.OpenMaya(Anim).
+# When enabled, the Maya modules referred to by the loaded jc modules are replaced by proxies which time every call
+# and attribute it to the innermost public function of a jc module on the call stack (eg. jc.clothes.createStitch).
+# The counts and cumulative times can be written as a JSON report, and the calls as a timeline in the Chrome trace
+# format (open it in chrome://tracing or https://ui.perfetto.dev).
+# When disabled (the default) the jc modules refer to the Maya modules themselves, so there's no overhead at all.
+#
+# usage:
+#	import jc.instrument
+#	jc.instrument.enable()
+#	jc.clothes.buildGarment("shirt")
+#	jc.instrument.disable()
+#	jc.instrument.calls.writeReport("/tmp/shirt.json")
+#	jc.instrument.calls.writeChromeTrace("/tmp/shirt.trace.json")
+#	print jc.instrument.calls.summary()
+#
+# Installation:
+# This file implements the module called jc.instrument.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import os, sys, time, types, json
+
+
+
+class	recorder:
+# Counts and cumulative seconds of the calls by function and command, and the calls themselves for the timeline.
+
+	def	__init__(self, maxEvents=1000000):
+		self.maxEvents = maxEvents
+		self.reset()
+
+	def	reset(self):
+		self.stats = {}			# (function, command): [ count, seconds ]
+		self.events = []		# (function, command, start, seconds)
+		self.dropped = 0		# calls not kept for the timeline, beyond maxEvents
+		self.origin = time.time()
+
+	def	record(self, function, command, start, seconds):
+		k = (function, command)
+		s = self.stats.get(k)
+		if s:
+			s[0] += 1
+			s[1] += seconds
+		else:
+			self.stats[k] = [ 1, seconds ]
+		if len(self.events) < self.maxEvents:
+			self.events.append((function, command, start, seconds))
+		else:
+			self.dropped += 1
+
+	def	total(self):
+	# return: (count, seconds) of all calls
+		return sum([ s[0] for s in self.stats.values() ]), sum([ s[1] for s in self.stats.values() ])
+
+	def	report(self):
+	# return: dictionary of the counts and seconds by function, then by command, the slowest first
+		functions = {}
+		for (function, command), (count, seconds) in self.stats.items():
+			f = functions.setdefault(function, { 'function':function, 'count':0, 'seconds':0.0, 'commands':[] })
+			f['count'] += count
+			f['seconds'] += seconds
+			f['commands'].append({ 'command':command, 'count':count, 'seconds':seconds })
+		functions = sorted(functions.values(), key=lambda f: -f['seconds'])
+		for f in functions:
+			f['commands'].sort(key=lambda c: -c['seconds'])
+		count, seconds = self.total()
+		return { 'count':count, 'seconds':seconds, 'dropped':self.dropped, 'functions':functions }
+
+	def	chromeTrace(self):
+	# return: dictionary in the Chrome trace event format, a complete event for each call, in microseconds
+		pid = os.getpid()
+		events = []
+		for function, command, start, seconds in self.events:
+			events.append({ 'name':command, 'cat':function, 'ph':"X", 'pid':pid, 'tid':0,
+				'ts':(start - self.origin)*1.0e6, 'dur':seconds*1.0e6, 'args':{ 'function':function } })
+		return { 'traceEvents':events, 'displayTimeUnit':"ms" }
+
+	def	writeReport(self, fileName):
+		f = open(fileName, "w")
+		json.dump(self.report(), f, indent=1)
+		f.close()
+
+	def	writeChromeTrace(self, fileName):
+		f = open(fileName, "w")
+		json.dump(self.chromeTrace(), f)
+		f.close()
+
+	def	summary(self, n=20):
+	# return: text of the n function and command pairs taking the most time
+		l = sorted(self.stats.items(), key=lambda x: -x[1][1])
+		lines = [ "%-40s %-32s %8s %12s" % ("function", "command", "calls", "ms") ]
+		for (function, command), (count, seconds) in l[:n]:
+			lines.append("%-40s %-32s %8d %12.3f" % (function, command, count, seconds*1000))
+		count, seconds = self.total()
+		lines.append("%-40s %-32s %8d %12.3f" % ("total", "", count, seconds*1000))
+		return "\n".join(lines)
+
+
+calls = recorder()
+
+
+def	caller(frame):
+# return: module and name of the innermost public function of a jc module from frame outwards, "" if there's none
+	while frame:
+		name = frame.f_globals.get('__name__', "")
+		code = frame.f_code.co_name
+		if name.startswith("jc.") and name != __name__ and not code.startswith("_") and not code.startswith("<"):
+			return name+"."+code
+		frame = frame.f_back
+	return ""
+
+
+def	__unwrap__(value):
+	if isinstance(value, tracing):
+		return value._target
+	return value
+
+
+class	tracing:
+# Proxy of a Maya module, an OpenMaya class or an instance of it, every call of it or its methods is timed and recorded
+# under the given prefix, eg. "cmds.", "OpenMaya.MFnMesh.". Proxies passed as arguments are replaced by their targets.
+
+	def	__init__(self, target, prefix=""):
+		self.__dict__['_target'] = target
+		self.__dict__['_prefix'] = prefix
+
+	def	__getattr__(self, name):
+		a = getattr(self._target, name)
+		if not callable(a):
+			return a
+		if name.startswith("_"):
+			# special methods, eg. __getitem__ of MPointArray, aren't recorded
+			def	f(*args, **keywords):
+				return a(*[ __unwrap__(x) for x in args ], **keywords)
+			return f
+		if isinstance(a, (types.ClassType, types.TypeType)):
+			f = tracing(a, self._prefix+name+".")
+		else:
+			key = self._prefix+name
+			def	f(*args, **keywords):
+				t = time.time()
+				try:
+					return a(*[ __unwrap__(x) for x in args ], **dict([ (k, __unwrap__(v)) for k, v in keywords.items() ]))
+				finally:
+					calls.record(caller(sys._getframe(1)), key, t, time.time() - t)
+		self.__dict__[name] = f
+		return f
+
+	def	__setattr__(self, name, value):
+		setattr(self._target, name, __unwrap__(value))
+
+	def	__call__(self, *args, **keywords):
+	# construction of an OpenMaya object, the object is traced as well
+		t = time.time()
+		try:
+			r = self._target(*[ __unwrap__(x) for x in args ], **keywords)
+		finally:
+			calls.record(caller(sys._getframe(1)), self._prefix[:-1], t, time.time() - t)
+		return tracing(r, self._prefix)
+
+
+__modules = { "maya.cmds":"cmds.", "maya.mel":"mel.", "maya.OpenMaya":"OpenMaya.", "maya.OpenMayaAnim":"OpenMayaAnim." }
+__patched = []		# (module, attribute name, original)
+
+
+def	isEnabled():
+	return bool(__patched)
+
+
+def	enable(reset=True):
+# put proxies in place of the Maya modules in the loaded jc modules, the calls are recorded in calls
+# It can be called again to instrument jc modules loaded since.
+
+	if reset and not __patched:
+		calls.reset()
+	targets = {}
+	for name, prefix in __modules.items():
+		if name in sys.modules:
+			m = sys.modules[name]
+			targets[id(m)] = (m, prefix)
+	for name, module in sys.modules.items():
+		if not name.startswith("jc.") or name == __name__ or not isinstance(module, types.ModuleType):
+			continue
+		if getattr(module, "_module", 0) == None:
+			continue		# placeholder of jc.lazy not loaded yet
+		for attribute, value in module.__dict__.items():
+			if id(value) in targets:
+				target, prefix = targets[id(value)]
+				setattr(module, attribute, tracing(target, prefix))
+				__patched.append((module, attribute, value))
+
+
+def	disable():
+# put the Maya modules back in place of the proxies
+	while __patched:
+		module, attribute, value = __patched.pop()
+		setattr(module, attribute, value)
@@ -0,0 +1,160 @@
+# jobs.py
+# Run a list of jobs (eg. nCloth caching by mayabatch) by a number of concurrent worker processes.
+# Each job is started as soon as a worker is free, its output goes to its own log file,
+# a failed job is run again up to a number of retries, and the wall clock time of each job is reported.
+#
+# It doesn't depend on Maya, jc.clothes.batchSimulate() writes a job file and a batch file running it by mayapy:
+#	mayapy jobs.py -w 4 -m 8192 -r 1 scene1_jobs.json scene2_jobs.json
+# A job file is a JSON list of jobs:
+#	[ { "name": "shirt", "command": [ "maya", "-batch", ... ], "log": "/project/data/shirt.log" }, ... ]
+# Any command can stand in for Maya, eg. [ "sh", "-c", "sleep 1; exit 1" ].
+#
+# Installation:
+# This file implements the module called jc.jobs.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import os, sys, time, subprocess, optparse, json
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+
+
+class	job:
+# A command with its log file, and the outcome of its last attempt
+
+	def	__init__(self, name, command, log=None):
+		self.name = name
+		self.command = command
+		self.log = log
+		self.attempts = 0
+		self.code = None
+		self.seconds = 0.0
+		self.process = None
+		self.started = None
+		self.logFile = None
+
+	def	start(self, memory=None):
+	# memory: maximum address space of the process in megabytes, not supported on Windows
+		self.attempts += 1
+		self.started = time.time()
+		output = None
+		if self.log:
+			self.logFile = open(self.log, "a")
+			self.logFile.write("==== %s attempt %d: %s\n" % (self.name, self.attempts, " ".join(self.command)))
+			self.logFile.flush()
+			output = self.logFile
+
+		limit = None
+		if memory and resource:
+			def	limit():
+				size = int(memory)*1024*1024
+				resource.setrlimit(resource.RLIMIT_AS, (size, size))
+		try:
+			self.process = subprocess.Popen(self.command, stdout=output, stderr=subprocess.STDOUT, preexec_fn=limit)
+		except OSError, e:
+			self.process = None
+			self.code = -1
+			self.finish("can't start: "+str(e))
+
+	def	poll(self):
+	# return: True if the process has finished
+		if self.process == None:
+			return True
+		code = self.process.poll()
+		if code == None:
+			return False
+		self.code = code
+		self.finish("exit code %d" % code)
+		return True
+
+	def	finish(self, status):
+		self.seconds = time.time() - self.started
+		if self.logFile:
+			self.logFile.write("==== %s %s, %.1f seconds\n" % (self.name, status, self.seconds))
+			self.logFile.close()
+			self.logFile = None
+		self.process = None
+
+
+def	loadJobs(fileName):
+	f = open(fileName, "r")
+	jobs = [ job(j['name'], j['command'], j.get('log')) for j in json.load(f) ]
+	f.close()
+	return jobs
+
+
+def	saveJobs(fileName, jobs):
+	f = open(fileName, "w")
+	json.dump([ { "name":j.name, "command":j.command, "log":j.log } for j in jobs ], f, indent=1)
+	f.close()
+
+
+def	run(jobs, workers=1, memory=None, retries=0, log=sys.stdout, interval=0.5):
+# Run jobs by at most workers processes at the same time, a failed job is queued again until it has been retried retries times.
+# return: jobs in the order of completion
+
+	pending = list(jobs)
+	running = []
+	done = []
+	workers = max(1, workers)
+	while pending or running:
+		while pending and len(running) < workers:
+			j = pending.pop(0)
+			log.write("start %s (attempt %d)\n" % (j.name, j.attempts+1))
+			log.flush()
+			j.start(memory)
+			running.append(j)
+
+		time.sleep(interval)
+		for j in running[:]:
+			if j.poll():
+				running.remove(j)
+				log.write("end %s, exit code %d, %.1f seconds\n" % (j.name, j.code, j.seconds))
+				log.flush()
+				if j.code != 0 and j.attempts <= retries:
+					pending.append(j)
+				else:
+					done.append(j)
+	return done
+
+
+def	report(jobs, log=sys.stdout):
+	log.write("%-40s %8s %10s %10s\n" % ("job", "attempts", "exit code", "seconds"))
+	for j in jobs:
+		log.write("%-40s %8d %10d %10.1f\n" % (j.name, j.attempts, j.code, j.seconds))
+
+
+def	main(argv=None):
+	parser = optparse.OptionParser(usage="%prog [options] jobFile ...")
+	parser.add_option("-w", "--workers", type="int", default=1, help="number of concurrent processes")
+	parser.add_option("-m", "--memory", type="int", help="maximum memory of each process in megabytes")
+	parser.add_option("-r", "--retries", type="int", default=0, help="number of times a failed job is run again")
+	options, files = parser.parse_args(argv)
+	if not files:
+		parser.error("missing job file")
+
+	jobs = []
+	for f in files:
+		jobs += loadJobs(f)
+
+	t = time.time()
+	done = run(jobs, options.workers, options.memory, options.retries)
+	report(done)
+	failed = [ j for j in done if j.code != 0 ]
+	print "%d jobs in %.1f seconds, %d failed" % (len(done), time.time()-t, len(failed))
+
+	if failed:
+		return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,201 @@
+# joints.py
+# Forward kinematics of joint chains written in pure python, in the convention of Maya (row vectors, angles in degrees).
+# It's used to match a stitch joint chain to its destination chain analytically instead of by IK handles.
+# It doesn't depend on Maya, so it can be tested and benchmarked with any python interpreter.
+#
+# The local matrix of a joint (without scale) is
+#	rotate * jointOrient * translate
+# where rotate is the product of the rotations about the axes in its rotate order, eg. Rx * Ry * Rz for xyz,
+# and jointOrient is always Rx * Ry * Rz. Rotate orders are given as the values of the rotateOrder attribute:
+#	0 xyz, 1 yzx, 2 zxy, 3 xzy, 4 yxz, 5 zyx
+#
+# Installation:
+# This file implements the module called jc.joints.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import math
+
+
+
+def	multiply(a, b):
+# product of 3x3 matrices
+	return [ [ a[i][0]*b[0][j] + a[i][1]*b[1][j] + a[i][2]*b[2][j] for j in range(3) ] for i in range(3) ]
+
+
+def	transform(v, m):
+# row vector times 3x3 matrix
+	return [ v[0]*m[0][j] + v[1]*m[1][j] + v[2]*m[2][j] for j in range(3) ]
+
+
+def	inverse(m):
+	a, b, c = m[0]
+	d, e, f = m[1]
+	g, h, i = m[2]
+	det = a*(e*i - f*h) - b*(d*i - f*g) + c*(d*h - e*g)
+	if abs(det) < 1.0e-12:
+		raise Exception, "singular matrix"
+	return [ [ (e*i - f*h)/det, (c*h - b*i)/det, (b*f - c*e)/det ],
+			[ (f*g - d*i)/det, (a*i - c*g)/det, (c*d - a*f)/det ],
+			[ (d*h - e*g)/det, (b*g - a*h)/det, (a*e - b*d)/det ] ]
+
+
+# axes of each rotate order, in the order of being applied
+__orders = ((0, 1, 2), (1, 2, 0), (2, 0, 1), (0, 2, 1), (1, 0, 2), (2, 1, 0))
+
+
+def	axisMatrix(axis, angle):
+# rotation matrix (row vectors) of angle in degrees about axis 0 (x), 1 (y) or 2 (z)
+	a = math.radians(angle)
+	c, s = math.cos(a), math.sin(a)
+	if axis == 0:
+		return [ [ 1.0, 0.0, 0.0 ], [ 0.0, c, s ], [ 0.0, -s, c ] ]
+	if axis == 1:
+		return [ [ c, 0.0, -s ], [ 0.0, 1.0, 0.0 ], [ s, 0.0, c ] ]
+	return [ [ c, s, 0.0 ], [ -s, c, 0.0 ], [ 0.0, 0.0, 1.0 ] ]
+
+
+def	eulerMatrix(r, order=0):
+# r: (rx, ry, rz) in degrees
+# order: rotate order, 0 (xyz) by default
+	if order:
+		i, j, k = __orders[order]
+		return multiply(multiply(axisMatrix(i, r[i]), axisMatrix(j, r[j])), axisMatrix(k, r[k]))
+	x, y, z = [ math.radians(a) for a in r ]
+	cx, sx = math.cos(x), math.sin(x)
+	cy, sy = math.cos(y), math.sin(y)
+	cz, sz = math.cos(z), math.sin(z)
+	return [ [ cy*cz, cy*sz, -sy ],
+			[ sx*sy*cz - cx*sz, sx*sy*sz + cx*cz, sx*cy ],
+			[ cx*sy*cz + sx*sz, cx*sy*sz - sx*cz, cx*cy ] ]
+
+
+def	__nearest(angle, previous):
+# angle plus a multiple of 360 closest to previous
+	return angle + 360.0*round((previous - angle)/360.0)
+
+
+def	matrixEuler(m, previous=(0.0, 0.0, 0.0), order=0):
+# Euler angles (rx, ry, rz in degrees) of a rotation matrix in the rotate order, 0 (xyz) by default.
+# Of the two solutions, each shifted by multiples of 360, the one closest to previous is returned,
+# so that keys set one after another don't flip.
+# The angles about the first, second and third axes of the order are found as those about x, y and z of xyz,
+# with the signs flipped for the orders which are odd permutations of xyz.
+
+	i, j, k = __orders[order]
+	sign = 1.0
+	if order > 2:
+		sign = -1.0
+	sb = max(-1.0, min(1.0, -sign*m[i][k]))
+	b = math.asin(sb)
+	if math.sqrt(m[i][i]**2 + m[i][j]**2) > 1.0e-9:
+		a = math.atan2(sign*m[j][k], m[k][k])
+		c = math.atan2(sign*m[i][j], m[i][i])
+	else:
+		# gimbal lock, only the sum or the difference of the first and the last angles is defined
+		a = math.atan2(-sign*m[k][j], m[j][j])
+		c = 0.0
+	a, b, c = math.degrees(a), math.degrees(b), math.degrees(c)
+
+	best = None
+	for first, second, third in ((a, b, c), (a+180.0, 180.0-b, c+180.0)):
+		r = [ 0.0, 0.0, 0.0 ]
+		r[i], r[j], r[k] = first, second, third
+		r = [ __nearest(r[n], previous[n]) for n in range(3) ]
+		d = sum([ abs(r[n]-previous[n]) for n in range(3) ])
+		if best == None or d < best[0]:
+			best = (d, r)
+	return best[1]
+
+
+def	axisAngle(axis, angle):
+# rotation matrix (row vectors) of angle in degrees about axis
+	l = math.sqrt(axis[0]**2 + axis[1]**2 + axis[2]**2)
+	x, y, z = [ a/l for a in axis ]
+	a = math.radians(angle)
+	c, s = math.cos(a), math.sin(a)
+	t = 1 - c
+	# the transpose of the column vector form
+	return [ [ t*x*x + c, t*x*y + s*z, t*x*z - s*y ],
+			[ t*x*y - s*z, t*y*y + c, t*y*z + s*x ],
+			[ t*x*z + s*y, t*y*z - s*x, t*z*z + c ] ]
+
+
+def	rotationBetween(a, b):
+# the smallest rotation (row vectors) turning direction a into direction b
+	la = math.sqrt(a[0]**2 + a[1]**2 + a[2]**2)
+	lb = math.sqrt(b[0]**2 + b[1]**2 + b[2]**2)
+	if la < 1.0e-12 or lb < 1.0e-12:
+		return [ [ 1.0, 0.0, 0.0 ], [ 0.0, 1.0, 0.0 ], [ 0.0, 0.0, 1.0 ] ]
+	a = [ x/la for x in a ]
+	b = [ x/lb for x in b ]
+	axis = [ a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0] ]
+	s = math.sqrt(axis[0]**2 + axis[1]**2 + axis[2]**2)
+	c = a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
+	if s < 1.0e-12:
+		if c > 0:
+			return [ [ 1.0, 0.0, 0.0 ], [ 0.0, 1.0, 0.0 ], [ 0.0, 0.0, 1.0 ] ]
+		# opposite directions, turn half way round any axis perpendicular to a
+		axis = [ 0.0, -a[2], a[1] ]
+		if abs(a[0]) > 0.9:
+			axis = [ -a[1], a[0], 0.0 ]
+		return axisAngle(axis, 180.0)
+	return axisAngle(axis, math.degrees(math.atan2(s, c)))
+
+
+def	chainPositions(parentMatrix, translates, rotates, orients, orders=None):
+# world positions of a joint chain by forward kinematics
+#	parentMatrix: world matrix of the parent of the root joint, 16 values as returned by getAttr of parentMatrix
+#	translates, rotates, orients: translate, rotate and jointOrient of each joint, from the root to the end
+#	orders: rotate order of each joint, all xyz if it's not given
+	if not orders:
+		orders = [ 0 ]*len(translates)
+	m = [ parentMatrix[0:3], parentMatrix[4:7], parentMatrix[8:11] ]
+	p = parentMatrix[12:15]
+	positions = []
+	for i in range(len(translates)):
+		p = [ a+b for a, b in zip(transform(translates[i], m), p) ]
+		positions.append(p)
+		m = multiply(multiply(eulerMatrix(rotates[i], orders[i]), eulerMatrix(orients[i])), m)
+	return positions
+
+
+def	matchChain(parentMatrix, translates, rotates, orients, targets, twist=0.0, orders=None):
+# Rotate a joint chain such that each joint points at the target of its child, as a single chain IK handle on each bone would.
+# Each joint is turned by the smallest rotation from where it points in the given pose, the root is turned further by twist about its bone.
+# The rotations are the Euler angles closest to the given rotates, so that they don't flip from the given pose.
+#	parentMatrix, translates, rotates, orients: the chain in its current pose, as in chainPositions()
+#	targets: world positions for the joints to reach
+#	orders: rotate order of each joint, all xyz if it's not given
+# return: (translate of the root, rotate of each joint except the last one)
+
+	if not orders:
+		orders = [ 0 ]*len(translates)
+	m = [ parentMatrix[0:3], parentMatrix[4:7], parentMatrix[8:11] ]
+	origin = parentMatrix[12:15]
+	root = transform([ a-b for a, b in zip(targets[0], origin) ], inverse(m))
+
+	p = list(targets[0])
+	rotations = []
+	for i in range(len(translates)-1):
+		# jointOrient and parent together
+		a = multiply(eulerMatrix(orients[i]), m)
+		r = eulerMatrix(rotates[i], orders[i])
+		bone = transform(translates[i+1], multiply(r, a))
+		aim = [ x-y for x, y in zip(targets[i+1], p) ]
+		q = rotationBetween(bone, aim)
+		if i == 0 and twist:
+			q = multiply(q, axisAngle(aim, twist))
+
+		# r * a * q = r' * a
+		r = multiply(multiply(multiply(r, a), q), inverse(a))
+		rotation = matrixEuler(r, rotates[i], orders[i])
+		rotations.append(rotation)
+
+		m = multiply(eulerMatrix(rotation, orders[i]), a)
+		p = [ x+y for x, y in zip(transform(translates[i+1], m), p) ]
+	return root, rotations
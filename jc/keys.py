@@ -0,0 +1,106 @@
+# keys.py
+# Keyframes computed up front and written to animation curves in bulk, written in pure python.
+# All keys of an animation curve are collected first, so that they can be written by one command per curve
+# at their own times, without changing the current time (which makes Maya evaluate the scene on every change).
+# They don't depend on Maya, so they can be tested and benchmarked with any python interpreter.
+#
+# usage:
+#	table = jc.keys.keyTable()
+#	table.add("joint1", "rx", 1, 30.0)
+#	table.addBlend("joint2", "blendPoint1", 1, 40)
+#	for node, attribute, keys in table.curves():
+#		...
+#
+# Installation:
+# This file implements the module called jc.keys.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+
+
+__translate = ("tx", "ty", "tz", "translateX", "translateY", "translateZ")
+__rotate = ("rx", "ry", "rz", "rotateX", "rotateY", "rotateZ")
+
+
+def	curveType(attribute):
+# return: type of the animation curve node driving the attribute (of a transform or a joint)
+	if attribute in __translate:
+		return "animCurveTL"
+	if attribute in __rotate:
+		return "animCurveTA"
+	return "animCurveTU"
+
+
+def	blendTimes(startTime, endTime):
+# return: times of the keys of a stitch blend attribute, which is 1 until 90% of the stitch time and 0 at the end
+	return startTime + (endTime - startTime)*0.9, endTime
+
+
+def	chainAttributes(chain):
+# chain: joints from the root to the end of a stitch joint chain
+# return: list of (joint, attributes) to be keyed, ie. translation of the root, rotation of the joints having a child and their scale X
+
+	result = []
+	for i in range(len(chain)):
+		attributes = []
+		if i == 0:
+			attributes += [ "tx", "ty", "tz" ]
+		if i < len(chain)-1:
+			attributes += [ "rx", "ry", "rz" ]
+		if attributes:
+			result.append((chain[i], attributes+[ "sx" ]))
+	return result
+
+
+def	flatten(keys):
+# return: time value time value ... as expected by setAttr of the keyTimeValue of an animation curve
+	result = []
+	for t, v in keys:
+		result += [ t, v ]
+	return result
+
+
+class	keyTable:
+# Keys grouped by animation curve, ie. by node and attribute, a later key at the same time replaces the earlier one
+
+	def	__init__(self):
+		self.keys = {}		# (node, attribute): { time: value }
+		self.order = []		# (node, attribute) in the order of their first key
+
+	def	add(self, node, attribute, time, value):
+		k = (node, attribute)
+		if k not in self.keys:
+			self.keys[k] = {}
+			self.order.append(k)
+		self.keys[k][float(time)] = value
+
+	def	addPose(self, node, values, time):
+	# values: dictionary of attribute and value
+		for attribute in sorted(values.keys()):
+			self.add(node, attribute, time, values[attribute])
+
+	def	get(self, node, attribute, time, default=None):
+	# return: value of the key at the time, default if there's none
+		return self.keys.get((node, attribute), {}).get(float(time), default)
+
+	def	update(self, table):
+	# add the keys of another table
+		for node, attribute, keys in table.curves():
+			for t, v in keys:
+				self.add(node, attribute, t, v)
+
+	def	addBlend(self, node, attribute, startTime, endTime):
+		t0, t1 = blendTimes(startTime, endTime)
+		self.add(node, attribute, t0, 1)
+		self.add(node, attribute, t1, 0)
+
+	def	curves(self):
+	# return: list of (node, attribute, [ (time, value), ... ] in the order of time)
+		return [ (node, attribute, sorted(self.keys[(node, attribute)].items())) for node, attribute in self.order ]
+
+	def	count(self):
+		return sum([ len(k) for k in self.keys.values() ])
@@ -0,0 +1,85 @@
+# lazy.py
+# Lazy loading of the jc modules.
+# A placeholder is put in place of each module, the module is imported when any of its attributes is first used,
+# eg. by a menu command or an option list callback, so that Maya starts up without importing them all.
+# The time taken by each import is recorded in timings.
+#
+# usage (in userSetup.py):
+#	import jc.lazy
+#	jc.lazy.install([ "jc.helper", "jc.files", "jc.menu", "jc.character", "jc.hair", "jc.clothes" ])
+#
+# Installation:
+# This file implements the module called jc.lazy.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import sys, time, types
+
+
+
+timings = {}		# module name: seconds taken by its import
+
+
+class	lazyModule(types.ModuleType):
+
+	def	__init__(self, name):
+		types.ModuleType.__init__(self, name)
+		self.__dict__['_module'] = None
+
+	def	load(self):
+		if self._module:
+			return self._module
+		name = self.__name__
+		if sys.modules.get(name) is self:
+			del sys.modules[name]
+		t = time.time()
+		try:
+			__import__(name)
+		except:
+			sys.modules.setdefault(name, self)
+			raise
+		module = sys.modules[name]
+		timings[name] = time.time() - t
+		self.__dict__['_module'] = module
+		return module
+
+	def	__getattr__(self, name):
+		if name.startswith('__') and name.endswith('__'):
+			raise AttributeError, name
+		return getattr(self.load(), name)
+
+	def	__setattr__(self, name, value):
+		setattr(self.load(), name, value)
+
+
+def	install(names):
+# put a placeholder of each module which hasn't been imported yet
+
+	for name in names:
+		if name in sys.modules:
+			continue
+		placeholder = lazyModule(name)
+		sys.modules[name] = placeholder
+		package, dot, module = name.rpartition('.')
+		if package:
+			__import__(package)
+			setattr(sys.modules[package], module, placeholder)
+
+
+def	isPending(name):
+# return: True if the module is a placeholder not yet loaded
+	m = sys.modules.get(name)
+	return isinstance(m, lazyModule) and not m._module
+
+
+def	load(name):
+# return: the module, imported now if it's a placeholder
+	m = sys.modules.get(name)
+	if isinstance(m, lazyModule):
+		return m.load()
+	__import__(name)
+	return sys.modules[name]
@@ -0,0 +1,190 @@
+# links.py
+# An index of the links made by message attributes, written in pure python.
+# A link is the message of a target node connected to an attribute of a node, eg. pattern.message -> curveShape.jcp.
+# The links are indexed both ways, so the target of a node and the nodes linked to a target are found in constant time
+# instead of by listConnections, and kept up to date as links are made or broken and nodes are renamed or deleted.
+# It doesn't depend on Maya, so it can be tested and benchmarked with any python interpreter.
+#
+# Nodes are kept by their full paths (names for nodes out of the DAG), so nodes of the same name under different parents
+# don't collide. They can be given by any name that commands take: the name, a partial or the full path, or a plug.
+# A transform stands for its shape, as in the attributes given to commands, eg. curve1.jcp is curve1Shape.jcp,
+# and the transforms of shapes are returned, as by listConnections, by their shortest paths which no other node
+# of the same name in the index ends with.
+#
+# usage:
+#	index = jc.links.linkIndex([ "jcp", "jcl" ])
+#	index.addNode("|curve1|curveShape1", "nurbsCurve", "|curve1")
+#	index.link("|curve1|curveShape1", "jcp", "|pattern1")
+#	index.target("curve1", "jcp")				(pattern1)
+#	index.linked("pattern1", "jcp")				([ "curve1" ])
+#
+# Installation:
+# This file implements the module called jc.links.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+
+
+def	leaf(name):
+# return: name of a node without its path, of a plug without its attribute
+	return name.split(".")[0].split("|")[-1]
+
+
+class	linkIndex:
+
+	def	__init__(self, attributes):
+		self.attributes = set(attributes)
+		self.clear()
+
+	def	clear(self):
+		self.targets = {}		# (node, attribute): target
+		self.sources = {}		# (target, attribute): nodes linked to target
+		self.types = {}			# node: type
+		self.parents = {}		# shape: transform
+		self.shapes = {}		# transform: shape
+		self.names = {}			# name: paths of the nodes of the name
+		self.components = {}	# name: number of paths going through a node of the name
+		self.complete = False	# whether all links in the scene have been added
+
+	def	__add(self, path):
+		name = leaf(path)
+		if path in self.names.get(name, ()):
+			return
+		self.names.setdefault(name, set()).add(path)
+		for c in path.split("|"):
+			if c:
+				self.components[c] = self.components.get(c, 0) + 1
+
+	def	__remove(self, path):
+		name = leaf(path)
+		if path not in self.names.get(name, ()):
+			return
+		self.names[name].remove(path)
+		if not self.names[name]:
+			del self.names[name]
+		for c in path.split("|"):
+			if c:
+				self.components[c] -= 1
+				if not self.components[c]:
+					del self.components[c]
+
+	def	path(self, node):
+	# return: path of the node in the index given by any of its names, the name itself if there's no such node
+		node = node.split(".")[0]
+		paths = self.names.get(leaf(node))
+		if not paths or node in paths:
+			return node
+		l = [ p for p in paths if p.endswith("|"+node) ]
+		if len(l) == 1:
+			return l[0]
+		return node
+
+	def	name(self, path):
+	# return: shortest path of the node which no other node of its name in the index ends with
+		others = [ p for p in self.names.get(leaf(path), ()) if p != path ]
+		components = path.split("|")
+		for k in range(1, len(components)+1):
+			name = "|".join(components[-k:])
+			if not [ p for p in others if p == name or p.endswith("|"+name) ]:
+				return name
+		return path
+
+	def	contains(self, name):
+	# return: whether a node of the name is in the index or above one in the DAG
+		return leaf(name) in self.components
+
+	def	addNode(self, node, type, parent=None):
+	# node: full path, parent: full path of the transform of a shape
+		self.__add(node)
+		self.types[node] = type
+		if parent:
+			self.__add(parent)
+			self.parents[node] = parent
+			self.shapes[parent] = node
+
+	def	link(self, node, attribute, target):
+	# node, target: full paths
+		self.__add(node)
+		self.__add(target)
+		self.unlink(node, attribute)
+		self.targets[(node, attribute)] = target
+		self.sources.setdefault((target, attribute), []).append(node)
+
+	def	unlink(self, node, attribute):
+		node = self.path(node)
+		target = self.targets.pop((node, attribute), None)
+		if target != None:
+			l = self.sources[(target, attribute)]
+			l.remove(node)
+			if not l:
+				del self.sources[(target, attribute)]
+
+	def	removeNode(self, node):
+	# drop the links from and to the node
+		node = self.path(node)
+		for a in self.attributes:
+			self.unlink(node, a)
+			for s in self.sources.pop((node, a), []):
+				del self.targets[(s, a)]
+		self.types.pop(node, None)
+		parent = self.parents.pop(node, None)
+		if parent and self.shapes.get(parent) == node:
+			del self.shapes[parent]
+		shape = self.shapes.pop(node, None)
+		if shape and self.parents.get(shape) == node:
+			del self.parents[shape]
+		self.__remove(node)
+
+	def	rename(self, old, new):
+	# old, new: full paths of a node before and after it's renamed, the paths of the nodes below it change as well
+		if old == new or leaf(old) not in self.components:
+			return
+		def	move(path):
+			if path == old or path.startswith(old+"|"):
+				return new + path[len(old):]
+			return path
+		paths = []
+		for l in self.names.values():
+			paths += [ p for p in l if move(p) != p ]
+		for p in paths:
+			self.__remove(p)
+			self.__add(move(p))
+		self.targets = dict([ ((move(n), a), move(t)) for (n, a), t in self.targets.items() ])
+		self.sources = dict([ ((move(t), a), [ move(n) for n in l ]) for (t, a), l in self.sources.items() ])
+		self.types = dict([ (move(n), t) for n, t in self.types.items() ])
+		self.parents = dict([ (move(n), move(p)) for n, p in self.parents.items() ])
+		self.shapes = dict([ (move(n), move(s)) for n, s in self.shapes.items() ])
+
+	def	__node(self, node, attribute, table):
+	# return: path of node, or of its shape if only the shape has the attribute
+		node = self.path(node)
+		if (node, attribute) not in table and node in self.shapes:
+			return self.shapes[node]
+		return node
+
+	def	target(self, node, attribute):
+	# return: node whose message is connected to the attribute of node, None if there's none
+		target = self.targets.get((self.__node(node, attribute, self.targets), attribute))
+		if target != None:
+			return self.transform(target)
+
+	def	linked(self, target, attribute, type=None):
+	# return: nodes whose attribute is connected from the message of target, only those whose shapes are of the type if it's given
+		nodes = self.sources.get((self.__node(target, attribute, self.sources), attribute), [])
+		return [ self.transform(n) for n in nodes if not type or self.types.get(n) == type ]
+
+	def	transform(self, node):
+	# return: transform of node if it's a shape, otherwise node itself
+		node = self.path(node)
+		return self.name(self.parents.get(node, node))
+
+	def	count(self):
+		return len(self.targets)
+
+	def	links(self):
+	# return: sorted list of (node, attribute, target) by their full paths
+		return sorted([ (n, a, t) for (n, a), t in self.targets.items() ])
@@ -18,7 +18,7 @@ from re import *
 import types, os, random, re, copy, csv, traceback, sys
 import maya.cmds as cmds
 import maya.mel as mel
-import jc.files
+import jc.files, jc.lazy
 
 
 __moduleName = "jc.menu"
@@ -69,6 +69,13 @@ def	getMenus():
 	return __menus.keys()
 
 
+def	first(listCallback):
+# return: a callback giving the first item of the list, to be used as the default of an option
+# so that the list isn't built until the option is used
+	def f(): return listCallback()[0]
+	return f
+
+
 class menu:
 
 	__parent = None
@@ -509,7 +516,11 @@ class option:
 			self.__varName = parent.getName()+'.'+self.__name
 
 		self.__default = default
-		self.value = self.setupVar(False)
+		if callable(default) and not cmds.optionVar(ex=self.__varName):
+			# the default is taken from a callback, which is deferred until the option is first used
+			self.value = None
+		else:
+			self.value = self.setupVar(False)
 
 		parent.addOption(self)
 
@@ -531,6 +542,8 @@ class option:
 	def setupVar(self, default):
 		if default or not cmds.optionVar(ex=self.__varName):
 			self.value = self.__default
+			if callable(self.value):
+				self.value = self.value()
 		pair = ( self.__varName, self.value )
 		if default or not cmds.optionVar(ex=self.__varName):
 			self.setupVarSub(pair)
@@ -706,10 +719,11 @@ class listOption(option):
 	def __init__(self, parent, name, default, listCallback, share=False, short=None, positional=False):
 		option.__init__(self, parent, name, default, share=share, short=short, positional=positional)
 		self.__listCallback = listCallback
-		try:
-			self.value = str(self.value)
-		except:
-			self.setupVar(True)
+		if self.value != None:
+			try:
+				self.value = str(self.value)
+			except:
+				self.setupVar(True)
 
 
 	def setupVarSub(self, pair):
@@ -766,7 +780,7 @@ class checkboxOption(option):
 	def __init__(self, parent, name, default, listCallback, share=False, short=None, positional=False):
 		option.__init__(self, parent, name, default, share=share, short=short, positional=positional)
 		self.__listCallback = listCallback
-		if not isinstance(self.value, types.ListType):
+		if self.value != None and not isinstance(self.value, types.ListType):
 			self.setupVar(True)
 
 
@@ -833,10 +847,11 @@ class radioButtonOption(option):
 		option.__init__(self, parent, name, default, share=share, short=short, positional=positional)
 		self.__listCallback = listCallback
 		self.id = []
-		try:
-			self.value = str(self.value)
-		except:
-			self.setupVar(True)
+		if self.value != None:
+			try:
+				self.value = str(self.value)
+			except:
+				self.setupVar(True)
 
 
 	def setupVarSub(self, pair):
@@ -2538,6 +2553,9 @@ def	loadFiles(typ, files, paths=[]):
 		"""
 	elif typ == 'python':
 		for file in files:
+			if jc.lazy.isPending(file):
+				# it's imported upon first use
+				continue
 			cmd = "import "+file+"\nreload("+file+")"
 			print cmd
 			exec(cmd)
@@ -2569,12 +2587,12 @@ def	doMenu(do=True, parent=None):
 			m = createMenu(__moduleName, parent)
 
 		i = commandItem(m, __moduleName+".menuBuilder", "Menu Builder", annotation="Open Menu Builder")
-		listOption(i, "menu", menuOptions()[0], menuOptions)
+		listOption(i, "menu", first(menuOptions), menuOptions)
 
 		i = commandItem(m, __moduleName+".selectShelf", "Select Shelf", annotation="Show selected shelf")
-		listOption(i, "shelf", shelfOptions()[0], shelfOptions)
+		listOption(i, "shelf", first(shelfOptions), shelfOptions)
 
 		i = commandItem(m, __moduleName+".autoload", "Autoload", annotation="Show autoload menus")
-		checkboxOption(i, "menus", [menuOptions1()[0]], menuOptions1)
+		checkboxOption(i, "menus", lambda: [ menuOptions1()[0] ], menuOptions1)
 
 		i = commandItem(m, __moduleName+".dismiss", "Dismiss", annotation="Dimiss jc.menu")
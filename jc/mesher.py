@@ -0,0 +1,346 @@
+# mesher.py
+# Planar meshing of a pattern written in pure python.
+# The pattern is given by its boundary polygon in 2D, a grid of squares of the given size is laid over it:
+# squares inside the boundary become quads, those crossed by the boundary are clipped to it and become triangles or polygons.
+# The result is a list of vertices and a list of faces ready for MFnMesh.create(), it doesn't depend on Maya,
+# so patterns can be meshed, checked and benchmarked with any python interpreter.
+#
+# usage:
+#	points, faces = jc.mesher.planarMesh([ (0,0), (10,0), (10,5), (0,8) ], 1.0)
+#
+# Installation:
+# This file implements the module called jc.mesher.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import math
+
+
+
+def	area(points):
+# return: signed area of the polygon, positive if it's anti-clockwise
+	s = 0.0
+	n = len(points)
+	for i in range(n):
+		a = points[i-1]
+		b = points[i]
+		s += a[0]*b[1] - b[0]*a[1]
+	return s/2
+
+
+def	__crossing(a, b, axis, value):
+# point where the edge ab crosses the line, it's exactly on the line and doesn't depend on the direction of the edge,
+# so neighbouring cells clipping the same edge get the same point
+	if b[axis] < a[axis]:
+		a, b = b, a
+	t = (value - a[axis]) / (b[axis] - a[axis])
+	c = [ 0.0, 0.0 ]
+	c[axis] = value
+	c[1-axis] = a[1-axis] + (b[1-axis] - a[1-axis])*t
+	return tuple(c)
+
+
+def	clip(points, axis, value, keepAbove):
+# Clip an anti-clockwise polygon by the line where coordinate axis is equal to value.
+# A point on the line counts as above it, on both sides of the line the same way.
+# Unlike Sutherland-Hodgman a concave polygon crossing the line several times is split into separate pieces
+# instead of being joined by edges running back and forth along the line.
+# return: list of polygons, the parts of the polygon above (or below) the line
+
+	def	inside(p): return (p[axis] >= value) == keepAbove
+
+	n = len(points)
+	start = None
+	for i in range(n):
+		if not inside(points[i-1]) and inside(points[i]):
+			start = i
+			break
+	if start == None:
+		if inside(points[0]):
+			return [ list(points) ]
+		return []
+
+	# chains of points inside, each from the point where the boundary enters to where it exits
+	chains = []
+	for k in range(n):
+		i = (start + k) % n
+		a = points[i-1]
+		b = points[i]
+		if inside(a) != inside(b):
+			c = __crossing(a, b, axis, value)
+			if inside(b):
+				chains.append([ c ])
+			else:
+				chains[-1].append(c)
+		if inside(b):
+			chains[-1].append(b)
+
+	# anti-clockwise along the boundary of a piece, the line is followed in this direction
+	direction = 1
+	if (axis == 1) != keepAbove:
+		direction = -1
+
+	pieces = []
+	remaining = range(len(chains))
+	while remaining:
+		piece = []
+		k = remaining[0]
+		while k in remaining:
+			remaining.remove(k)
+			piece += chains[k]
+			# the next chain is the one entering nearest to where this one exits, along the line
+			x = chains[k][-1][1-axis]*direction
+			best = None
+			for j in range(len(chains)):
+				e = chains[j][0][1-axis]*direction
+				if e >= x and (best == None or e < best[0]):
+					best = (e, j)
+			if best == None:
+				break
+			k = best[1]
+		piece = [ p for i, p in enumerate(piece) if p != piece[i-1] ]
+		if len(piece) > 2 and area(piece) > 0:
+			pieces.append(piece)
+	return pieces
+
+
+def	isConvex(points):
+	n = len(points)
+	for i in range(n):
+		a = points[i-2]
+		b = points[i-1]
+		c = points[i]
+		if (b[0]-a[0])*(c[1]-b[1]) - (b[1]-a[1])*(c[0]-b[0]) < 0:
+			return False
+	return True
+
+
+def	__insideTriangle(p, a, b, c):
+	d1 = (b[0]-a[0])*(p[1]-a[1]) - (b[1]-a[1])*(p[0]-a[0])
+	d2 = (c[0]-b[0])*(p[1]-b[1]) - (c[1]-b[1])*(p[0]-b[0])
+	d3 = (a[0]-c[0])*(p[1]-c[1]) - (a[1]-c[1])*(p[0]-c[0])
+	return d1 >= 0 and d2 >= 0 and d3 >= 0
+
+
+def	convexParts(points):
+# Split an anti-clockwise polygon by cutting off ears until the rest is convex.
+# Points lying on an edge (eg. crossing points of a neighbouring cell) are kept, convex parts may have more than 4 points.
+# return: list of parts, each as a list of indices into points
+
+	indices = range(len(points))
+	parts = []
+	while len(indices) > 3 and not isConvex([ points[i] for i in indices ]):
+		n = len(indices)
+		found = False
+		for k in range(n):
+			ia = indices[k-1]
+			ib = indices[k]
+			ic = indices[(k+1)%n]
+			a = points[ia]
+			b = points[ib]
+			c = points[ic]
+			if (b[0]-a[0])*(c[1]-b[1]) - (b[1]-a[1])*(c[0]-b[0]) <= 0:
+				continue
+			ear = True
+			for i in indices:
+				if i not in (ia, ib, ic) and __insideTriangle(points[i], a, b, c):
+					ear = False
+					break
+			if ear:
+				parts.append([ ia, ib, ic ])
+				del indices[k]
+				found = True
+				break
+		if not found:
+			break
+	if len(indices) > 2:
+		parts.append(indices)
+	return parts
+
+
+def	__scanline(points, y):
+# return: sorted x of the crossings of the polygon with the horizontal line at y
+	xs = []
+	n = len(points)
+	for i in range(n):
+		a = points[i-1]
+		b = points[i]
+		if (a[1] > y) != (b[1] > y):
+			xs.append(a[0] + (b[0]-a[0])*(y-a[1])/(b[1]-a[1]))
+	xs.sort()
+	return xs
+
+
+def	planarMesh(boundary, size, weld=0.1):
+# Mesh the inside of a closed polygon by a grid of squares.
+#	boundary: list of (x, y), first point not repeated at the end, either direction
+#	size: length of the sides of the squares, ie. 1/resolution
+#	weld: grid corners closer than weld*size to the boundary are moved onto it, to avoid slivers
+# return: (points, faces), points is a list of (x, y), faces are lists of indices into points, all anti-clockwise
+
+	boundary = [ (float(p[0]), float(p[1])) for p in boundary ]
+	# drop repeated points
+	points = []
+	for p in boundary:
+		if not points or p != points[-1]:
+			points.append(p)
+	if len(points) > 1 and points[0] == points[-1]:
+		del points[-1]
+	if len(points) < 3:
+		raise Exception, "not enough boundary points"
+	if area(points) < 0:
+		points.reverse()
+
+	size = float(size)
+	if size <= 0:
+		raise Exception, "size must be positive"
+	xs = [ p[0] for p in points ]
+	ys = [ p[1] for p in points ]
+	i0 = int(math.floor(min(xs)/size))
+	i1 = int(math.ceil(max(xs)/size))
+	j0 = int(math.floor(min(ys)/size))
+	j1 = int(math.ceil(max(ys)/size))
+
+	vertices = []
+	index = {}		# quantized position: vertex index
+	onBoundary = []
+	quantum = size*1.0e-7
+	def	vertex(p, border=True):
+		key = (int(round(p[0]/quantum)), int(round(p[1]/quantum)))
+		if key not in index:
+			index[key] = len(vertices)
+			vertices.append(p)
+			onBoundary.append(border)
+		elif border:
+			onBoundary[index[key]] = True
+		return index[key]
+
+	faces = []
+	for j in range(j0, j1):
+		y0 = j*size
+		y1 = (j+1)*size
+		strip = []
+		for piece in clip(points, 1, y0, True):
+			strip += clip(piece, 1, y1, False)
+		if not strip:
+			continue
+
+		# columns crossed by the boundary within the strip, edges along the strip lines don't cross any cell
+		crossed = set()
+		for piece in strip:
+			for k in range(len(piece)):
+				a = piece[k-1]
+				b = piece[k]
+				if a[1] == b[1] and (a[1] == y0 or a[1] == y1):
+					continue
+				for i in range(int(math.floor(min(a[0], b[0])/size)), int(math.floor(max(a[0], b[0])/size))+1):
+					crossed.add(i)
+				# an edge running along a column line touches the cells on both sides
+				if a[0] == b[0] and a[0]/size == math.floor(a[0]/size):
+					crossed.add(int(a[0]/size)-1)
+
+		# the other cells are either inside or outside, decided by the crossings at the middle of the strip
+		xs = []
+		for piece in strip:
+			xs += __scanline(piece, (y0+y1)/2)
+		for i in range(i0, i1):
+			x0 = i*size
+			x1 = (i+1)*size
+			if i in crossed:
+				for piece in strip:
+					for left in clip(piece, 0, x0, True):
+						for cell in clip(left, 0, x1, False):
+							if area(cell) < size*size*1.0e-9:
+								continue
+							ids = [ vertex(p, p[0] not in (x0, x1) or p[1] not in (y0, y1)) for p in cell ]
+							# points merged into one vertex
+							keep = [ k for k in range(len(ids)) if ids[k] != ids[k-1] ]
+							if len(keep) < 3:
+								continue
+							cell = [ vertices[ids[k]] for k in keep ]
+							ids = [ ids[k] for k in keep ]
+							for part in convexParts(cell):
+								faces.append([ ids[k] for k in part ])
+			else:
+				x = (x0+x1)/2
+				inside = False
+				for c in xs:
+					if c < x:
+						inside = not inside
+				if inside:
+					faces.append([ vertex((x0, y0), False), vertex((x1, y0), False), vertex((x1, y1), False), vertex((x0, y1), False) ])
+
+	if weld > 0:
+		vertices, faces = __weld(vertices, faces, onBoundary, size*weld)
+	return vertices, faces
+
+
+def	__weld(vertices, faces, onBoundary, distance):
+# move grid corners (not on the boundary) onto a boundary point closer than distance, and remove collapsed faces
+
+	cells = {}
+	for i in range(len(vertices)):
+		if onBoundary[i]:
+			p = vertices[i]
+			cells.setdefault((int(math.floor(p[0]/distance)), int(math.floor(p[1]/distance))), []).append(i)
+
+	target = range(len(vertices))
+	for i in range(len(vertices)):
+		if onBoundary[i]:
+			continue
+		p = vertices[i]
+		x = int(math.floor(p[0]/distance))
+		y = int(math.floor(p[1]/distance))
+		best = None
+		for cx in (x-1, x, x+1):
+			for cy in (y-1, y, y+1):
+				for k in cells.get((cx, cy), ()):
+					d = (vertices[k][0]-p[0])**2 + (vertices[k][1]-p[1])**2
+					if d < distance*distance and (best == None or d < best[0]):
+						best = (d, k)
+		if best:
+			target[i] = best[1]
+
+	def	welded(f):
+		face = []
+		for i in f:
+			i = target[i]
+			if face and face[-1] == i:
+				continue
+			face.append(i)
+		if len(face) > 1 and face[0] == face[-1]:
+			del face[-1]
+		return face
+
+	# don't move the corners of a face which would be flipped
+	flipped = True
+	while flipped:
+		flipped = False
+		for f in faces:
+			face = welded(f)
+			if len(face) > 2 and len(set(face)) == len(face) and area([ vertices[i] for i in face ]) <= 0:
+				for i in f:
+					if target[i] != i:
+						target[i] = i
+						flipped = True
+
+	# renumber the vertices still in use
+	used = {}
+	points = []
+	result = []
+	for f in faces:
+		face = welded(f)
+		if len(face) < 3 or len(set(face)) != len(face):
+			continue
+		for k in range(len(face)):
+			i = face[k]
+			if i not in used:
+				used[i] = len(points)
+				points.append(vertices[i])
+			face[k] = used[i]
+		result.append(face)
+	return points, result
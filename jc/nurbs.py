@@ -0,0 +1,380 @@
+# nurbs.py
+# This is a collection of NURBS curve evaluation routines written in pure python.
+# They don't depend on Maya, so they can be tested and benchmarked with any python interpreter.
+#
+# Installation:
+# This file implements the module called jc.nurbs.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import math, bisect
+
+
+
+def	fullKnots(knots, degree):
+# Maya stores numberOfCVs+degree-1 knots, the textbook algorithms expect two more at both ends
+# the extra knots never contribute to the curve within its parameter range
+
+	if len(knots) < 2:
+		raise Exception, "not enough knots"
+	knots = [ float(k) for k in knots ]
+	return [ knots[0] ] + knots + [ knots[-1] ]
+
+
+def	findSpan(t, degree, n, u):
+# t: full knot vector, n: number of CVs
+# return: index i of the knot span such that t[i] <= u < t[i+1] within the parameter range
+
+	i = bisect.bisect_right(t, u) - 1
+	if i < degree:
+		i = degree
+	elif i > n-1:
+		i = n-1
+	return i
+
+
+def	deBoor(cvs, t, degree, i, u):
+# cvs: list of points in homogeneous coordinates, all of the same dimension
+# i: knot span of u as returned by findSpan()
+
+	d = [ list(cvs[j+i-degree]) for j in range(degree+1) ]
+	for r in range(1, degree+1):
+		for j in range(degree, r-1, -1):
+			a = t[j+i-degree]
+			b = t[j+1+i-r]
+			if b - a > 0:
+				alpha = (u - a) / (b - a)
+			else:
+				alpha = 0.0
+			d0 = d[j-1]
+			d1 = d[j]
+			d[j] = [ (1.0-alpha)*x + alpha*y for x, y in zip(d0, d1) ]
+	return d[degree]
+
+
+class	curve:
+# A NURBS curve built from the data returned by MFnNurbsCurve (or the attributes of a nurbsCurve node).
+#	cvs: list of (x,y,z) or (x,y,z,w)
+#	knots: Maya knots, ie. numberOfCVs+degree-1 values
+#	degree: degree of the curve
+#	form: 0 open, 1 closed, 2 periodic (same as Maya)
+
+	# 5-point Gauss-Legendre quadrature on [-1, 1]
+	gaussNodes = ( -0.9061798459386640, -0.5384693101056831, 0.0, 0.5384693101056831, 0.9061798459386640 )
+	gaussWeights = ( 0.2369268850561891, 0.4786286704993665, 0.5688888888888889, 0.4786286704993665, 0.2369268850561891 )
+
+	def	__init__(self, cvs, knots, degree, form=0):
+		if degree < 1:
+			raise Exception, "invalid degree: "+str(degree)
+		if len(knots) != len(cvs)+degree-1:
+			raise Exception, "number of knots doesn't match number of CVs"
+
+		self.degree = degree
+		self.form = form
+		self.n = len(cvs)
+		self.t = fullKnots(knots, degree)
+		self.minU = self.t[degree]
+		self.maxU = self.t[self.n]
+
+		# homogeneous coordinates (wx, wy, wz, w)
+		self.rational = False
+		self.cvs = []
+		for p in cvs:
+			w = 1.0
+			if len(p) > 3:
+				w = float(p[3])
+			if w != 1.0:
+				self.rational = True
+			self.cvs.append((float(p[0])*w, float(p[1])*w, float(p[2])*w, w))
+
+		# control points of the first derivative, whose degree is one less and knots are t[1:-1]
+		self.dt = self.t[1:-1]
+		self.dcvs = []
+		for i in range(self.n-1):
+			k = self.t[i+degree+1] - self.t[i+1]
+			if k > 0:
+				s = degree / k
+				self.dcvs.append(tuple([ s*(b-a) for a, b in zip(self.cvs[i], self.cvs[i+1]) ]))
+			else:
+				self.dcvs.append((0.0, 0.0, 0.0, 0.0))
+
+	def	clamp(self, u):
+		if self.form == 2:
+			period = self.maxU - self.minU
+			if u < self.minU or u > self.maxU:
+				u = self.minU + math.fmod(u - self.minU, period)
+				if u < self.minU:
+					u += period
+			return u
+		return min(max(u, self.minU), self.maxU)
+
+	def	spans(self):
+	# return: distinct knot values bounding the spans within the parameter range
+		s = []
+		for u in self.t[self.degree:self.n+1]:
+			if not s or u > s[-1]:
+				s.append(u)
+		return s
+
+	def	__homogeneous(self, u):
+		i = findSpan(self.t, self.degree, self.n, u)
+		return deBoor(self.cvs, self.t, self.degree, i, u), i
+
+	def	__homogeneousDerivative(self, u, i):
+		if self.degree == 1:
+			return self.dcvs[i-1]
+		return deBoor(self.dcvs, self.dt, self.degree-1, i-1, u)
+
+	def	__spanOf(self, u, i):
+	# knot span of u, walking forward from span i which is usually the span of the previous (smaller) parameter
+		t = self.t
+		if i < self.degree or u < t[i]:
+			return findSpan(t, self.degree, self.n, u)
+		while i < self.n-1 and u >= t[i+1]:
+			i += 1
+		return i
+
+	def	point(self, u):
+		u = self.clamp(u)
+		h, i = self.__homogeneous(u)
+		return [ h[0]/h[3], h[1]/h[3], h[2]/h[3] ]
+
+	def	weightedPoint(self, u):
+	# return: (x, y, z, w), the point with its weight, eg. to be used as a CV of another curve
+		u = self.clamp(u)
+		h, i = self.__homogeneous(u)
+		return (h[0]/h[3], h[1]/h[3], h[2]/h[3], h[3])
+
+	def	evaluate(self, params, tangents=True):
+	# Points and unit tangents at all params at once, the same as pointOnCurve(p=True) and pointOnCurve(nt=True) for each of them.
+	# The knot span of each parameter is found by walking from the previous one, so ascending params cost no searching.
+	# return: (points, tangents), tangents is None if not wanted
+
+		points = []
+		dirs = None
+		if tangents:
+			dirs = []
+		i = -1
+		for u in params:
+			u = self.clamp(u)
+			i = self.__spanOf(u, i)
+			h = deBoor(self.cvs, self.t, self.degree, i, u)
+			w = h[3]
+			points.append([ h[0]/w, h[1]/w, h[2]/w ])
+			if tangents:
+				d = self.__homogeneousDerivative(u, i)
+				if self.rational:
+					d = [ (d[k] - d[3]*h[k]/w)/w for k in range(3) ]
+				l = math.sqrt(d[0]*d[0] + d[1]*d[1] + d[2]*d[2])
+				if l > 0:
+					dirs.append([ d[0]/l, d[1]/l, d[2]/l ])
+				else:
+					dirs.append([ 0.0, 0.0, 0.0 ])
+		return points, dirs
+
+	def	uniformParameters(self, count):
+	# return: count+1 parameters dividing the parameter range evenly, from minU to maxU
+		return [ self.minU + (self.maxU-self.minU)*j/count for j in range(count+1) ]
+
+	def	derivative(self, u):
+	# first derivative with respect to u (not normalized)
+		u = self.clamp(u)
+		h, i = self.__homogeneous(u)
+		d = self.__homogeneousDerivative(u, i)
+		if not self.rational:
+			return [ d[0], d[1], d[2] ]
+		w = h[3]
+		return [ (d[k] - d[3]*h[k]/w)/w for k in range(3) ]
+
+	def	speed(self, u):
+		d = self.derivative(u)
+		return math.sqrt(d[0]*d[0] + d[1]*d[1] + d[2]*d[2])
+
+	def	sampleParameters(self, spacing=None, samplesPerSpan=8, chordError=None):
+	# return: parameters along the curve, at least samplesPerSpan segments per span and none longer than spacing (roughly),
+	# segments are split further until the middle of each is within chordError of its chord if it's given
+		spans = self.spans()
+		params = [ spans[0] ]
+		for k in range(len(spans)-1):
+			a = spans[k]
+			b = spans[k+1]
+			count = samplesPerSpan
+			if spacing:
+				count = max(count, int(math.ceil(self.integrate(a, b)/spacing)))
+			for j in range(1, count+1):
+				params.append(a + (b-a)*j/count)
+		if not chordError:
+			return params
+
+		result = [ params[0] ]
+		for u in params[1:]:
+			stack = [ (result[-1], u, 0) ]
+			while stack:
+				a, b, depth = stack.pop()
+				m = (a+b)/2
+				if depth < 16 and self.__chordDistance(a, m, b) > chordError:
+					stack.append((m, b, depth+1))
+					stack.append((a, m, depth+1))
+				else:
+					result.append(b)
+		return result
+
+	def	__chordDistance(self, a, m, b):
+	# return: distance of the point at m from the chord between the points at a and b
+		p = self.point(a)
+		q = self.point(b)
+		x = self.point(m)
+		d = [ q[i]-p[i] for i in range(3) ]
+		v = [ x[i]-p[i] for i in range(3) ]
+		dd = d[0]*d[0] + d[1]*d[1] + d[2]*d[2]
+		t = 0.0
+		if dd > 0:
+			t = min(max((v[0]*d[0] + v[1]*d[1] + v[2]*d[2]) / dd, 0.0), 1.0)
+		return math.sqrt(sum([ (v[i]-d[i]*t)**2 for i in range(3) ]))
+
+	def	polyline(self, spacing=None, samplesPerSpan=8):
+		return [ self.point(u) for u in self.sampleParameters(spacing, samplesPerSpan) ]
+
+	def	integrate(self, a, b):
+	# arc length between a and b by Gauss-Legendre quadrature, a and b should be within one span for accuracy
+		if b <= a:
+			return 0.0
+		h = (b - a) / 2.0
+		m = (b + a) / 2.0
+		s = 0.0
+		for x, w in zip(self.gaussNodes, self.gaussWeights):
+			s += w * self.speed(m + h*x)
+		return s * h
+
+
+class	arcLength:
+# Cumulative arc length table of a curve.
+# Each span is divided into 'subdivisions' segments, the length of each segment is integrated once when the table is built.
+# Queries within a segment are integrated on the fly, which is one quadrature instead of a walk along the whole curve.
+
+	nearlyZero = 1.0e-10
+
+	def	__init__(self, c, subdivisions=8):
+		self.curve = c
+		self.u = []
+		self.s = []
+		spans = c.spans()
+		total = 0.0
+		for k in range(len(spans)-1):
+			a = spans[k]
+			b = spans[k+1]
+			for j in range(subdivisions):
+				u0 = a + (b-a)*j/subdivisions
+				u1 = a + (b-a)*(j+1)/subdivisions
+				self.u.append(u0)
+				self.s.append(total)
+				total += c.integrate(u0, u1)
+		self.u.append(spans[-1])
+		self.s.append(total)
+		self.total = total
+
+	def	lengthAt(self, u):
+	# arc length from the start of the curve to u
+		u = self.curve.clamp(u)
+		k = bisect.bisect_right(self.u, u) - 1
+		if k < 0:
+			return 0.0
+		if k >= len(self.u)-1:
+			return self.total
+		return self.s[k] + self.curve.integrate(self.u[k], u)
+
+	def	length(self, startU=None, endU=None):
+	# arc length between startU and endU, whole curve if they're not given
+		if startU == None:
+			startU = self.curve.minU
+		if endU == None:
+			endU = self.curve.maxU
+		return self.lengthAt(endU) - self.lengthAt(startU)
+
+	def	findU(self, length):
+	# inverse of lengthAt(): parameter at which the arc length from the start of the curve is equal to length
+		if length <= 0:
+			return self.curve.minU
+		if length >= self.total:
+			return self.curve.maxU
+
+		k = bisect.bisect_right(self.s, length) - 1
+		k = min(max(k, 0), len(self.u)-2)
+		a = u0 = self.u[k]
+		b = self.u[k+1]
+		segment = self.s[k+1] - self.s[k]
+		if segment < self.nearlyZero:
+			return a
+
+		# Newton's method within the segment, bisection if it steps outside
+		u = a + (b-a)*(length-self.s[k])/segment
+		for i in range(20):
+			f = self.s[k] + self.curve.integrate(u0, u) - length
+			if abs(f) < self.nearlyZero * max(1.0, self.total):
+				break
+			if f > 0:
+				b = u
+			else:
+				a = u
+			v = self.curve.speed(u)
+			if v > self.nearlyZero:
+				u1 = u - f/v
+			else:
+				u1 = (a+b)/2
+			if u1 <= a or u1 >= b:
+				u1 = (a+b)/2
+			u = u1
+		return u
+
+
+	def	uniformParameters(self, count):
+	# return: count+1 parameters dividing the curve into segments of equal arc length, from minU to maxU
+		params = [ self.curve.minU ]
+		for j in range(1, count):
+			params.append(self.findU(self.total*j/count))
+		params.append(self.curve.maxU)
+		return params
+
+
+def	isoparm(cvs, knotsU, knotsV, degreeU, degreeV, formU, formV, v):
+# Isoparm along U of a NURBS surface at the given V, eg. "surface.u[v]" in Maya.
+#	cvs: CVs of the surface in U-major order as returned by MFnNurbsSurface.getCVs(), ie. cvs[i*numCVsInV+j]
+# Each row of CVs along V is evaluated at v to give one CV of the isoparm.
+# return: curve
+
+	numV = len(knotsV) - degreeV + 1
+	numU = len(cvs) / numV
+	if numU*numV != len(cvs):
+		raise Exception, "number of CVs doesn't match number of knots"
+	rows = []
+	for i in range(numU):
+		rows.append(curve(cvs[i*numV:(i+1)*numV], knotsV, degreeV, formV).weightedPoint(v))
+	return curve(rows, knotsU, degreeU, formU)
+
+
+__arcLengthCache = {}
+
+
+def	getArcLength(key, cvs, knots, degree, form=0):
+# return: arc length table of the curve identified by key (eg. its node name)
+# the table is built once and rebuilt only when the given curve data differs from the cached one
+
+	signature = (tuple([ tuple(p) for p in cvs ]), tuple(knots), degree, form)
+	if key in __arcLengthCache:
+		s, table = __arcLengthCache[key]
+		if s == signature:
+			return table
+	table = arcLength(curve(cvs, knots, degree, form))
+	__arcLengthCache[key] = (signature, table)
+	return table
+
+
+def	clearArcLengthCache(key=None):
+	if key == None:
+		__arcLengthCache.clear()
+	elif key in __arcLengthCache:
+		del __arcLengthCache[key]
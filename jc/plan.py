@@ -0,0 +1,258 @@
+# plan.py
+# Build plans written in pure python.
+# A plan is a graph of steps, each step is a function call whose arguments may refer to the results of other steps.
+# A scheduler runs the steps in the order of their dependencies and records the time taken by each of them.
+# The result of each step is cached under the hash of its inputs: its function, arguments, the hashes of the steps
+# it depends on and the state of the scene objects (sources) it reads. When the plan is run again, only the steps
+# whose inputs have changed (or which depend on a step run again) are run, the others give their cached results.
+# As the results of the steps completed before a failure are cached, running the plan again resumes from the failed step.
+# It doesn't depend on Maya, so plans can be built, checked and benchmarked with any python interpreter.
+#
+# usage:
+#	plan = jc.plan.buildPlan()
+#	a = plan.add("pattern1", jc.clothes.createPattern, ("pattern1", "curve1", "curve2"), { 'mirror':True }, sources=[ "curve1", "curve2" ])
+#	plan.add("garment1", jc.clothes.createGarment, (a,), { 'prefix':"shirt" })
+#	s = jc.plan.scheduler(fingerprint)
+#	s.run(plan)
+#	print s.report()
+#
+# Installation:
+# This file implements the module called jc.plan.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import time, types
+from hashlib import md5
+
+
+
+class	output:
+# reference to the result of a step, or an item of it, eg. output("stitch1")[2][0]
+
+	def	__init__(self, name, index=()):
+		self.name = name
+		self.index = tuple(index)
+
+	def	__getitem__(self, i):
+		return output(self.name, self.index+(i,))
+
+	def	__repr__(self):
+		return "output(%r)%s" % (self.name, "".join([ "[%r]" % i for i in self.index ]))
+
+	def	resolve(self, results):
+		r = results[self.name]
+		for i in self.index:
+			r = r[i]
+		return r
+
+
+def	__references__(value):
+# return: names of the steps referred to by outputs in value
+	if isinstance(value, output):
+		return [ value.name ]
+	if isinstance(value, (types.ListType, types.TupleType)):
+		return [ n for v in value for n in __references__(v) ]
+	if isinstance(value, types.DictType):
+		return [ n for k in sorted(value.keys()) for n in __references__(value[k]) ]
+	return []
+
+
+def	__resolve__(value, results):
+	if isinstance(value, output):
+		return value.resolve(results)
+	if isinstance(value, types.ListType):
+		return [ __resolve__(v, results) for v in value ]
+	if isinstance(value, types.TupleType):
+		return tuple([ __resolve__(v, results) for v in value ])
+	if isinstance(value, types.DictType):
+		return dict([ (k, __resolve__(v, results)) for k, v in value.items() ])
+	return value
+
+
+def	__canonical__(value, keys):
+# return: string of value, the same for equal inputs, outputs are replaced by the keys of their steps
+	if isinstance(value, output):
+		return "<%s%r>" % (keys[value.name], value.index)
+	if isinstance(value, (types.ListType, types.TupleType)):
+		return "[" + ",".join([ __canonical__(v, keys) for v in value ]) + "]"
+	if isinstance(value, types.DictType):
+		return "{" + ",".join([ "%r:%s" % (k, __canonical__(value[k], keys)) for k in sorted(value.keys()) ]) + "}"
+	return repr(value)
+
+
+class	step:
+
+	def	__init__(self, name, function, args=(), keywords={}, after=(), sources=(), transient=False):
+		self.name = name
+		self.function = function
+		self.args = tuple(args)
+		self.keywords = dict(keywords)
+		self.after = list(after)			# names of steps to be run before, without using their results
+		self.sources = list(sources)		# scene objects read by the step
+		self.transient = transient			# the result is used up by the steps depending on it
+
+	def	functionName(self):
+		return getattr(self.function, "__module__", "") + "." + getattr(self.function, "__name__", repr(self.function))
+
+	def	dependencies(self):
+		d = []
+		for n in __references__(self.args) + __references__(self.keywords) + self.after:
+			if n not in d:
+				d.append(n)
+		return d
+
+
+class	buildPlan:
+
+	def	__init__(self):
+		self.steps = {}
+		self.names = []			# in the order of being added
+
+	def	add(self, name, function, args=(), keywords={}, after=(), sources=(), transient=False):
+	# return: output of the step, to be used as an argument of other steps
+		if name in self.steps:
+			raise Exception, "step already exists: "+name
+		self.steps[name] = step(name, function, args, keywords, after, sources, transient)
+		self.names.append(name)
+		return output(name)
+
+	def	step(self, name):
+		return self.steps[name]
+
+	def	order(self):
+	# return: names of the steps, each after those it depends on, otherwise in the order of being added
+		result = []
+		state = {}		# name: 1 being visited, 2 done
+		for name in self.names:
+			if name in state:
+				continue
+			stack = [ (name, 0) ]
+			while stack:
+				n, i = stack.pop()
+				if n not in self.steps:
+					raise Exception, "unknown step: "+n
+				if i == 0:
+					if state.get(n) == 2:
+						continue
+					state[n] = 1
+				d = self.steps[n].dependencies()
+				while i < len(d) and state.get(d[i]) == 2:
+					i += 1
+				if i < len(d):
+					if state.get(d[i]) == 1:
+						raise Exception, "cyclic dependency: "+n+" and "+d[i]
+					stack.append((n, i+1))
+					stack.append((d[i], 0))
+				else:
+					state[n] = 2
+					result.append(n)
+		return result
+
+
+class	scheduler:
+# fingerprint: function returning a string of the state of a scene object, for the sources of the steps
+# exists: function returning whether a cached result is still there, eg. its nodes are still in the scene
+
+	def	__init__(self, fingerprint=None, exists=None):
+		self.fingerprint = fingerprint
+		self.exists = exists
+		self.cache = {}			# step name: (key, result)
+		self.timings = []		# (step name, seconds, "run", "cached" or "failed") of the last run
+
+	def	key(self, s, keys):
+	# return: hash of the inputs of the step
+		text = s.functionName() + __canonical__(s.args, keys) + __canonical__(s.keywords, keys)
+		text += "".join([ "<%s>" % keys[n] for n in s.after ])
+		if self.fingerprint:
+			text += "".join([ "%r:%s" % (x, self.fingerprint(x)) for x in s.sources ])
+		return md5(text).hexdigest()
+
+	def	keys(self, plan):
+	# return: dictionary of step name and hash of its inputs
+		keys = {}
+		for n in plan.order():
+			keys[n] = self.key(plan.step(n), keys)
+		return keys
+
+	def	outdated(self, plan, keys=None):
+	# return: names of the steps to be run, in the order of running
+	# A step is run if it's not cached, its inputs have changed or a step it depends on is run.
+	# It's run as well if its result is gone (eg. its nodes have been deleted), unless it's transient and not needed,
+	# ie. its result is used up by the steps depending on it (eg. meshes combined into one) and none of them is run.
+
+		order = plan.order()
+		if keys == None:
+			keys = self.keys(plan)
+		result = set()
+		changed = True
+		while changed:
+			changed = False
+			for n in order:
+				if n in result:
+					continue
+				s = plan.step(n)
+				if n not in self.cache or self.cache[n][0] != keys[n] or result & set(s.dependencies()):
+					result.add(n)
+					changed = True
+				elif self.exists and not s.transient and not self.exists(self.cache[n][1]):
+					result.add(n)
+					changed = True
+			if self.exists:
+				for n in order:
+					if n in result:
+						for d in __references__(plan.step(n).args) + __references__(plan.step(n).keywords):
+							if d not in result and not self.exists(self.cache[d][1]):
+								result.add(d)
+								changed = True
+		return [ n for n in order if n in result ]
+
+	def	run(self, plan, call=None):
+	# call: function called with the step and its resolved arguments to run it, the function of the step is called by default
+	# return: dictionary of step name and result
+
+		self.timings = []
+		keys = self.keys(plan)
+		outdated = set(self.outdated(plan, keys))
+		results = {}
+		for n in plan.order():
+			s = plan.step(n)
+			if n not in outdated:
+				results[n] = self.cache[n][1]
+				self.timings.append((n, 0.0, "cached"))
+				continue
+
+			args = __resolve__(s.args, results)
+			keywords = __resolve__(s.keywords, results)
+			t = time.time()
+			try:
+				if call:
+					r = call(s, args, keywords)
+				else:
+					r = s.function(*args, **keywords)
+			except:
+				self.cache.pop(n, None)
+				self.timings.append((n, time.time() - t, "failed"))
+				raise
+			self.timings.append((n, time.time() - t, "run"))
+			self.cache[n] = (keys[n], r)
+			results[n] = r
+
+		# forget steps no longer in the plan
+		for n in self.cache.keys():
+			if n not in plan.steps:
+				del self.cache[n]
+		return results
+
+	def	report(self):
+	# return: the timings of the last run as text, slowest first
+		lines = []
+		for n, t, status in sorted(self.timings, key=lambda x: -x[1]):
+			lines.append("%-40s %10.3f ms  %s" % (n, t*1000, status))
+		total = sum([ t for n, t, status in self.timings ])
+		lines.append("%-40s %10.3f ms  %d run, %d cached" % ("total", total*1000,
+			len([ x for x in self.timings if x[2] == "run" ]), len([ x for x in self.timings if x[2] == "cached" ])))
+		return "\n".join(lines)
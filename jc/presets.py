@@ -0,0 +1,83 @@
+# presets.py
+# Index of attribute preset files, written in pure python.
+# Preset directories are walked once, then the index is reused until the modification time of any of the walked directories changes.
+# Adding, removing or renaming a preset file changes the modification time of its directory, which invalidates the index of that preset path.
+#
+# Installation:
+# This file implements the module called jc.presets.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import os
+
+
+
+def	mtime(path):
+# return: modification time of path, None if it doesn't exist
+	try:
+		return os.stat(path).st_mtime
+	except OSError:
+		return None
+
+
+class	presetIndex:
+# Preset names by node type of each preset path (eg. .../attrPresets)
+# each entry is (modification times of all directories walked, { node type: [ preset names ] })
+
+	def	__init__(self):
+		self.paths = {}
+		self.scans = 0
+
+	def	scan(self, path):
+		self.scans += 1
+		mtimes = { path: mtime(path) }
+		index = {}
+		if os.path.isdir(path):
+			for root, dirs, files in os.walk(path):
+				mtimes[root] = mtime(root)
+				presets = index.setdefault(os.path.basename(root), [])
+				for f in files:
+					if f.endswith('.mel'):
+						presets.append(f[:-4])
+		self.paths[path] = (mtimes, index)
+		return index
+
+	def	lookup(self, path):
+	# return: { node type: [ preset names ] } of path, scanned again if any of its directories changed
+		if path in self.paths:
+			mtimes, index = self.paths[path]
+			for d, t in mtimes.iteritems():
+				if mtime(d) != t:
+					break
+			else:
+				return index
+		return self.scan(path)
+
+	def	presets(self, node, paths):
+	# return: names of the presets of node type in the order of paths
+		p = []
+		for path in paths:
+			p += self.lookup(path).get(node, [])
+		return p
+
+	def	clear(self, path=None):
+		if path == None:
+			self.paths.clear()
+		elif path in self.paths:
+			del self.paths[path]
+
+
+__index = presetIndex()
+
+
+def	getPresets(node, paths):
+# return: names of the presets of node type found under paths, served from the index of this session
+	return __index.presets(node, paths)
+
+
+def	clearPresets(path=None):
+	__index.clear(path)
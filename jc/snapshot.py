@@ -0,0 +1,130 @@
+# snapshot.py
+# Snapshots of attribute values written in pure python, to compare them, save them and set them back in one go.
+# A snapshot is a dictionary of node: { plug: value }, where plug is the attribute relative to the node,
+# with the index of an element of a multi attribute, eg. { "nClothShape1": { "thss": 0.1, "w[2]": 1.0 } }.
+# A value is either
+#	a number, a boolean or a string,
+#	a tuple of the values of a compound attribute, eg. (0.0, 1.0, 0.0) of translate, or
+#	a dictionary { 'type':data type, 'value':list } of a data attribute, eg. { 'type':"doubleArray", 'value':[ 0.5, 1.0 ] }.
+# They're set back by setAttr commands made here, all run by one mel.eval in one undo chunk (see jc.helper.setAttributes).
+# It doesn't depend on Maya, so it can be tested and benchmarked with any python interpreter.
+#
+# usage:
+#	before = jc.helper.getAttributes([ "nClothShape1" ], [ "thss", "stch" ])
+#	...
+#	after = jc.helper.getAttributes([ "nClothShape1" ], [ "thss", "stch" ])
+#	print jc.snapshot.diff(before, after)
+#	open("/tmp/ncloth.json", "w").write(jc.snapshot.dumps(before))
+#
+# Installation:
+# This file implements the module called jc.snapshot.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import types, json
+
+# data types set by setAttr -type: arrays given as one list, arrays given by the number of items before them, and the others
+__lists = ("doubleArray", "floatArray", "Int32Array")
+__counted = ("pointArray", "vectorArray", "stringArray")
+__uncounted = ("matrix", "string", "double2", "double3", "float2", "float3", "long2", "long3", "short2", "short3")
+dataTypes = __lists + __counted + __uncounted
+
+
+
+def	diff(before, after):
+# return: snapshot of the values in after which differ from or aren't in before
+	result = {}
+	for node, values in after.items():
+		old = before.get(node, {})
+		changed = dict([ (p, v) for p, v in values.items() if p not in old or old[p] != v ])
+		if changed:
+			result[node] = changed
+	return result
+
+
+def	changes(before, after):
+# return: list of (node, plug, value before, value after) of the values which differ, None for those missing on either side
+	result = []
+	for node in sorted(set(before.keys()) | set(after.keys())):
+		a = before.get(node, {})
+		b = after.get(node, {})
+		for p in sorted(set(a.keys()) | set(b.keys())):
+			if a.get(p) != b.get(p):
+				result.append((node, p, a.get(p), b.get(p)))
+	return result
+
+
+def	remap(snapshot, names):
+# return: snapshot of the nodes renamed by names, eg. { "nClothShape1":"nClothShape2" } to set the values on a copy
+	return dict([ (names.get(node, node), dict(values)) for node, values in snapshot.items() ])
+
+
+def	__json__(value):
+	if isinstance(value, types.TupleType):
+		return list(value)
+	return value
+
+
+def	dumps(snapshot):
+# return: snapshot as JSON text
+	return json.dumps(dict([ (node, dict([ (p, __json__(v)) for p, v in values.items() ])) for node, values in snapshot.items() ]),
+		indent=1, sort_keys=True)
+
+
+def	__value__(value):
+	if isinstance(value, types.ListType):
+		return tuple([ __value__(v) for v in value ])
+	if isinstance(value, types.DictType):
+		return { 'type':str(value['type']), 'value':[ isinstance(v, types.ListType) and tuple(v) or v for v in value['value'] ] }
+	if isinstance(value, types.UnicodeType):
+		return str(value)
+	return value
+
+
+def	loads(text):
+# return: snapshot of JSON text made by dumps
+	return dict([ (str(node), dict([ (str(p), __value__(v)) for p, v in values.items() ])) for node, values in json.loads(text).items() ])
+
+
+def	setAttrArguments(value):
+# return: (values, flags) of cmds.setAttr setting a plug to value, ie. cmds.setAttr(plug, *values, **flags)
+	if isinstance(value, types.DictType):
+		t = value['type']
+		if t not in dataTypes:
+			raise Exception, "unsupported data type: "+t
+		if t in __lists:
+			return [ list(value['value']) ], { 'type':t }
+		if t in __counted:
+			return [ len(value['value']) ] + list(value['value']), { 'type':t }
+		return list(value['value']), { 'type':t }
+	if isinstance(value, types.StringTypes):
+		return [ value ], { 'type':"string" }
+	if isinstance(value, types.TupleType):
+		return list(value), {}
+	return [ value ], {}
+
+
+def	__mel__(value):
+# return: value as an argument of a MEL command, a list as the number of its items followed by them
+	if isinstance(value, types.BooleanType):
+		return value and "1" or "0"
+	if isinstance(value, types.FloatType):
+		return repr(value)
+	if isinstance(value, (types.IntType, types.LongType)):
+		return str(value)
+	if isinstance(value, types.ListType):
+		return " ".join([ str(len(value)) ] + [ __mel__(v) for v in value ])
+	return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+def	setAttrCommand(plug, value):
+# return: MEL setAttr command setting a plug to value, made of the arguments of setAttrArguments
+	values, flags = setAttrArguments(value)
+	words = [ "setAttr" ]
+	if 'type' in flags:
+		words += [ "-type", __mel__(flags['type']) ]
+	return " ".join(words + [ __mel__(plug) ] + [ __mel__(v) for v in values ]) + ";"
@@ -0,0 +1,149 @@
+# weights.py
+# This is a collection of routines handling skin weights and per-vertex maps (eg. of nCloth) as plain lists, written in pure python.
+# They don't depend on Maya, so they can be tested and benchmarked with any python interpreter.
+#
+# A weight matrix is a flat list in vertex-major order, as returned by MFnSkinCluster.getWeights(),
+# ie. weights[v*len(influences)+i] is the weight of influence i on vertex v.
+#
+# The file format is the one used by jc.character.skinWeights(), one line per vertex in the order of vertex indices:
+#	weight@influence weight@influence ...
+#
+# Installation:
+# This file implements the module called jc.weights.
+# Under Maya script directory, create a directory called 'jc', put an empty file '__init__.py' and this file under there.
+# Add PYTHONPATH to point to script directory in Maya.env.
+#
+# Author's website:
+# http://sites.google.com/site/cgriders
+#
+
+import re
+
+
+
+def	formatWeights(weights, influences, threshold=1.0e-10):
+# return: one line for each vertex, weights below threshold are left out
+
+	n = len(influences)
+	lines = []
+	for v in range(0, len(weights), n):
+		s = ""
+		for i in range(n):
+			w = weights[v+i]
+			if w > threshold:
+				s += str(w)+"@"+influences[i]+" "
+		lines.append(s)
+	return lines
+
+
+def	parseWeights(lines):
+# return: a dictionary of influence name and weight for each line
+
+	rows = []
+	for line in lines:
+		row = {}
+		for item in line.split():
+			w = item.split("@")
+			if len(w) == 2:
+				row[w[1]] = row.get(w[1], 0.0) + float(w[0])
+		rows.append(row)
+	return rows
+
+
+def	matchInfluences(names, influences):
+# match influence names read from file with the current influences
+# names are matched exactly or else by their short names (without path and namespace)
+# return: dictionary of name and index into influences, unmatched names are left out
+
+	def	short(x): return x.split("|")[-1].split(":")[-1]
+
+	exact = {}
+	shortNames = {}
+	for i in range(len(influences)):
+		exact[influences[i]] = i
+		shortNames.setdefault(short(influences[i]), i)
+
+	m = {}
+	for name in names:
+		if name in exact:
+			m[name] = exact[name]
+		elif short(name) in shortNames:
+			m[name] = shortNames[short(name)]
+	return m
+
+
+def	normalize(row):
+# scale a list of weights such that they sum up to one, a list of zeros is left untouched
+
+	s = sum(row)
+	if s > 0:
+		return [ w/s for w in row ]
+	return row
+
+
+def	remapWeights(rows, influences, vertices=None, normalizeWeights=True):
+# build the weight matrix for the current influences from weights read by parseWeights()
+#	rows: list of dictionaries, one for each vertex
+#	vertices: indices of the vertices to be imported, all rows if not given
+# return: (matrix, vertices, unmatched names), a vertex without any matched weight is all zeros
+
+	if vertices == None:
+		vertices = range(len(rows))
+	vertices = [ v for v in vertices if v < len(rows) ]
+
+	names = set()
+	for v in vertices:
+		names.update(rows[v].keys())
+	m = matchInfluences(names, influences)
+
+	n = len(influences)
+	matrix = []
+	for v in vertices:
+		row = [ 0.0 ]*n
+		for name, w in rows[v].iteritems():
+			if name in m:
+				row[m[name]] += w
+		if normalizeWeights:
+			row = normalize(row)
+		matrix += row
+
+	return matrix, vertices, sorted(names - set(m.keys()))
+
+
+__componentIndex = re.compile(r"\[([0-9]+)(?::([0-9]+))?\]$")
+
+
+def	componentIndices(components):
+# components: flattened or not, eg. [ "pShape.vtx[3]", "pShape.vtx[5:7]" ] gives [ 3, 5, 6, 7 ]
+# return: list of indices in the order of components
+
+	indices = []
+	for c in components:
+		m = __componentIndex.search(c)
+		if m:
+			i = int(m.group(1))
+			if m.group(2):
+				indices += range(i, int(m.group(2))+1)
+			else:
+				indices.append(i)
+	return indices
+
+
+def	mergeMap(values, indices, value):
+# values: per-vertex map, eg. inputAttractPerVertex of nCloth
+# value: a number, or a list of numbers in the order of indices
+# return: a copy of values with the values at indices replaced, indices beyond the end of values are ignored
+
+	result = list(values)
+	n = len(result)
+	if isinstance(value, (list, tuple)):
+		if len(value) != len(indices):
+			raise Exception, "number of values doesn't match number of indices"
+		for i, v in zip(indices, value):
+			if 0 <= i < n:
+				result[i] = v
+	else:
+		for i in indices:
+			if 0 <= i < n:
+				result[i] = value
+	return result
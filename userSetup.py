@@ -8,7 +8,11 @@ import sys
 
 # sys.path.append( '<your scripts directory>' )
 
-import jc.helper, jc.files, jc.menu, jc.character, jc.hair, jc.clothes
+# the jc modules are imported upon first use of any of their commands or options, see jc/lazy.py
+# replace the following two lines by this one to import them all at startup:
+# import jc.helper, jc.files, jc.menu, jc.character, jc.hair, jc.clothes
+import jc.lazy
+jc.lazy.install([ "jc.helper", "jc.files", "jc.menu", "jc.character", "jc.hair", "jc.clothes" ])
 
 
 # unmark the following lines to enable testMenu upon startup